@@ -0,0 +1,74 @@
+"""add_listing_indexes
+
+Revision ID: 3f9a1c2b7d40
+Revises: ec5fa6485586
+Create Date: 2026-10-17 10:12:44.518203
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2b7d40"
+down_revision: Union[str, Sequence[str], None] = "ec5fa6485586"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f("ix_categories_name"), "categories", ["name"], unique=False)
+    # Partial indexes matching the public listing queries: the filter is the
+    # index predicate and the columns are the sort key, so a page is read
+    # from the index in order instead of scanning and sorting the table.
+    # SQLite stores booleans as integers and queries compare them to 1
+    published = sa.text("published_at IS NOT NULL")
+    op.create_index(
+        "ix_posts_published",
+        "posts",
+        ["published_at", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_posts_category_published",
+        "posts",
+        ["category_id", "published_at", "id"],
+        postgresql_where=published,
+        sqlite_where=published,
+    )
+    op.create_index(
+        "ix_projects_active_created",
+        "projects",
+        ["created_at", "id"],
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_projects_active_featured",
+        "projects",
+        ["featured", "created_at", "id"],
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+    op.create_index(
+        "ix_experience_active_start",
+        "experience",
+        ["start_date", "id"],
+        postgresql_where=sa.text("is_active"),
+        sqlite_where=sa.text("is_active = 1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_experience_active_start", table_name="experience")
+    op.drop_index("ix_projects_active_featured", table_name="projects")
+    op.drop_index("ix_projects_active_created", table_name="projects")
+    op.drop_index("ix_posts_category_published", table_name="posts")
+    op.drop_index("ix_posts_published", table_name="posts")
+    op.drop_index(op.f("ix_categories_name"), table_name="categories")
@@ -0,0 +1,86 @@
+"""add_post_search
+
+Revision ID: a41e6d9c0b53
+Revises: 3f9a1c2b7d40
+Create Date: 2026-10-17 14:03:27.904611
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a41e6d9c0b53"
+down_revision: Union[str, Sequence[str], None] = "3f9a1c2b7d40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSTGRES_UPGRADE = (
+    # A generated column is filled for existing rows as it is added
+    """
+    ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(excerpt, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+)
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE posts_fts USING fts5(
+        title, excerpt, content,
+        content='posts', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts (rowid, title, excerpt, content)
+        VALUES (new.id, new.title, new.excerpt, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, excerpt, content
+    ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+        INSERT INTO posts_fts (rowid, title, excerpt, content)
+        VALUES (new.id, new.title, new.excerpt, new.content);
+    END
+    """,
+    # Index the posts that already exist
+    "INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        statements = POSTGRES_UPGRADE
+    elif dialect == "sqlite":
+        statements = SQLITE_UPGRADE
+    else:
+        return
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_posts_search_vector", table_name="posts")
+        op.drop_column("posts", "search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("posts_fts_insert", "posts_fts_delete", "posts_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
@@ -1,22 +1,25 @@
-from typing import Dict
+from typing import Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ....core.loop_monitor import loop_monitor
 from ....core.rate_limiter import rate_limiter
 from ....core.security import create_access_token, verify_password, verify_token
-from ....database import get_db
+from ....database import get_async_db, get_pools_stats, reset_pool_metrics
 from ....models import User as UserModel
-from ....schemas import Token, UserLogin
+from ....schemas import IPRule, Token, UserLogin
 
 router = APIRouter()
 security = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> UserModel:
     """Get current authenticated user"""
     token = credentials.credentials
@@ -28,7 +31,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    user = await db.scalar(select(UserModel).where(UserModel.username == username))
     if not user or not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
@@ -37,14 +40,15 @@ def get_current_user(
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Admin login"""
-    user = (
-        db.query(UserModel)
-        .filter(UserModel.username == user_credentials.username)
-        .first()
+    user = await db.scalar(
+        select(UserModel).where(UserModel.username == user_credentials.username)
     )
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    # bcrypt is deliberately slow, so keep it off the event loop
+    if not user or not await run_in_threadpool(
+        verify_password, user_credentials.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -61,6 +65,50 @@ async def get_rate_limit_stats(current_user: UserModel = Depends(get_current_use
     return rate_limiter.get_global_stats()
 
 
+@router.get("/rate-limit/top", response_model=Dict)
+async def get_top_rate_limit_clients(
+    window: str = Query("1h", pattern="^(1m|1h|1d)$"),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get the top requesters and violators over a time window (admin only)"""
+    return rate_limiter.get_top_clients(window, limit)
+
+
+@router.get("/rate-limit/ip-rules", response_model=List[IPRule])
+async def list_ip_rules(current_user: UserModel = Depends(get_current_user)):
+    """List the rate limiter allow and deny rules (admin only)"""
+    return rate_limiter.ip_filter.rules()
+
+
+@router.post(
+    "/rate-limit/ip-rules", response_model=IPRule, status_code=status.HTTP_201_CREATED
+)
+async def add_ip_rule(
+    rule: IPRule, current_user: UserModel = Depends(get_current_user)
+):
+    """Allow or deny a network, replacing any rule for it (admin only)"""
+    rate_limiter.ip_filter.add(rule.cidr, rule.action)
+    return rule
+
+
+@router.delete("/rate-limit/ip-rules")
+async def delete_ip_rule(
+    cidr: str = Query(..., description="Network of the rule, e.g. 203.0.113.0/24"),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Remove an allow or deny rule (admin only)"""
+    try:
+        removed = rate_limiter.ip_filter.remove(cidr)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="IP rule not found"
+        )
+    return {"message": f"IP rule removed for: {cidr}"}
+
+
 @router.get("/rate-limit/client/{client_id}", response_model=Dict)
 async def get_client_rate_limit_stats(
     client_id: str, current_user: UserModel = Depends(get_current_user)
@@ -76,3 +124,32 @@ async def reset_client_rate_limit(
     """Reset rate limiting for a specific client (admin only)"""
     rate_limiter.reset_client(client_id)
     return {"message": f"Rate limiting reset for client: {client_id}"}
+
+
+@router.get("/loop-monitor", response_model=Dict)
+async def get_loop_monitor_stats(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Get event loop lag and the stacks that blocked the loop (admin only)"""
+    return loop_monitor.get_stats(limit)
+
+
+@router.post("/loop-monitor/reset")
+async def reset_loop_monitor(current_user: UserModel = Depends(get_current_user)):
+    """Clear event loop lag measurements (admin only)"""
+    loop_monitor.reset()
+    return {"message": "Event loop monitor reset"}
+
+
+@router.get("/db-pool", response_model=Dict)
+async def get_db_pool_stats(current_user: UserModel = Depends(get_current_user)):
+    """Get connection pool usage and checkout wait times (admin only)"""
+    return get_pools_stats()
+
+
+@router.post("/db-pool/reset")
+async def reset_db_pool_stats(current_user: UserModel = Depends(get_current_user)):
+    """Clear connection pool checkout metrics (admin only)"""
+    reset_pool_metrics()
+    return {"message": "Connection pool metrics reset"}
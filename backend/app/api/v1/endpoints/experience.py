@@ -1,42 +1,64 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ....core.pagination import cursor_params, keyset_after, set_next_cursor
+from ....core.projection import load_schema_fields
 from ....core.security import get_current_user
-from ....database import get_db
+from ....database import get_async_db, get_read_db
 from ....models import Experience, User
 from ....schemas import Experience as ExperienceSchema
 from ....schemas import ExperienceCreate, ExperienceList, ExperienceUpdate
 
 router = APIRouter()
 
+# Statements for the public read paths, built once with bound parameters
+_EXPERIENCE_KEY = (Experience.start_date, Experience.id)  # Latest first
+_active_experience_page = (
+    select(Experience)
+    .options(load_schema_fields(Experience, ExperienceList, *_EXPERIENCE_KEY))
+    .where(Experience.is_active)
+    .order_by(Experience.start_date.desc(), Experience.id.desc())
+    .limit(bindparam("limit"))
+)
+# Offset and keyset pages
+_active_experience = _active_experience_page.offset(bindparam("skip"))
+_active_experience_after = _active_experience_page.where(keyset_after(*_EXPERIENCE_KEY))
+_active_experience_by_id = select(Experience).where(
+    Experience.id == bindparam("experience_id"), Experience.is_active
+)
+
 
 @router.get("/", response_model=List[ExperienceList])
 async def get_experience(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all active experience entries with pagination"""
-    experience_entries = (
-        db.query(Experience)
-        .filter(Experience.is_active)
-        .order_by(Experience.start_date.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    params = {"limit": limit}
+    if cursor is not None:
+        params.update(cursor_params(cursor, *_EXPERIENCE_KEY, skip=skip))
+        query = _active_experience_after
+    else:
+        params["skip"] = skip
+        query = _active_experience
+    experience_entries = (await db.scalars(query, params)).all()
+    set_next_cursor(response, experience_entries, limit, *_EXPERIENCE_KEY)
     return experience_entries
 
 
 @router.get("/{experience_id}", response_model=ExperienceSchema)
-async def get_experience_entry(experience_id: int, db: Session = Depends(get_db)):
+async def get_experience_entry(
+    experience_id: int, db: AsyncSession = Depends(get_read_db)
+):
     """Get a single experience entry by ID"""
-    experience = (
-        db.query(Experience)
-        .filter(Experience.id == experience_id, Experience.is_active)
-        .first()
+    experience = await db.scalar(
+        _active_experience_by_id, {"experience_id": experience_id}
     )
     if not experience:
         raise HTTPException(status_code=404, detail="Experience entry not found")
@@ -46,7 +68,7 @@ async def get_experience_entry(experience_id: int, db: Session = Depends(get_db)
 @router.post("/", response_model=ExperienceSchema)
 async def create_experience(
     experience: ExperienceCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Create a new experience entry (admin only)"""
@@ -57,8 +79,8 @@ async def create_experience(
 
     db_experience = Experience(**experience.model_dump())
     db.add(db_experience)
-    db.commit()
-    db.refresh(db_experience)
+    await db.commit()
+    await db.refresh(db_experience)
     return db_experience
 
 
@@ -66,7 +88,7 @@ async def create_experience(
 async def update_experience(
     experience_id: int,
     experience_update: ExperienceUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update an experience entry (admin only)"""
@@ -75,7 +97,7 @@ async def update_experience(
             status_code=403, detail="Not authorized to update experience entries"
         )
 
-    db_experience = db.query(Experience).filter(Experience.id == experience_id).first()
+    db_experience = await db.get(Experience, experience_id)
     if not db_experience:
         raise HTTPException(status_code=404, detail="Experience entry not found")
 
@@ -83,15 +105,15 @@ async def update_experience(
     for field, value in update_data.items():
         setattr(db_experience, field, value)
 
-    db.commit()
-    db.refresh(db_experience)
+    await db.commit()
+    await db.refresh(db_experience)
     return db_experience
 
 
 @router.delete("/{experience_id}")
 async def delete_experience(
     experience_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Soft delete an experience entry (admin only)"""
@@ -100,11 +122,11 @@ async def delete_experience(
             status_code=403, detail="Not authorized to delete experience entries"
         )
 
-    db_experience = db.query(Experience).filter(Experience.id == experience_id).first()
+    db_experience = await db.get(Experience, experience_id)
     if not db_experience:
         raise HTTPException(status_code=404, detail="Experience entry not found")
 
     db_experience.is_active = False
-    db.commit()
+    await db.commit()
 
     return {"message": "Experience entry deleted successfully"}
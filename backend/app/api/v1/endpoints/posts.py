@@ -1,66 +1,154 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from slugify import slugify
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 
 from ....core.email import email_service
+from ....core.pagination import cursor_params, keyset_after, set_next_cursor
+from ....core.projection import load_schema_fields
+from ....core.search import search_posts
 from ....core.security import get_current_user
-from ....database import get_db
+from ....database import get_async_db, get_read_db
 from ....models import Category, Post, User
 from ....schemas import Category as CategorySchema
 from ....schemas import CategoryCreate, CategoryUpdate
 from ....schemas import Post as PostSchema
-from ....schemas import PostCreate, PostList, PostUpdate
+from ....schemas import PostCreate, PostList, PostSearchResult, PostUpdate
 
 router = APIRouter()
 
+# Statements for the public read paths, built once at import. Request values
+# are bound parameters, so each request reuses the same statement and its
+# compiled SQL instead of rebuilding the chain
+_POST_KEY = (Post.published_at, Post.id)  # Listing order, newest first
+# Listings load only the columns PostList serializes, never the body
+_published_posts_page = (
+    select(Post)
+    .options(
+        load_schema_fields(Post, PostList, *_POST_KEY), selectinload(Post.category)
+    )
+    .where(Post.published_at.isnot(None))
+    .order_by(Post.published_at.desc(), Post.id.desc())
+    .limit(bindparam("limit"))
+)
+_in_category = Category.slug == bindparam("category_slug")
+# Offset and keyset pages, each with and without the category filter
+_published_posts = _published_posts_page.offset(bindparam("skip"))
+_published_posts_after = _published_posts_page.where(keyset_after(*_POST_KEY))
+_published_posts_in_category = _published_posts.join(Category).where(_in_category)
+_published_posts_in_category_after = _published_posts_after.join(Category).where(
+    _in_category
+)
+_published_post_by_slug = (
+    select(Post)
+    .options(joinedload(Post.category))
+    .where(Post.slug == bindparam("slug"), Post.published_at.isnot(None))
+    .execution_options(populate_existing=True)
+)
+_categories = select(Category).order_by(Category.name)
+_category_has_posts = select(
+    exists().where(Post.category_id == bindparam("category_id"))
+)
+
+
+async def _list_published_posts(
+    db: AsyncSession,
+    response: Response,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    category_slug: Optional[str] = None,
+) -> List[Post]:
+    """Load a page of published posts by offset or after a cursor"""
+    params = {"limit": limit}
+    if category_slug:
+        params["category_slug"] = category_slug
+    if cursor is not None:
+        params.update(cursor_params(cursor, *_POST_KEY, skip=skip))
+        statement = (
+            _published_posts_in_category_after
+            if category_slug
+            else _published_posts_after
+        )
+    else:
+        params["skip"] = skip
+        statement = _published_posts_in_category if category_slug else _published_posts
+    posts = (await db.scalars(statement, params)).all()
+    set_next_cursor(response, posts, limit, *_POST_KEY)
+    return posts
+
+
+async def _get_post(db: AsyncSession, *criteria) -> Optional[Post]:
+    """Load a single post with its category, refreshing any stale attributes"""
+    return await db.scalar(
+        select(Post)
+        .options(joinedload(Post.category))
+        .where(*criteria)
+        .execution_options(populate_existing=True)
+    )
+
 
 @router.get("/", response_model=List[PostList])
 async def get_posts(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
     category_slug: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all published posts with pagination and optional category filter"""
-    query = db.query(Post).filter(Post.published_at.isnot(None))
-
-    if category_slug:
-        query = query.join(Category).filter(Category.slug == category_slug)
-
-    posts = query.order_by(Post.published_at.desc()).offset(skip).limit(limit).all()
-    return posts
+    return await _list_published_posts(db, response, skip, limit, cursor, category_slug)
 
 
 @router.get("/admin", response_model=List[PostSchema])
 async def get_all_posts(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all posts (including unpublished) for admin panel"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to view all posts")
 
-    posts = db.query(Post).order_by(Post.created_at.desc()).all()
-    return posts
+    posts = await db.scalars(
+        select(Post)
+        .options(selectinload(Post.category))
+        .order_by(Post.created_at.desc())
+    )
+    return posts.all()
 
 
 # Category management endpoints (since categories are specific to blog posts)
 @router.get("/categories", response_model=List[CategorySchema])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
     """Get all blog post categories"""
-    categories = db.query(Category).order_by(Category.name).all()
-    return categories
+    categories = await db.scalars(_categories)
+    return categories.all()
+
+
+@router.get("/search", response_model=List[PostSearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Search published posts by title, excerpt and content, best match first"""
+    results = await search_posts(db, q, skip=skip, limit=limit)
+    return [
+        {"post": post, "rank": rank, "snippet": snippet}
+        for post, rank, snippet in results
+    ]
 
 
 @router.get("/{slug}", response_model=PostSchema)
-async def get_post(slug: str, db: Session = Depends(get_db)):
+async def get_post(slug: str, db: AsyncSession = Depends(get_read_db)):
     """Get a single post by slug"""
-    post = (
-        db.query(Post).filter(Post.slug == slug, Post.published_at.isnot(None)).first()
-    )
+    post = await db.scalar(_published_post_by_slug, {"slug": slug})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
@@ -69,21 +157,14 @@ async def get_post(slug: str, db: Session = Depends(get_db)):
 @router.get("/category/{category_slug}", response_model=List[PostList])
 async def get_posts_by_category(
     category_slug: str,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get posts by category slug"""
-    posts = (
-        db.query(Post)
-        .join(Category)
-        .filter(Category.slug == category_slug, Post.published_at.isnot(None))
-        .order_by(Post.published_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return posts
+    return await _list_published_posts(db, response, skip, limit, cursor, category_slug)
 
 
 # Admin-only post management endpoints
@@ -91,7 +172,7 @@ async def get_posts_by_category(
 async def create_post(
     post: PostCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new blog post (admin only)"""
     if not current_user.is_admin:
@@ -102,7 +183,7 @@ async def create_post(
         post.slug = slugify(post.title)
 
     # Check if slug already exists
-    existing_post = db.query(Post).filter(Post.slug == post.slug).first()
+    existing_post = await db.scalar(select(Post.id).where(Post.slug == post.slug))
     if existing_post:
         raise HTTPException(
             status_code=400, detail="Post with this slug already exists"
@@ -110,9 +191,7 @@ async def create_post(
 
     # Validate category exists if provided
     if post.category_id:
-        from app.models.category import Category
-
-        category = db.query(Category).filter(Category.id == post.category_id).first()
+        category = await db.get(Category, post.category_id)
         if not category:
             raise HTTPException(status_code=422, detail="Category not found")
 
@@ -127,10 +206,9 @@ async def create_post(
     )
 
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
 
-    return db_post
+    return await _get_post(db, Post.id == db_post.id)
 
 
 @router.put("/admin/{post_id}", response_model=PostSchema)
@@ -138,13 +216,13 @@ async def update_post(
     post_id: int,
     post_update: PostUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update a blog post (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to update posts")
 
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = await db.get(Post, post_id)
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -152,28 +230,27 @@ async def update_post(
     for field, value in post_update.model_dump(exclude_unset=True).items():
         setattr(db_post, field, value)
 
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
 
-    return db_post
+    return await _get_post(db, Post.id == post_id)
 
 
 @router.delete("/admin/{post_id}")
 async def delete_post(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a blog post (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete posts")
 
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = await db.get(Post, post_id)
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    db.delete(db_post)
-    db.commit()
+    await db.delete(db_post)
+    await db.commit()
 
     return {"message": "Post deleted successfully"}
 
@@ -182,13 +259,13 @@ async def delete_post(
 async def publish_post(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Publish a blog post and notify subscribers (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to publish posts")
 
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = await db.get(Post, post_id)
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -197,7 +274,7 @@ async def publish_post(
 
     # Publish the post
     db_post.published_at = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
 
     # Notify subscribers using SendGrid's subscription group
     # This automatically handles unsubscribe compliance
@@ -211,7 +288,7 @@ async def publish_post(
 async def create_category(
     category: CategoryCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new blog post category (admin only)"""
     if not current_user.is_admin:
@@ -224,8 +301,8 @@ async def create_category(
         category.slug = slugify(category.name)
 
     # Check if slug already exists
-    existing_category = (
-        db.query(Category).filter(Category.slug == category.slug).first()
+    existing_category = await db.scalar(
+        select(Category.id).where(Category.slug == category.slug)
     )
     if existing_category:
         raise HTTPException(
@@ -234,8 +311,8 @@ async def create_category(
 
     db_category = Category(name=category.name, slug=category.slug)
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
 
     return db_category
 
@@ -245,7 +322,7 @@ async def update_category(
     category_id: int,
     category_update: CategoryUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update a blog post category (admin only)"""
     if not current_user.is_admin:
@@ -253,7 +330,7 @@ async def update_category(
             status_code=403, detail="Not authorized to update categories"
         )
 
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
 
@@ -261,8 +338,8 @@ async def update_category(
     for field, value in category_update.model_dump(exclude_unset=True).items():
         setattr(db_category, field, value)
 
-    db.commit()
-    db.refresh(db_category)
+    await db.commit()
+    await db.refresh(db_category)
 
     return db_category
 
@@ -271,7 +348,7 @@ async def update_category(
 async def delete_category(
     category_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a blog post category (admin only)"""
     if not current_user.is_admin:
@@ -279,12 +356,12 @@ async def delete_category(
             status_code=403, detail="Not authorized to delete categories"
         )
 
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = await db.get(Category, category_id)
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Check if category has posts
-    if db_category.posts:
+    # Check if category has posts without loading them
+    if await db.scalar(_category_has_posts, {"category_id": category_id}):
         raise HTTPException(
             status_code=400,
             detail=(
@@ -293,7 +370,7 @@ async def delete_category(
             ),
         )
 
-    db.delete(db_category)
-    db.commit()
+    await db.delete(db_category)
+    await db.commit()
 
     return {"message": "Category deleted successfully"}
@@ -1,40 +1,64 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ....core.pagination import cursor_params, keyset_after, set_next_cursor
+from ....core.projection import load_schema_fields
 from ....core.security import get_current_user
-from ....database import get_db
+from ....database import get_async_db, get_read_db
 from ....models import Project, User
 from ....schemas import Project as ProjectSchema
 from ....schemas import ProjectCreate, ProjectList, ProjectUpdate
 
 router = APIRouter()
 
+# Statements for the public read paths, built once with bound parameters
+_PROJECT_KEY = (Project.created_at, Project.id)  # Listing order, newest first
+_active_projects_page = (
+    select(Project)
+    .options(load_schema_fields(Project, ProjectList, *_PROJECT_KEY))
+    .where(Project.is_active)
+    .order_by(Project.created_at.desc(), Project.id.desc())
+    .limit(bindparam("limit"))
+)
+# Offset and keyset pages, each with and without the featured filter
+_active_projects = _active_projects_page.offset(bindparam("skip"))
+_active_projects_after = _active_projects_page.where(keyset_after(*_PROJECT_KEY))
+_featured_projects = _active_projects.where(Project.featured)
+_featured_projects_after = _active_projects_after.where(Project.featured)
+_active_project_by_id = select(Project).where(
+    Project.id == bindparam("project_id"), Project.is_active
+)
+
 
 @router.get("/", response_model=List[ProjectList])
 async def get_projects(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
     featured_only: bool = Query(False),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all active projects with pagination and optional featured filter"""
-    query = db.query(Project).filter(Project.is_active)
-
-    if featured_only:
-        query = query.filter(Project.featured)
-
-    projects = query.order_by(Project.created_at.desc()).offset(skip).limit(limit).all()
+    params = {"limit": limit}
+    if cursor is not None:
+        params.update(cursor_params(cursor, *_PROJECT_KEY, skip=skip))
+        query = _featured_projects_after if featured_only else _active_projects_after
+    else:
+        params["skip"] = skip
+        query = _featured_projects if featured_only else _active_projects
+    projects = (await db.scalars(query, params)).all()
+    set_next_cursor(response, projects, limit, *_PROJECT_KEY)
     return projects
 
 
 @router.get("/{project_id}", response_model=ProjectSchema)
-async def get_project(project_id: int, db: Session = Depends(get_db)):
+async def get_project(project_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get a single project by ID"""
-    project = (
-        db.query(Project).filter(Project.id == project_id, Project.is_active).first()
-    )
+    project = await db.scalar(_active_project_by_id, {"project_id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
@@ -43,7 +67,7 @@ async def get_project(project_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=ProjectSchema)
 async def create_project(
     project: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Create a new project (admin only)"""
@@ -52,8 +76,8 @@ async def create_project(
 
     db_project = Project(**project.model_dump())
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
 
@@ -61,14 +85,14 @@ async def create_project(
 async def update_project(
     project_id: int,
     project_update: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update a project (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to update projects")
 
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -76,26 +100,26 @@ async def update_project(
     for field, value in update_data.items():
         setattr(db_project, field, value)
 
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
 
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """Soft delete a project (admin only)"""
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete projects")
 
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     db_project.is_active = False
-    db.commit()
+    await db.commit()
 
     return {"message": "Project deleted successfully"}
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import ConfigDict, field_validator
+from pydantic import ConfigDict, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -29,14 +29,75 @@ class Settings(BaseSettings):
     APP_NAME: str = "Portfolio Blog API"
     DEBUG: bool = False
     LOG_SQL_QUERIES: bool = False  # Set to True to see SQL queries in logs
+
+    # Per-request SQL statement counts, timings and N+1 warnings, on by
+    # default only in DEBUG mode, where the totals are also logged at INFO and
+    # sent as response headers
+    QUERY_STATS_ENABLED: Optional[bool] = None
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5  # Repeats of a statement to flag it
+
+    # Event loop monitoring (lag histogram and blocking stack capture)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL_MS: int = 50  # Time between lag measurements
+    LOOP_MONITOR_THRESHOLD_MS: int = 100  # Capture the stack past this lag
+
+    # Read replicas for public read-only endpoints, comma-separated URLs
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_EJECT_SECONDS: float = 30.0  # Time a failed replica sits out
+    # Clients read from the primary for this long after a write
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Connection pools, per engine and per worker process: each worker has a
+    # synchronous and an async engine, each with its own pool
+    DB_POOL_SIZE: int = 10  # Connections kept open
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait for a connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 300  # Replace connections older than this
+    DB_POOL_PRE_PING: bool = True  # Test connections when checked out
+    # Server-side prepared statements kept per asyncpg connection; 0 turns
+    # them off, as PgBouncer in transaction mode requires
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+
+    # Readiness probe: dependency checks run in the background and are cached
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
     CORS_ORIGINS: str = (
         "http://localhost:3000,http://localhost:5173,http://localhost:4000,https://webbpulse.com,https://www.webbpulse.com,http://webbpulse.com"
     )
 
-    # Rate Limiting60
+    # Rate Limiting
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = 1000
     RATE_LIMIT_REQUESTS_PER_HOUR: int = 10000
     RATE_LIMIT_REQUESTS_PER_DAY: int = 100000
+    RATE_LIMIT_STRATEGY: str = "sliding_window"  # or "gcra" (token bucket)
+    RATE_LIMIT_BURST: Optional[int] = None  # Back-to-back requests (gcra only)
+    RATE_LIMIT_BACKEND: str = "memory"  # "redis"/"shared_memory" share across workers
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+    RATE_LIMIT_SHM_PATH: Optional[str] = None  # Defaults to /dev/shm
+    RATE_LIMIT_SHM_CAPACITY: int = 65536  # Client slots in the shared table
+    RATE_LIMIT_MAX_CLIENTS: int = 100000  # Clients tracked by the memory backend
+    RATE_LIMIT_IDLE_TTL_SECONDS: int = 86400  # Forget clients idle this long
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: int = 60
+    # Extra per-route costs, e.g. "POST /api/v1/subscribers/subscribe=50"
+    RATE_LIMIT_ROUTE_COSTS: str = ""
+    RATE_LIMIT_TOP_K_CAPACITY: int = 1000  # Counters per heavy-hitter summary
+    RATE_LIMIT_SNAPSHOT_PATH: Optional[str] = None  # Keep limits across restarts
+    RATE_LIMIT_CHECKPOINT_INTERVAL_SECONDS: int = 0  # 0 saves on shutdown only
+    # Comma-separated networks, e.g. "10.0.0.0/8,2001:db8::/32"
+    RATE_LIMIT_ALLOW_CIDRS: str = ""  # Never rate limited
+    RATE_LIMIT_DENY_CIDRS: str = ""  # Always rejected with 403
+    # Proxies whose X-Forwarded-For/X-Real-IP headers identify the client
+    RATE_LIMIT_TRUSTED_PROXIES: str = "127.0.0.1,::1"
+    # Addresses are counted per network: each IPv6 /64 is one client
+    RATE_LIMIT_IPV4_PREFIX: int = 32
+    RATE_LIMIT_IPV6_PREFIX: int = 64
+    # Every client's subnet is limited too
+    RATE_LIMIT_SUBNET_LIMITS_ENABLED: bool = True
+    RATE_LIMIT_SUBNET_IPV4_PREFIX: int = 24
+    RATE_LIMIT_SUBNET_IPV6_PREFIX: int = 48
+    RATE_LIMIT_SUBNET_REQUESTS_PER_MINUTE: int = 5000
+    RATE_LIMIT_SUBNET_REQUESTS_PER_HOUR: int = 50000
+    RATE_LIMIT_SUBNET_REQUESTS_PER_DAY: int = 500000
 
     @field_validator("CORS_ORIGINS")
     @classmethod
@@ -57,6 +118,13 @@ class Settings(BaseSettings):
             return list(set(origins))  # Remove duplicates
         return v
 
+    @model_validator(mode="after")
+    def default_query_stats(self):
+        """Enable query stats in DEBUG mode unless set explicitly"""
+        if self.QUERY_STATS_ENABLED is None:
+            self.QUERY_STATS_ENABLED = self.DEBUG
+        return self
+
     model_config = ConfigDict(env_file=".env")
 
     def get_database_url(self) -> str:
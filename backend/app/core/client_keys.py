@@ -0,0 +1,79 @@
+"""
+Rate limit keys for client addresses.
+
+Addresses are aggregated into networks before they are counted. IPv6 hands
+whole /64s (or more) to a single subscriber, so keying on the full address
+would let one client rotate through the range and get a fresh quota for
+every request, with a new record each time. Counting each /64 as one client
+makes the number of records grow with the number of networks instead.
+
+Each address also belongs to a wider subnet (an IPv4 /24 or an IPv6 /48 by
+default) with limits of its own, which catches abuse spread over many
+neighbouring clients.
+"""
+
+import functools
+import ipaddress
+from typing import NamedTuple, Optional
+
+from .ip_filter import parse_address
+
+
+class ClientKeys(NamedTuple):
+    """Keys a request is counted against."""
+
+    client: str  # Address, or the network it is aggregated into
+    subnet: Optional[str]  # Wider network, None if the client has no address
+
+
+class ClientKeyMapper:
+    """Map client identifiers to aggregated client and subnet keys."""
+
+    def __init__(
+        self,
+        ipv4_prefix: int = 32,
+        ipv6_prefix: int = 64,
+        ipv4_subnet_prefix: int = 24,
+        ipv6_subnet_prefix: int = 48,
+        cache_size: int = 65536,
+    ):
+        """
+        Args:
+            ipv4_prefix: Prefix length IPv4 clients are aggregated to
+            ipv6_prefix: Prefix length IPv6 clients are aggregated to
+            ipv4_subnet_prefix: Prefix length of IPv4 subnets
+            ipv6_subnet_prefix: Prefix length of IPv6 subnets
+            cache_size: Recently seen identifiers whose keys are memoised
+        """
+        if not 0 <= ipv4_subnet_prefix <= ipv4_prefix <= 32:
+            raise ValueError("IPv4 prefixes must satisfy 0 <= subnet <= client <= 32")
+        if not 0 <= ipv6_subnet_prefix <= ipv6_prefix <= 128:
+            raise ValueError("IPv6 prefixes must satisfy 0 <= subnet <= client <= 128")
+        self.prefixes = {
+            4: (ipv4_prefix, ipv4_subnet_prefix),
+            6: (ipv6_prefix, ipv6_subnet_prefix),
+        }
+        self.keys = functools.lru_cache(maxsize=cache_size)(self._keys)
+
+    @staticmethod
+    def _format(version: int, value: int, prefix: int) -> str:
+        if version == 4:
+            bits, address, network = 32, ipaddress.IPv4Address, ipaddress.IPv4Network
+        else:
+            bits, address, network = 128, ipaddress.IPv6Address, ipaddress.IPv6Network
+        if prefix == bits:
+            # Single addresses keep their plain form
+            return str(address(value))
+        shift = bits - prefix
+        return str(network(((value >> shift) << shift, prefix)))
+
+    def _keys(self, client_id: str) -> ClientKeys:
+        parsed = parse_address(client_id)
+        if parsed is None:
+            return ClientKeys(client_id, None)
+        version, value = parsed
+        prefix, subnet_prefix = self.prefixes[version]
+        return ClientKeys(
+            self._format(version, value, prefix),
+            self._format(version, value, subnet_prefix),
+        )
@@ -0,0 +1,138 @@
+"""
+Cached dependency health for readiness probes.
+
+Load balancers poll readiness every second or so, and checking the database
+on every poll adds constant load and holds a pooled connection each time.
+Instead, a background task runs each registered check on an interval and
+keeps the result; the readiness endpoint only reads it. A result is trusted
+for a few intervals, so a stuck refresh task also makes the service unready.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Results older than this many intervals are treated as failures
+STALE_AFTER_INTERVALS = 3
+
+
+class HealthChecker:
+    """Runs dependency checks in the background and caches the outcome."""
+
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0):
+        """
+        Args:
+            interval: Seconds between refreshes
+            timeout: Seconds each check may take before it counts as failed
+        """
+        self.interval = interval
+        self.timeout = timeout
+        self._checks: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None  # Monotonic time of last refresh
+        self._checked_at_iso: Optional[str] = None
+        self._ready = False
+
+    def configure(self, interval: float, timeout: float) -> None:
+        """Set the refresh interval and per-check timeout in seconds."""
+        if interval <= 0 or timeout <= 0:
+            raise ValueError("Health check interval and timeout must be positive")
+        self.interval = interval
+        self.timeout = timeout
+
+    def register(self, name: str, check: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Add a dependency check.
+
+        Args:
+            name: Name reported in the status
+            check: Coroutine function that raises if the dependency is down
+        """
+        self._checks[name] = check
+
+    async def _run_check(self, name: str, check) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout:g}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        result = {
+            "healthy": error is None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "error": error,
+        }
+        # Log changes of state only, not every refresh
+        previous = self._results.get(name)
+        if error is not None and (previous is None or previous["healthy"]):
+            logger.warning(f"Health check '{name}' failed: {error}")
+        elif error is None and previous is not None and not previous["healthy"]:
+            logger.info(f"Health check '{name}' recovered")
+        return result
+
+    async def refresh(self) -> bool:
+        """
+        Run every check concurrently and cache the results.
+
+        Returns:
+            True if every dependency is healthy
+        """
+        names = list(self._checks)
+        results = await asyncio.gather(
+            *(self._run_check(name, self._checks[name]) for name in names)
+        )
+        self._results = dict(zip(names, results))
+        self._ready = all(result["healthy"] for result in results)
+        self._checked_at = time.monotonic()
+        self._checked_at_iso = datetime.now(timezone.utc).isoformat()
+        return self._ready
+
+    async def run(self) -> None:
+        """
+        Refresh the cached results every interval.
+
+        Runs until cancelled; meant to be started as a background task for
+        the lifetime of the application.
+        """
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health check refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def is_ready(self) -> bool:
+        """Whether the last refresh passed and is recent enough to trust."""
+        if self._checked_at is None:
+            return False
+        age = time.monotonic() - self._checked_at
+        return self._ready and age <= self.interval * STALE_AFTER_INTERVALS
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Report the cached results without running any checks.
+
+        Returns:
+            Dictionary with the overall status ("ready", "unready" or
+            "starting" before the first refresh), the time of the last
+            refresh and the result of each check
+        """
+        if self._checked_at is None:
+            overall = "starting"
+        else:
+            overall = "ready" if self.is_ready() else "unready"
+        return {
+            "status": overall,
+            "checked_at": self._checked_at_iso,
+            "checks": self._results,
+        }
+
+
+# Global health checker instance, refreshed from the application lifespan
+health_checker = HealthChecker()
@@ -0,0 +1,251 @@
+"""
+Heavy-hitter tracking for rate limit monitoring.
+
+Finds the clients sending the most requests, or collecting the most
+violations, without keeping a counter per client. ``SpaceSaving``
+implements the Space-Saving algorithm (Metwally et al.) over a stream
+summary: at most ``capacity`` counters kept in buckets of equal count, so
+an update is O(1) and memory is fixed no matter how many clients there are.
+
+``HeavyHitterTracker`` keeps summaries for several time windows. Each
+window tumbles between a current and a previous summary and estimates the
+sliding window the same way the sliding window rate limit does, weighting
+the previous summary by how much of it still overlaps.
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class _Bucket:
+    """Counters sharing the same count, in a list sorted by count."""
+
+    __slots__ = ("count", "keys", "prev", "next")
+
+    def __init__(self, count: int):
+        self.count = count
+        # Insertion-ordered set of keys
+        self.keys: Dict[str, None] = {}
+        self.prev: Optional["_Bucket"] = None
+        self.next: Optional["_Bucket"] = None
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-K summary with O(1) unit increments.
+
+    Every key with a true count above ``total / capacity`` is guaranteed to
+    be tracked, and a reported count overestimates the true count by at most
+    the key's ``error``.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        # key -> (bucket, error)
+        self._counters: Dict[str, Tuple[_Bucket, int]] = {}
+        self._min: Optional[_Bucket] = None  # Smallest count
+        self._max: Optional[_Bucket] = None  # Largest count
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def _insert_after(self, bucket: Optional[_Bucket], count: int) -> _Bucket:
+        """Link a new bucket after ``bucket`` (or at the front if None)."""
+        new = _Bucket(count)
+        new.prev = bucket
+        new.next = bucket.next if bucket is not None else self._min
+        if new.next is not None:
+            new.next.prev = new
+        else:
+            self._max = new
+        if bucket is not None:
+            bucket.next = new
+        else:
+            self._min = new
+        return new
+
+    def _unlink(self, bucket: _Bucket) -> None:
+        if bucket.prev is not None:
+            bucket.prev.next = bucket.next
+        else:
+            self._min = bucket.next
+        if bucket.next is not None:
+            bucket.next.prev = bucket.prev
+        else:
+            self._max = bucket.prev
+
+    def _promote(self, key: str, bucket: _Bucket, error: int) -> None:
+        """Move a key from ``bucket`` to the bucket one count higher."""
+        target = bucket.next
+        if target is None or target.count != bucket.count + 1:
+            target = self._insert_after(bucket, bucket.count + 1)
+        target.keys[key] = None
+        self._counters[key] = (target, error)
+        del bucket.keys[key]
+        if not bucket.keys:
+            self._unlink(bucket)
+
+    def add(self, key: str) -> None:
+        """Count one occurrence of ``key``."""
+        self.total += 1
+        counter = self._counters.get(key)
+        if counter is not None:
+            self._promote(key, *counter)
+            return
+
+        if len(self._counters) < self.capacity:
+            bucket = self._min
+            if bucket is None or bucket.count != 1:
+                bucket = self._insert_after(None, 1)
+            bucket.keys[key] = None
+            self._counters[key] = (bucket, 0)
+            return
+
+        # Replace the oldest key with the smallest count; the newcomer
+        # inherits that count as its possible overestimate
+        bucket = self._min
+        evicted = next(iter(bucket.keys))
+        del self._counters[evicted]
+        del bucket.keys[evicted]
+        bucket.keys[key] = None
+        self._promote(key, bucket, bucket.count)
+
+    def items(self) -> Iterator[Tuple[str, int, int]]:
+        """Yield ``(key, count, error)`` from the largest count down."""
+        bucket = self._max
+        while bucket is not None:
+            for key in bucket.keys:
+                yield key, bucket.count, self._counters[key][1]
+            bucket = bucket.prev
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        """Return up to ``k`` ``(key, count, error)`` tuples, largest first."""
+        result = []
+        for item in self.items():
+            if len(result) >= k:
+                break
+            result.append(item)
+        return result
+
+    def clear(self) -> None:
+        self.total = 0
+        self._counters.clear()
+        self._min = self._max = None
+
+
+class _Window:
+    """A sliding window estimated from a current and a previous summary."""
+
+    __slots__ = ("name", "period", "start", "current", "previous")
+
+    def __init__(self, name: str, period: int, capacity: int):
+        self.name = name
+        self.period = period
+        self.start = 0.0
+        self.current = SpaceSaving(capacity)
+        self.previous = SpaceSaving(capacity)
+
+    def roll(self, now: float) -> None:
+        """Tumble the summaries so the current one covers ``now``."""
+        window_start = now - (now % self.period)
+        if window_start <= self.start:
+            return
+        self.previous, self.current = self.current, self.previous
+        if window_start - self.start != self.period:
+            # Idle for more than a full window: nothing overlaps any more
+            self.previous.clear()
+        self.current.clear()
+        self.start = window_start
+
+    def top(self, k: int, now: float) -> List[Dict]:
+        self.roll(now)
+        weight = 1.0 - max(0.0, now - self.start) / self.period
+        estimates: Dict[str, List[float]] = {}
+        for key, count, error in self.previous.items():
+            estimates[key] = [count * weight, error * weight]
+        for key, count, error in self.current.items():
+            estimate = estimates.setdefault(key, [0.0, 0.0])
+            estimate[0] += count
+            estimate[1] += error
+
+        ranked = sorted(estimates.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {"client_id": key, "count": round(count), "error": round(error)}
+            for key, (count, error) in ranked[:k]
+            if round(count) > 0
+        ]
+
+
+DEFAULT_WINDOWS: Tuple[Tuple[str, int], ...] = (("1m", 60), ("1h", 3600), ("1d", 86400))
+
+
+class HeavyHitterTracker:
+    """Top requesters and top violators over several time windows."""
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        windows: Sequence[Tuple[str, int]] = DEFAULT_WINDOWS,
+    ):
+        """
+        Args:
+            capacity: Counters per summary; clients beyond this share the
+                smallest counters, so only the heaviest ones are reported
+                reliably
+            windows: ``(name, period in seconds)`` of each window
+        """
+        self.capacity = capacity
+        self.requests = {
+            name: _Window(name, period, capacity) for name, period in windows
+        }
+        self.violations = {
+            name: _Window(name, period, capacity) for name, period in windows
+        }
+        self._request_windows = tuple(self.requests.values())
+        self._violation_windows = tuple(self.violations.values())
+
+    @property
+    def windows(self) -> List[str]:
+        return list(self.requests)
+
+    def record(self, client_id: str, now: float, limited: bool) -> None:
+        """Count a request, and a violation if it was rejected."""
+        for window in self._request_windows:
+            window.roll(now)
+            window.current.add(client_id)
+        if limited:
+            for window in self._violation_windows:
+                window.roll(now)
+                window.current.add(client_id)
+
+    def top(self, window: str, k: int, now: float) -> Dict:
+        """
+        Get the heaviest clients in a window.
+
+        Args:
+            window: Window name, such as ``"1h"``
+            k: Number of clients to return per list
+            now: Current timestamp
+
+        Returns:
+            Dictionary with ``requesters`` and ``violators`` lists, each
+            entry holding the client, its estimated count and the maximum
+            overestimate
+        """
+        if window not in self.requests:
+            raise ValueError(
+                f"Unknown window '{window}'. Available windows: "
+                f"{', '.join(self.requests)}"
+            )
+        return {
+            "window": window,
+            "requesters": self.requests[window].top(k, now),
+            "violators": self.violations[window].top(k, now),
+        }
+
+    def clear(self) -> None:
+        for window in (*self._request_windows, *self._violation_windows):
+            window.current.clear()
+            window.previous.clear()
@@ -0,0 +1,318 @@
+"""
+CIDR allow and deny lists for the rate limiter.
+
+Rules live in a path-compressed binary radix trie per address family, so a
+lookup walks at most one node per distinct prefix length on the path to the
+address rather than scanning every rule. The most specific matching rule
+wins, which lets an allow rule carve a hole in a denied range and vice
+versa. Decisions for recently seen addresses are memoised, so a scanner
+hammering the API is rejected with a single cache hit.
+"""
+
+import functools
+import ipaddress
+import socket
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+ALLOW = "allow"
+DENY = "deny"
+ACTIONS = (ALLOW, DENY)
+
+# ::ffff:0:0/96, IPv4 addresses written as IPv6
+_V4_MAPPED_PREFIX = 0xFFFF << 32
+
+
+class _Node:
+    __slots__ = ("prefix", "length", "value", "children")
+
+    def __init__(self, prefix: int, length: int, value: Optional[str] = None):
+        self.prefix = prefix
+        self.length = length
+        self.value = value
+        self.children: List[Optional["_Node"]] = [None, None]
+
+
+class CIDRTrie:
+    """
+    Path-compressed binary trie mapping network prefixes to values.
+
+    Prefixes are integers of ``bits`` width with their host bits cleared.
+    Nodes only exist where a prefix is stored or two prefixes diverge.
+    """
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.root = _Node(0, 0)
+
+    def _common_length(self, a: int, b: int, limit: int) -> int:
+        """Number of leading bits ``a`` and ``b`` share, up to ``limit``."""
+        diff = a ^ b
+        common = self.bits - diff.bit_length() if diff else self.bits
+        return min(common, limit)
+
+    def _bit(self, value: int, position: int) -> int:
+        """Bit at ``position``, counting from the most significant bit."""
+        return (value >> (self.bits - position - 1)) & 1
+
+    def _mask(self, value: int, length: int) -> int:
+        """Clear every bit after the first ``length``."""
+        shift = self.bits - length
+        return (value >> shift) << shift if length else 0
+
+    def insert(self, prefix: int, length: int, value: str) -> None:
+        """Store ``value`` for ``prefix/length``, replacing any previous one."""
+        prefix = self._mask(prefix, length)
+        node = self.root
+        while True:
+            if node.length == length:
+                node.value = value
+                return
+
+            bit = self._bit(prefix, node.length)
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(prefix, length, value)
+                return
+
+            common = self._common_length(
+                prefix, child.prefix, min(length, child.length)
+            )
+            if common == child.length:
+                node = child
+                continue
+
+            # The new prefix diverges partway along the edge to ``child``:
+            # split the edge with a node at the point where they differ
+            split = _Node(self._mask(prefix, common), common)
+            split.children[self._bit(child.prefix, common)] = child
+            if common == length:
+                split.value = value
+            else:
+                split.children[self._bit(prefix, common)] = _Node(prefix, length, value)
+            node.children[bit] = split
+            return
+
+    def remove(self, prefix: int, length: int) -> bool:
+        """Remove the value for ``prefix/length``; return whether it existed."""
+        prefix = self._mask(prefix, length)
+        parent, node = None, self.root
+        while node.length < length:
+            child = node.children[self._bit(prefix, node.length)]
+            if child is None or child.length > length:
+                return False
+            if self._mask(prefix, child.length) != child.prefix:
+                return False
+            parent, node = node, child
+
+        if node.length != length or node.value is None:
+            return False
+        node.value = None
+
+        # Splice out nodes that no longer store or split anything
+        if parent is not None:
+            children = [child for child in node.children if child is not None]
+            if len(children) < 2:
+                parent.children[self._bit(node.prefix, parent.length)] = (
+                    children[0] if children else None
+                )
+        return True
+
+    def lookup(self, address: int) -> Optional[str]:
+        """Return the value of the longest prefix containing ``address``."""
+        bits = self.bits
+        node = self.root
+        best = node.value
+        while node.length < bits:
+            node = node.children[(address >> (bits - node.length - 1)) & 1]
+            if node is None:
+                break
+            shift = bits - node.length
+            if (address >> shift) != (node.prefix >> shift):
+                break
+            if node.value is not None:
+                best = node.value
+        return best
+
+
+def parse_address(address: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an address into ``(version, integer)``, or None if it is not one.
+
+    ``socket.inet_pton`` is several times faster than ``ipaddress``, which
+    matters here since every request is parsed.
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+    except OSError:
+        pass
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, address), "big")
+    except OSError:
+        return None
+    if value >> 32 == _V4_MAPPED_PREFIX >> 32:
+        return 4, value & 0xFFFFFFFF
+    return 6, value
+
+
+class IPFilter:
+    """Allow and deny rules for client addresses, keyed by CIDR block."""
+
+    def __init__(
+        self,
+        allow: Iterable[str] = (),
+        deny: Iterable[str] = (),
+        cache_size: int = 65536,
+    ):
+        """
+        Args:
+            allow: Networks that bypass rate limiting
+            deny: Networks that are rejected outright
+            cache_size: Recently seen addresses whose decision is memoised
+        """
+        self._tries = {4: CIDRTrie(32), 6: CIDRTrie(128)}
+        self._rules: Dict[str, str] = {}
+        self._match = functools.lru_cache(maxsize=cache_size)(self._lookup)
+        for cidr in allow:
+            self.add(cidr, ALLOW)
+        for cidr in deny:
+            self.add(cidr, DENY)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @staticmethod
+    def _network(cidr: str) -> Union[ipaddress.IPv4Network, ipaddress.IPv6Network]:
+        try:
+            return ipaddress.ip_network(cidr.strip(), strict=False)
+        except ValueError:
+            raise ValueError(f"Invalid network '{cidr}'")
+
+    def add(self, cidr: str, action: str) -> str:
+        """
+        Add or replace a rule.
+
+        Args:
+            cidr: Network such as ``203.0.113.0/24``, or a single address
+            action: ``"allow"`` or ``"deny"``
+
+        Returns:
+            The network in canonical form
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Action must be one of: {', '.join(ACTIONS)}")
+        network = self._network(cidr)
+        self._tries[network.version].insert(
+            int(network.network_address), network.prefixlen, action
+        )
+        self._rules[str(network)] = action
+        self._match.cache_clear()
+        return str(network)
+
+    def remove(self, cidr: str) -> bool:
+        """Remove a rule; return whether it existed."""
+        network = self._network(cidr)
+        removed = self._tries[network.version].remove(
+            int(network.network_address), network.prefixlen
+        )
+        if removed:
+            del self._rules[str(network)]
+            self._match.cache_clear()
+        return removed
+
+    def clear(self) -> None:
+        self._tries = {4: CIDRTrie(32), 6: CIDRTrie(128)}
+        self._rules.clear()
+        self._match.cache_clear()
+
+    def rules(self) -> List[Dict[str, str]]:
+        """List every rule as ``{"cidr", "action"}``."""
+        return [
+            {"cidr": cidr, "action": action}
+            for cidr, action in sorted(self._rules.items())
+        ]
+
+    def _lookup(self, client_id: str) -> Optional[str]:
+        parsed = parse_address(client_id)
+        if parsed is None:
+            return None
+        version, value = parsed
+        return self._tries[version].lookup(value)
+
+    def match(self, client_id: str) -> Optional[str]:
+        """
+        Find the action for a client address.
+
+        Args:
+            client_id: Client address as resolved by ``TrustedProxies``
+
+        Returns:
+            ``"allow"``, ``"deny"``, or None if no rule matches
+        """
+        if not self._rules:
+            return None
+        return self._match(client_id)
+
+
+class TrustedProxies:
+    """
+    Proxies whose forwarding headers are believed.
+
+    Anyone can send ``X-Forwarded-For``, so only the hops appended by known
+    proxies say anything about the client. The client is the right-most hop
+    that was not added by a trusted proxy; any hops to its left are whatever
+    the client chose to send. Headers from any other peer are ignored and
+    the peer itself is the client.
+    """
+
+    def __init__(self, networks: Iterable[str] = (), cache_size: int = 4096):
+        """
+        Args:
+            networks: Addresses or networks of the proxies in front of the app
+            cache_size: Recently seen addresses whose verdict is memoised
+        """
+        self._filter = IPFilter(allow=networks, cache_size=cache_size)
+
+    def __len__(self) -> int:
+        return len(self._filter)
+
+    def __contains__(self, address: str) -> bool:
+        return self._filter.match(address) == ALLOW
+
+    def client_address(
+        self,
+        peer: Optional[str],
+        forwarded_for: Optional[str] = None,
+        real_ip: Optional[str] = None,
+    ) -> str:
+        """
+        Resolve the address of the client behind any trusted proxies.
+
+        Args:
+            peer: Address of the connection's peer, None if unknown
+            forwarded_for: ``X-Forwarded-For`` hops, oldest first
+            real_ip: ``X-Real-IP`` value
+
+        Returns:
+            Client address, or ``"unknown"`` if there is none
+        """
+        # A peer without an IP address is a Unix socket, which only a local
+        # proxy can reach
+        if peer is not None and parse_address(peer) is not None and peer not in self:
+            return peer
+
+        if forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(",")]
+            for hop in reversed(hops):
+                if hop and hop not in self:
+                    return hop
+            # Every hop is a proxy, so the oldest is the nearest to a client
+            if hops[0]:
+                return hops[0]
+        if real_ip and real_ip.strip():
+            return real_ip.strip()
+        return peer or "unknown"
+
+
+def parse_cidr_list(spec: str) -> List[str]:
+    """Split a comma-separated list of networks from settings."""
+    return [cidr.strip() for cidr in spec.split(",") if cidr.strip()]
@@ -0,0 +1,247 @@
+"""
+Event loop lag monitoring.
+
+A coroutine sleeps for a fixed interval over and over, and how late each
+wake-up arrives is the loop's lag: the time other callbacks held the loop
+without yielding. Lags are kept in a histogram.
+
+A lagging loop cannot report on itself while it is blocked, so a watchdog
+thread watches the coroutine's heartbeat. Once the heartbeat is late by more
+than the threshold, the watchdog grabs the loop thread's current stack,
+which points at the code doing the blocking (a synchronous query, an HTTP
+call to SendGrid, password hashing) while it is still running.
+"""
+
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the lag histogram buckets, in milliseconds
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Distinct blocking stacks aggregated before new ones are ignored
+MAX_TRACKED_STACKS = 100
+
+
+class LagHistogram:
+    """Counts of lag measurements per bucket, plus their sum and maximum."""
+
+    def __init__(self, bounds_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.clear()
+
+    def clear(self) -> None:
+        # One extra bucket for everything above the last bound
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds_ms, lag_ms)] += 1
+        self.count += 1
+        self.sum_ms += lag_ms
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Report each bucket with its upper bound (None for the last one)."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": [
+                {"le_ms": bound, "count": count}
+                for bound, count in zip((*self.bounds_ms, None), self.counts)
+            ],
+        }
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and captures the stacks that cause it."""
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        max_events: int = 50,
+        stack_depth: int = 40,
+    ):
+        """
+        Args:
+            interval: Seconds between lag measurements
+            threshold: Lag in seconds after which the blocking stack is
+                captured
+            max_events: Recent blocking events to keep
+            stack_depth: Innermost frames kept per captured stack
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.histogram = LagHistogram()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._stacks: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._blocking: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._heartbeat = 0.0
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def configure(self, interval: float, threshold: float) -> None:
+        """Set the measurement interval and blocking threshold in seconds."""
+        if interval <= 0 or threshold <= 0:
+            raise ValueError("Loop monitor interval and threshold must be positive")
+        self.interval = interval
+        self.threshold = threshold
+
+    def start(self) -> None:
+        """Start measuring the running event loop."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(
+            f"Event loop monitor started: every {self.interval * 1000:.0f}ms, "
+            f"capturing stacks over {self.threshold * 1000:.0f}ms"
+        )
+
+    async def stop(self) -> None:
+        """Stop measuring; collected statistics are kept."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._heartbeat = time.monotonic()
+            self._record(lag * 1000)
+
+    def _record(self, lag_ms: float) -> None:
+        with self._lock:
+            self.histogram.observe(lag_ms)
+            event = self._blocking
+            if event is None:
+                return
+            # The watchdog caught this stall in progress; it is now over
+            self._blocking = None
+            event["duration_ms"] = round(lag_ms, 3)
+            stack = self._stacks.get(tuple(event["stack"]))
+            if stack is not None:
+                stack["total_ms"] += lag_ms
+                stack["max_ms"] = max(stack["max_ms"], lag_ms)
+        logger.warning(
+            f"Event loop blocked for {lag_ms:.0f}ms in "
+            f"{event['stack'][-1].strip() if event['stack'] else 'unknown code'}"
+        )
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.threshold or self._blocking is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = self._format_stack(frame) if frame is not None else []
+            self._capture(stack)
+
+    def _format_stack(self, frame) -> List[str]:
+        return [
+            f"{entry.filename}:{entry.lineno} in {entry.name}"
+            for entry in traceback.extract_stack(frame)[-self.stack_depth :]
+        ]
+
+    def _capture(self, stack: List[str]) -> None:
+        event = {
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": None,  # Filled in once the loop recovers
+            "stack": stack,
+        }
+        key = tuple(stack)
+        with self._lock:
+            self._blocking = event
+            self.events.append(event)
+            aggregate = self._stacks.get(key)
+            if aggregate is None and len(self._stacks) < MAX_TRACKED_STACKS:
+                aggregate = self._stacks[key] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "stack": stack,
+                }
+            if aggregate is not None:
+                aggregate["count"] += 1
+
+    def get_stats(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Report lag measurements and where the loop was blocked.
+
+        Args:
+            limit: Number of recent events and top stacks to return
+
+        Returns:
+            Dictionary with the lag histogram, the most recent blocking
+            events and the stacks that blocked the loop for longest in total
+        """
+        with self._lock:
+            top_stacks = sorted(
+                self._stacks.values(), key=lambda s: s["total_ms"], reverse=True
+            )[:limit]
+            return {
+                "running": self.running,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "lag": self.histogram.snapshot(),
+                "recent_blocks": [dict(event) for event in self.events][::-1][:limit],
+                "top_stacks": [
+                    {
+                        **stack,
+                        "total_ms": round(stack["total_ms"], 3),
+                        "max_ms": round(stack["max_ms"], 3),
+                    }
+                    for stack in top_stacks
+                ],
+            }
+
+    def reset(self) -> None:
+        """Forget every measurement and captured stack."""
+        with self._lock:
+            self.histogram.clear()
+            self.events.clear()
+            self._stacks.clear()
+            self._blocking = None
+
+
+# Global monitor instance, started from the application lifespan when enabled
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination for listings.
+
+``OFFSET n`` makes the database read and throw away ``n`` rows, so deep
+pages get slower the further they are. A keyset page instead starts right
+after the last row of the previous page: listings are ordered by a sort
+column plus the primary key as a tie-breaker, and the next page selects
+rows that sort after that pair, which an index on the same columns finds
+directly. Every page costs the same as the first.
+
+The position is handed to clients as an opaque cursor in the
+``X-Next-Cursor`` response header, present whenever the page was full.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import bindparam, tuple_
+
+# Response header carrying the cursor of the next page
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def keyset_after(*columns):
+    """
+    Condition for rows after the cursor in a listing ordered by ``columns``,
+    all descending. The cursor values are the ``cursor_0``, ``cursor_1``, ...
+    bound parameters, as returned by ``cursor_params``.
+    """
+    return tuple_(*columns) < tuple_(
+        *(
+            bindparam(f"cursor_{index}", type_=column.type)
+            for index, column in enumerate(columns)
+        )
+    )
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    payload = [
+        value.isoformat() if isinstance(value, (date, datetime)) else value
+        for value in values
+    ]
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode())
+    return encoded.decode().rstrip("=")
+
+
+def cursor_params(cursor: str, *columns, skip: int = 0) -> Dict[str, Any]:
+    """
+    Decode a cursor into the bound parameters of ``keyset_after(*columns)``.
+
+    Args:
+        cursor: Cursor from a previous page's ``X-Next-Cursor`` header
+        columns: Sort key columns of the listing
+        skip: Offset requested alongside the cursor; must be 0
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or combined with skip
+    """
+    if skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either skip or cursor, not both",
+        )
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of values")
+        params = {}
+        for index, (column, value) in enumerate(zip(columns, values)):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type) or isinstance(value, bool):
+                raise ValueError(f"expected {python_type.__name__}")
+            params[f"cursor_{index}"] = value
+        return params
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, *columns) -> None:
+    """Add the cursor of the page after ``rows`` if the page was full."""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[CURSOR_HEADER] = encode_cursor(
+            *(getattr(last, column.key) for column in columns)
+        )
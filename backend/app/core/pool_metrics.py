@@ -0,0 +1,124 @@
+"""
+Connection pool instrumentation.
+
+Every request handler checks a connection out of the pool. When all of them
+are in use (pool size plus overflow), the next checkout waits up to the pool
+timeout and then fails, so pool exhaustion first shows up as checkout wait
+time. The pools below time every checkout, count timeouts and remember the
+highest number of connections in use, which together show how much headroom
+each worker's pool really has.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .loop_monitor import LagHistogram
+
+# Upper bounds of the checkout wait histogram buckets, in milliseconds
+WAIT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout counts, wait times and peak usage of one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait = LagHistogram(WAIT_BUCKETS_MS)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.wait.clear()
+            self.timeouts = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+
+    def record_checkout(self, wait_ms: float, checked_out: int, overflow: int) -> None:
+        with self._lock:
+            self.wait.observe(wait_ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record_timeout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait.observe(wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.wait.count - self.timeouts,
+                "timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "wait": self.wait.snapshot(),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Times checkouts of a QueuePool and records them in ``metrics``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout((time.perf_counter() - start) * 1000)
+            raise
+        self.metrics.record_checkout(
+            (time.perf_counter() - start) * 1000,
+            self.checkedout(),
+            max(0, self.overflow()),
+        )
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; keep counting across it
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout metrics, for synchronous engines."""
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout metrics, for asyncio engines."""
+
+
+def get_pool_stats(pool) -> Dict[str, Any]:
+    """
+    Report a pool's settings, current usage and checkout metrics.
+
+    Args:
+        pool: Pool of an engine, ``engine.pool``
+
+    Returns:
+        Dictionary of pool settings and usage, plus the metrics collected
+        by instrumented pools
+    """
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+            }
+        )
+    metrics = getattr(pool, "metrics", None)
+    if isinstance(metrics, PoolMetrics):
+        stats.update(metrics.snapshot())
+    return stats
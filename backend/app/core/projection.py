@@ -0,0 +1,43 @@
+"""
+Column projection for list endpoints.
+
+Listings serialize a slimmer schema than the detail views (a post summary
+has no ``content``), but selecting the ORM entity loads every column of
+every row, large text and JSON bodies included. ``load_schema_fields``
+builds a loader option that selects only the columns the response schema
+reads, plus the foreign keys its relationships need, and makes any other
+attribute raise instead of emitting a lazy query on access.
+"""
+
+from typing import Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+def load_schema_fields(model, schema: Type[BaseModel], *extra):
+    """
+    Loader option limiting ``model`` rows to what ``schema`` serializes.
+
+    Args:
+        model: Mapped class being selected
+        schema: Response schema built from the rows
+        extra: Further attributes to load, such as a listing's sort key
+
+    Returns:
+        A ``load_only`` option for ``select(model).options(...)``
+    """
+    mapper = inspect(model)
+    attributes = {getattr(model, key) for key in schema.model_fields}.intersection(
+        getattr(model, prop.key) for prop in mapper.column_attrs
+    )
+    for name in schema.model_fields:
+        relationship = mapper.relationships.get(name)
+        if relationship is not None:
+            attributes.update(
+                getattr(model, mapper.get_property_by_column(column).key)
+                for column in relationship.local_columns
+            )
+    attributes.update(extra)
+    return load_only(*sorted(attributes, key=lambda a: a.key), raiseload=True)
@@ -0,0 +1,197 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+Cursor execution events on every engine (sync, async and replicas) record
+each statement against the request being served, found through a context
+variable that the middleware sets. Async sessions run their queries in a
+greenlet that shares the request's context, and synchronous handlers run in
+a thread that copies it, so both are counted.
+
+A statement executed several times in one request with different parameters
+is the mark of an N+1 query: a relationship loaded lazily once per row, or
+a lookup in a loop. Those are logged as suspects together with the route
+and the handler that issued them.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Distinct parameter sets remembered per statement; enough to flag it
+MAX_TRACKED_PARAMETERS = 64
+
+
+class StatementStats:
+    """Executions of one SQL string within a request."""
+
+    __slots__ = ("count", "total_ms", "parameters")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.parameters: Set[int] = set()
+
+
+class RequestQueryStats:
+    """Statements executed while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Dict[str, StatementStats] = {}
+
+    def record(self, statement: str, parameters: Any, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+        stats.count += 1
+        stats.total_ms += duration_ms
+        if len(stats.parameters) < MAX_TRACKED_PARAMETERS:
+            # Only a hash is kept, not values such as post bodies or passwords
+            try:
+                stats.parameters.add(hash(parameters))
+            except TypeError:
+                # Lists of parameter sets from executemany, or dicts
+                stats.parameters.add(hash(repr(parameters)))
+
+    def n_plus_one_suspects(self, threshold: int) -> List[Dict[str, Any]]:
+        """
+        Statements run at least ``threshold`` times with different parameters.
+
+        Returns:
+            The suspects, most executed first, with their execution count,
+            number of distinct parameter sets and total time
+        """
+        suspects = [
+            {
+                "statement": statement,
+                "count": stats.count,
+                "distinct_parameters": len(stats.parameters),
+                "total_ms": round(stats.total_ms, 3),
+            }
+            for statement, stats in self.statements.items()
+            if stats.count >= threshold and len(stats.parameters) > 1
+        ]
+        return sorted(suspects, key=lambda suspect: suspect["count"], reverse=True)
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """Statements recorded so far for the current request, if any."""
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is None or start is None:
+        return
+    stats.record(statement, parameters, (time.perf_counter() - start) * 1000)
+
+
+def _endpoint_name(scope: Scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unknown endpoint"
+    return f"{endpoint.__module__}.{endpoint.__qualname__}"
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware that counts and times SQL statements per request.
+
+    The totals are logged for every request (at INFO in debug mode, DEBUG
+    otherwise) and, when ``headers`` is set, returned in the
+    ``X-DB-Query-Count`` and ``X-DB-Query-Time-Ms`` response headers.
+    Statements repeated ``n_plus_one_threshold`` or more times with
+    different parameters are logged as N+1 suspects.
+
+    Usage:
+        app.add_middleware(QueryStatsMiddleware, headers=settings.DEBUG)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        headers: bool = False,
+        n_plus_one_threshold: int = 5,
+        log_level: int = logging.DEBUG,
+    ):
+        """
+        Args:
+            app: Next ASGI application in the stack
+            headers: Add the totals to response headers
+            n_plus_one_threshold: Executions of one statement, with different
+                parameters, that make it an N+1 suspect
+            log_level: Level of the per-request totals log line
+        """
+        self.app = app
+        self.headers = headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.log_level = log_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.headers:
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-query-count", str(stats.count).encode("latin-1")),
+                    (b"x-db-query-time-ms", f"{stats.total_ms:.3f}".encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: RequestQueryStats) -> None:
+        log_totals = logger.isEnabledFor(self.log_level)
+        log_suspects = logger.isEnabledFor(logging.WARNING)
+        if not stats.count or not (log_totals or log_suspects):
+            return
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        request = f"{scope['method']} {path}"
+        if log_totals:
+            logger.log(
+                self.log_level,
+                f"{request}: {stats.count} SQL statements in {stats.total_ms:.2f}ms",
+            )
+        if not log_suspects:
+            return
+        for suspect in stats.n_plus_one_suspects(self.n_plus_one_threshold):
+            logger.warning(
+                f"Possible N+1 query in {request} ({_endpoint_name(scope)}): "
+                f"{suspect['count']} executions with "
+                f"{suspect['distinct_parameters']} parameter sets, "
+                f"{suspect['total_ms']:.2f}ms: {suspect['statement']}"
+            )
@@ -0,0 +1,1358 @@
+"""
+Storage backends for rate limiter state.
+
+A backend stores one record per client: the strategy state plus request and
+violation counters. Every change goes through ``update``, which must apply a
+read-modify-write atomically, so several workers sharing a backend enforce a
+single limit between them.
+"""
+
+import functools
+import gc
+import hashlib
+import logging
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import redis
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .rate_limit_strategies import (
+    GCRAStrategy,
+    QuotaStatus,
+    RateLimitStrategy,
+    SlidingWindowStrategy,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Outcome of a hit: exceeded quota index (or -1), quota status, retry after
+Decision = Tuple[int, List[QuotaStatus], float]
+
+# Immutable copy of a record for snapshots: key, last_seen, total, violations,
+# strategy state
+SnapshotRecord = Tuple[str, float, int, int, Tuple[float, ...]]
+
+
+class BackendUnavailableError(Exception):
+    """Raised when a backend cannot be reached."""
+
+
+class ClientState:
+    """Strategy state and counters for a single client."""
+
+    __slots__ = ("state", "total", "violations", "last_seen")
+
+    def __init__(
+        self,
+        state: List[float],
+        total: int = 0,
+        violations: int = 0,
+        last_seen: float = 0.0,
+    ):
+        self.state = state
+        self.total = total
+        self.violations = violations
+        self.last_seen = last_seen
+
+
+def _decide_together(
+    clients: Sequence[ClientState],
+    strategies: Sequence[RateLimitStrategy],
+    current_time: float,
+    cost: int,
+) -> List[Decision]:
+    """
+    Check a request against records that are all in hand, and count it in
+    every one of them or, if any level rejects it, in none.
+    """
+    for index, (client, strategy) in enumerate(zip(clients, strategies)):
+        exceeded = strategy.check(client.state, current_time, cost)
+        if exceeded >= 0:
+            client.violations += 1
+            return [
+                *(
+                    (-1, passed.status(allowed.state, current_time), 0.0)
+                    for allowed, passed in zip(clients, strategies[:index])
+                ),
+                (
+                    exceeded,
+                    strategy.status(client.state, current_time),
+                    strategy.retry_after(client.state, current_time, cost),
+                ),
+            ]
+
+    decisions = []
+    for client, strategy in zip(clients, strategies):
+        strategy.consume(client.state, current_time, cost)
+        client.total += 1
+        decisions.append((-1, strategy.status(client.state, current_time), 0.0))
+    return decisions
+
+
+class RateLimitBackend(ABC):
+    """Base class for rate limiter storage."""
+
+    name: str = ""
+
+    # Whether operations wait on the network, so the limiter must run them
+    # off the event loop
+    blocking: bool = False
+
+    @abstractmethod
+    def update(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        func: Callable[[ClientState], T],
+    ) -> T:
+        """
+        Atomically apply ``func`` to a client's record and store the result.
+
+        A record is created with fresh strategy state if the client is unknown.
+
+        Args:
+            client_id: Client identifier
+            strategy: Strategy that owns the record's state
+            func: Function that mutates the record in place
+
+        Returns:
+            Whatever ``func`` returned
+        """
+
+    @abstractmethod
+    def get(self, client_id: str, strategy: RateLimitStrategy) -> Optional[ClientState]:
+        """Return a copy of a client's record, or None if it is unknown."""
+
+    @abstractmethod
+    def reset(self, client_id: str) -> None:
+        """Forget a client's record."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every record."""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, ClientState]]:
+        """Iterate over every client record (for monitoring only)."""
+
+    def hit(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> int:
+        """
+        Check a request against the strategy and record the outcome.
+
+        Returns:
+            Index of the first exceeded quota, or -1 if the request was allowed
+        """
+
+        def apply(client: ClientState) -> int:
+            exceeded = strategy.hit(client.state, current_time, cost)
+            if exceeded < 0:
+                client.total += 1
+            else:
+                client.violations += 1
+            return exceeded
+
+        return self.update(client_id, strategy, apply)
+
+    def decide(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> Decision:
+        """
+        Like ``hit``, but also report where the client stands afterwards.
+
+        The status is read from the same record the hit updated, so it costs
+        no extra round trip to the store.
+
+        Returns:
+            Tuple of (index of the first exceeded quota or -1, status of each
+            quota, seconds until the request would be allowed)
+        """
+
+        def apply(client: ClientState) -> Decision:
+            exceeded = strategy.hit(client.state, current_time, cost)
+            if exceeded < 0:
+                client.total += 1
+                retry_after = 0.0
+            else:
+                client.violations += 1
+                retry_after = strategy.retry_after(client.state, current_time, cost)
+            return (
+                exceeded,
+                strategy.status(client.state, current_time),
+                retry_after,
+            )
+
+        return self.update(client_id, strategy, apply)
+
+    def decide_many(
+        self,
+        levels: Sequence[Tuple[str, RateLimitStrategy]],
+        current_time: float,
+        cost: int = 1,
+    ) -> List[Decision]:
+        """
+        Check a request against several records in one pass, such as a
+        client and the subnet it belongs to.
+
+        Levels are checked in order and checking stops at the first one
+        that rejects the request. Each record is updated atomically, but not
+        all of them together, so a request rejected by a later level still
+        counts toward the earlier ones.
+
+        Args:
+            levels: ``(key, strategy)`` of each record, narrowest first
+            current_time: Timestamp of the request
+            cost: Number of units the request consumes
+
+        Returns:
+            The decision of each level that was checked
+        """
+        decisions = []
+        for key, strategy in levels:
+            decision = self.decide(key, strategy, current_time, cost)
+            decisions.append(decision)
+            if decision[0] >= 0:
+                break
+        return decisions
+
+    def client_count(self) -> int:
+        """Return the number of tracked clients."""
+        return sum(1 for _ in self.items())
+
+    def total_violations(self) -> int:
+        """Return the number of rejected requests across all clients."""
+        return sum(client.violations for _, client in self.items())
+
+    def sweep(self, current_time: float) -> int:
+        """
+        Drop records of clients that have been idle too long.
+
+        Backends that expire records on their own do nothing here.
+
+        Returns:
+            Number of records removed
+        """
+        return 0
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Return gauges describing how much storage the backend uses."""
+        return {"tracked_clients": self.client_count()}
+
+    def snapshot_records(self) -> List[SnapshotRecord]:
+        """
+        Copy every record for ``write_snapshot``.
+
+        Backends whose state already outlives the process return nothing.
+        """
+        return []
+
+    def write_snapshot(
+        self, path: str, strategy: RateLimitStrategy, records: List[SnapshotRecord]
+    ) -> int:
+        """
+        Write records copied by ``snapshot_records`` to a snapshot file.
+
+        Only touches the copy, so it may run in another thread while the
+        table keeps changing.
+
+        Returns:
+            Number of records written
+        """
+        return 0
+
+    def save_snapshot(self, path: str, strategy: RateLimitStrategy) -> int:
+        """
+        Write every record to a snapshot file.
+
+        Returns:
+            Number of records written
+        """
+        return self.write_snapshot(path, strategy, self.snapshot_records())
+
+    def load_snapshot(self, path: str, strategy: RateLimitStrategy) -> int:
+        """
+        Restore records from a snapshot file written by ``save_snapshot``.
+
+        Returns:
+            Number of records restored
+        """
+        return 0
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Per-process, capacity-bounded table of client records.
+
+    Records are kept in least-recently-used order. When the table is full the
+    least recently seen client is evicted, and ``sweep`` drops clients that
+    have been idle for longer than ``idle_ttl``, so memory stays bounded no
+    matter how many addresses send requests.
+
+    Updates are atomic because the event loop runs them without yielding,
+    but each worker process has its own copy.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self, capacity: Optional[int] = None, idle_ttl: Optional[float] = None
+    ):
+        """
+        Args:
+            capacity: Maximum number of tracked clients (unbounded if None)
+            idle_ttl: Seconds of inactivity after which ``sweep`` drops a client
+        """
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self.evictions = 0
+        self.expirations = 0
+        self.clients: "OrderedDict[str, ClientState]" = OrderedDict()
+
+    def _get_or_create(
+        self, client_id: str, strategy: RateLimitStrategy, current_time: float
+    ) -> ClientState:
+        clients = self.clients
+        client = clients.get(client_id)
+        if client is None:
+            if self.capacity is not None and len(clients) >= self.capacity:
+                clients.popitem(last=False)
+                self.evictions += 1
+            client = clients[client_id] = ClientState(strategy.new_state())
+        else:
+            clients.move_to_end(client_id)
+        client.last_seen = current_time
+        return client
+
+    def update(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        func: Callable[[ClientState], T],
+    ) -> T:
+        return func(self._get_or_create(client_id, strategy, time.time()))
+
+    def hit(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> int:
+        # Same as the base implementation, minus the closure per request
+        client = self._get_or_create(client_id, strategy, current_time)
+        exceeded = strategy.hit(client.state, current_time, cost)
+        if exceeded < 0:
+            client.total += 1
+        else:
+            client.violations += 1
+        return exceeded
+
+    def decide(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> Decision:
+        client = self._get_or_create(client_id, strategy, current_time)
+        state = client.state
+        exceeded = strategy.hit(state, current_time, cost)
+        if exceeded < 0:
+            client.total += 1
+            retry_after = 0.0
+        else:
+            client.violations += 1
+            retry_after = strategy.retry_after(state, current_time, cost)
+        return exceeded, strategy.status(state, current_time), retry_after
+
+    def decide_many(
+        self,
+        levels: Sequence[Tuple[str, RateLimitStrategy]],
+        current_time: float,
+        cost: int = 1,
+    ) -> List[Decision]:
+        # Every record is in hand, so a rejected request counts nowhere
+        clients = [
+            self._get_or_create(key, strategy, current_time) for key, strategy in levels
+        ]
+        return _decide_together(
+            clients, [strategy for _, strategy in levels], current_time, cost
+        )
+
+    def get(self, client_id: str, strategy: RateLimitStrategy) -> Optional[ClientState]:
+        client = self.clients.get(client_id)
+        if client is None:
+            return None
+        return ClientState(
+            list(client.state), client.total, client.violations, client.last_seen
+        )
+
+    def reset(self, client_id: str) -> None:
+        self.clients.pop(client_id, None)
+
+    def clear(self) -> None:
+        self.clients.clear()
+
+    def items(self) -> Iterator[Tuple[str, ClientState]]:
+        return iter(list(self.clients.items()))
+
+    def client_count(self) -> int:
+        return len(self.clients)
+
+    def sweep(self, current_time: float) -> int:
+        if self.idle_ttl is None:
+            return 0
+
+        # Records are in least-recently-used order, so idle ones are in front
+        cutoff = current_time - self.idle_ttl
+        clients = self.clients
+        removed = 0
+        while clients:
+            client_id, client = next(iter(clients.items()))
+            if client.last_seen > cutoff:
+                break
+            del clients[client_id]
+            removed += 1
+
+        self.expirations += removed
+        return removed
+
+    def _record_size(self) -> int:
+        """Estimate the bytes used by one record, including its dict entry."""
+        for client_id, client in self.clients.items():
+            return (
+                sys.getsizeof(client_id)
+                + sys.getsizeof(client)
+                + sys.getsizeof(client.state)
+                + sum(sys.getsizeof(value) for value in client.state)
+                # OrderedDict keeps a hash entry plus a linked list node per key
+                + 100
+            )
+        return 0
+
+    # Snapshot layout: header, fixed-size records, then the keys joined by NUL
+    # (which cannot appear in an address or header value), then a CRC32 of
+    # everything before it
+    SNAPSHOT_MAGIC = b"RLSNAP01"
+    _SNAPSHOT_HEADER = struct.Struct("<8s16sIIId")
+    _SNAPSHOT_CRC = struct.Struct("<I")
+
+    @staticmethod
+    def _snapshot_record(state_size: int) -> struct.Struct:
+        # last_seen, total, violations, strategy state
+        return struct.Struct(f"<ddd{state_size}d")
+
+    def snapshot_records(self) -> List[SnapshotRecord]:
+        return [
+            (
+                client_id,
+                client.last_seen,
+                client.total,
+                client.violations,
+                tuple(client.state),
+            )
+            for client_id, client in self.clients.items()
+        ]
+
+    def write_snapshot(
+        self, path: str, strategy: RateLimitStrategy, records: List[SnapshotRecord]
+    ) -> int:
+        record = self._snapshot_record(strategy.state_size)
+        keys = "\0".join(client_id for client_id, *_ in records).encode()
+
+        body = bytearray(
+            self._SNAPSHOT_HEADER.pack(
+                self.SNAPSHOT_MAGIC,
+                strategy.name.encode(),
+                strategy.state_size,
+                len(records),
+                len(keys),
+                time.time(),
+            )
+        )
+        for _, last_seen, total, violations, state in records:
+            body += record.pack(last_seen, total, violations, *state)
+        body += keys
+        body += self._SNAPSHOT_CRC.pack(zlib.crc32(body))
+
+        # Write then rename, so a crash never leaves a half-written snapshot
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".ratelimit-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(temp_path, path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(temp_path)
+            raise
+        return len(records)
+
+    def load_snapshot(self, path: str, strategy: RateLimitStrategy) -> int:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+
+        header_size = self._SNAPSHOT_HEADER.size
+        crc_size = self._SNAPSHOT_CRC.size
+        if len(data) < header_size + crc_size:
+            logger.warning(f"Ignoring truncated rate limit snapshot {path}")
+            return 0
+        (crc,) = self._SNAPSHOT_CRC.unpack_from(data, len(data) - crc_size)
+        if zlib.crc32(memoryview(data)[:-crc_size]) != crc:
+            logger.warning(f"Ignoring corrupt rate limit snapshot {path}")
+            return 0
+
+        magic, name, state_size, count, keys_size, _ = (
+            self._SNAPSHOT_HEADER.unpack_from(data)
+        )
+        if (
+            magic != self.SNAPSHOT_MAGIC
+            or name.rstrip(b"\0").decode() != strategy.name
+            or state_size != strategy.state_size
+        ):
+            # State from another algorithm or layout means nothing here
+            logger.warning(
+                f"Ignoring rate limit snapshot {path} written for a different "
+                "strategy or format"
+            )
+            return 0
+
+        record = self._snapshot_record(state_size)
+        records_end = header_size + count * record.size
+        if records_end + keys_size + crc_size != len(data):
+            logger.warning(f"Ignoring malformed rate limit snapshot {path}")
+            return 0
+
+        rows = record.iter_unpack(memoryview(data)[header_size:records_end])
+        keys = data[records_end : records_end + keys_size].decode().split("\0")
+        if len(keys) != count and count:
+            logger.warning(f"Ignoring malformed rate limit snapshot {path}")
+            return 0
+
+        # Records were saved least recently used first, so inserting them in
+        # order rebuilds the LRU order; only the newest fit if capacity shrank
+        skip = 0 if self.capacity is None else max(0, count - self.capacity)
+        cutoff = time.time() - self.idle_ttl if self.idle_ttl is not None else None
+        clients = self.clients
+        restored = 0
+        # Allocating this many objects at once would otherwise trigger
+        # repeated collections that cost more than the load itself
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for index, (last_seen, total, violations, *state) in enumerate(rows):
+                if index < skip or (cutoff is not None and last_seen <= cutoff):
+                    continue
+                clients[keys[index]] = ClientState(
+                    state, int(total), int(violations), last_seen
+                )
+                restored += 1
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        if self.capacity is not None:
+            while len(clients) > self.capacity:
+                clients.popitem(last=False)
+        return restored
+
+    def memory_stats(self) -> Dict[str, Any]:
+        tracked = len(self.clients)
+        return {
+            "tracked_clients": tracked,
+            "capacity": self.capacity,
+            "utilization": (
+                round(tracked / self.capacity, 4) if self.capacity else None
+            ),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "idle_ttl_seconds": self.idle_ttl,
+            "approx_bytes": tracked * self._record_size(),
+        }
+
+
+# Decides a request against every level atomically on the Redis server, with
+# the same arithmetic as the strategies in rate_limit_strategies.py. Records
+# are the packed doubles RedisBackend reads and writes: total, violations,
+# then the strategy state. Floats are returned as strings, since Redis would
+# truncate Lua numbers to integers.
+#
+# KEYS: one record per level, narrowest first
+# ARGV: now, cost, then for each level the strategy name, record TTL, number
+#       of quotas and two parameters per quota (limit and period for the
+#       sliding window, emission interval and burst tolerance for GCRA)
+DECIDE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+
+local sliding = {slots = 3}
+
+function sliding.roll(r, o, period)
+  local window_start = now - math.fmod(now, period)
+  if window_start <= r[o + 1] then
+    return
+  end
+  if window_start - r[o + 1] == period then
+    r[o + 3] = r[o + 2]
+  else
+    r[o + 3] = 0
+  end
+  r[o + 2] = 0
+  r[o + 1] = window_start
+end
+
+function sliding.count(r, o, period)
+  sliding.roll(r, o, period)
+  local weight = 1 - math.max(0, now - r[o + 1]) / period
+  return r[o + 3] * weight + r[o + 2]
+end
+
+function sliding.exceeds(r, o, quota)
+  return sliding.count(r, o, quota[2]) + cost > quota[1]
+end
+
+function sliding.consume(r, o, quota)
+  sliding.roll(r, o, quota[2])
+  r[o + 2] = r[o + 2] + cost
+end
+
+function sliding.status(r, o, quota)
+  local count = sliding.count(r, o, quota[2])
+  local remaining = math.max(0, math.floor(quota[1] - count + 1e-9))
+  return remaining, r[o + 1] + quota[2] - now
+end
+
+function sliding.wait(r, o, quota)
+  local limit, period = quota[1], quota[2]
+  sliding.roll(r, o, period)
+  local window_start, current, previous = r[o + 1], r[o + 2], r[o + 3]
+  local room = limit - current - cost
+  if room >= 0 then
+    if previous <= 0 then
+      return 0
+    end
+    return math.max(0, window_start + period * (1 - room / previous) - now)
+  end
+  local wait = window_start + period - now
+  room = limit - cost
+  if current > room then
+    wait = wait + period * (1 - room / current)
+  end
+  return math.max(0, wait)
+end
+
+local gcra = {slots = 1}
+
+function gcra.exceeds(r, o, quota)
+  return math.max(r[o + 1], now) + quota[1] * cost - now > quota[2]
+end
+
+function gcra.consume(r, o, quota)
+  r[o + 1] = math.max(r[o + 1], now) + quota[1] * cost
+end
+
+function gcra.status(r, o, quota)
+  local pending = math.max(0, r[o + 1] - now)
+  local remaining = math.max(0, math.floor((quota[2] - pending) / quota[1] + 1e-9))
+  return remaining, pending
+end
+
+function gcra.wait(r, o, quota)
+  return math.max(0, math.max(r[o + 1], now) + quota[1] * cost - quota[2] - now)
+end
+
+local strategies = {sliding_window = sliding, gcra = gcra}
+
+local levels = {}
+local arg = 3
+for i = 1, #KEYS do
+  local level = {key = KEYS[i], strategy = strategies[ARGV[arg]]}
+  level.ttl = tonumber(ARGV[arg + 1])
+  level.quotas = {}
+  for q = 1, tonumber(ARGV[arg + 2]) do
+    local first = arg + 1 + 2 * q
+    level.quotas[q] = {tonumber(ARGV[first]), tonumber(ARGV[first + 1])}
+  end
+  arg = arg + 3 + 2 * #level.quotas
+  level.size = 2 + level.strategy.slots * #level.quotas
+  level.format = "<" .. string.rep("d", level.size)
+
+  local raw = redis.call("GET", level.key)
+  if raw and #raw == 8 * level.size then
+    level.record = {struct.unpack(level.format, raw)}
+  else
+    -- Unknown client, or state written by a different strategy
+    level.record = {}
+    for slot = 1, level.size do
+      level.record[slot] = 0
+    end
+  end
+  levels[i] = level
+end
+
+local function offset(level, q)
+  return 2 + (q - 1) * level.strategy.slots
+end
+
+local function save(level)
+  local packed = struct.pack(level.format, unpack(level.record, 1, level.size))
+  redis.call("SET", level.key, packed, "EX", level.ttl)
+end
+
+local function decision(level, exceeded, retry_after)
+  local reply = {exceeded, string.format("%.17g", retry_after)}
+  for q, quota in ipairs(level.quotas) do
+    local remaining, reset_after =
+      level.strategy.status(level.record, offset(level, q), quota)
+    reply[#reply + 1] = remaining
+    reply[#reply + 1] = string.format("%.17g", reset_after)
+  end
+  return reply
+end
+
+-- A request rejected by any level counts in none of them
+for i, level in ipairs(levels) do
+  for q, quota in ipairs(level.quotas) do
+    if level.strategy.exceeds(level.record, offset(level, q), quota) then
+      level.record[2] = level.record[2] + 1
+      save(level)
+      local retry_after = 0
+      for w, waiting in ipairs(level.quotas) do
+        local wait = level.strategy.wait(level.record, offset(level, w), waiting)
+        retry_after = math.max(retry_after, wait)
+      end
+      local replies = {}
+      for j = 1, i - 1 do
+        replies[j] = decision(levels[j], -1, 0)
+      end
+      replies[i] = decision(level, q - 1, retry_after)
+      return replies
+    end
+  end
+end
+
+local replies = {}
+for i, level in ipairs(levels) do
+  for q, quota in ipairs(level.quotas) do
+    level.strategy.consume(level.record, offset(level, q), quota)
+  end
+  level.record[1] = level.record[1] + 1
+  save(level)
+  replies[i] = decision(level, -1, 0)
+end
+return replies
+"""
+
+
+def _script_arguments(strategy: RateLimitStrategy) -> Optional[List[str]]:
+    """
+    Describe a strategy to ``DECIDE_SCRIPT``, or None if the script does not
+    implement it.
+    """
+    if type(strategy) is SlidingWindowStrategy:
+        parameters = [(quota.limit, quota.period) for quota in strategy.quotas]
+    elif type(strategy) is GCRAStrategy:
+        parameters = [
+            (
+                quota.period / quota.limit,
+                quota.period / quota.limit * (quota.burst or quota.limit),
+            )
+            for quota in strategy.quotas
+        ]
+    else:
+        return None
+    ttl = max(quota.period for quota in strategy.quotas)
+    return [
+        strategy.name,
+        str(ttl),
+        str(len(parameters)),
+        *(repr(value) for pair in parameters for value in pair),
+    ]
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Client records shared through Redis (or any server speaking its protocol).
+
+    Each record is stored as packed doubles under ``<prefix><client_id>``.
+    Decisions for the built-in strategies run as one Lua script on the
+    server (``DECIDE_SCRIPT``, sent by hash with EVALSHA and loaded on a
+    NOSCRIPT reply), so a client and its subnet are checked and updated
+    atomically in a single round trip, however many workers share a key.
+    Other updates use an optimistic WATCH/MULTI/EXEC transaction, retried
+    until it wins. Records expire once they are older than the longest
+    quota period.
+
+    The client is synchronous, so the backend is ``blocking`` and the
+    limiter calls it from a worker thread.
+    """
+
+    name = "redis"
+    blocking = True
+
+    # First pause between attempts at a contended transaction, doubled on
+    # each retry up to the maximum, with jitter
+    WATCH_BACKOFF = 0.001
+    MAX_WATCH_BACKOFF = 0.05
+
+    def __init__(self, client: redis.Redis, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._structs: Dict[int, struct.Struct] = {}
+        self._decide_script = client.register_script(DECIDE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "ratelimit:") -> "RedisBackend":
+        """Create a backend connected to the Redis server at ``url``."""
+        client = redis.Redis.from_url(
+            url, socket_timeout=1.0, socket_connect_timeout=1.0
+        )
+        return cls(client, prefix=prefix)
+
+    def _struct(self, state_size: int) -> struct.Struct:
+        packer = self._structs.get(state_size)
+        if packer is None:
+            # total, violations, then the strategy state
+            packer = self._structs[state_size] = struct.Struct(f"<{state_size + 2}d")
+        return packer
+
+    def _decode(
+        self, raw: Optional[bytes], strategy: RateLimitStrategy
+    ) -> Optional[ClientState]:
+        packer = self._struct(strategy.state_size)
+        if raw is None or len(raw) != packer.size:
+            # Unknown client, or state written by a different strategy
+            return None
+        values = packer.unpack(raw)
+        return ClientState(list(values[2:]), int(values[0]), int(values[1]))
+
+    def _encode(self, client: ClientState) -> bytes:
+        return self._struct(len(client.state)).pack(
+            client.total, client.violations, *client.state
+        )
+
+    def update(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        func: Callable[[ClientState], T],
+    ) -> T:
+        key = self.prefix + client_id
+        ttl = max(quota.period for quota in strategy.quotas)
+
+        try:
+            with self.client.pipeline() as pipe:
+                attempt = 0
+                while True:
+                    try:
+                        pipe.watch(key)
+                        client = self._decode(pipe.get(key), strategy)
+                        if client is None:
+                            client = ClientState(strategy.new_state())
+                        result = func(client)
+
+                        pipe.multi()
+                        pipe.set(key, self._encode(client), ex=ttl)
+                        pipe.execute()
+                        return result
+                    except redis.WatchError:
+                        # Another worker updated the record first; retry
+                        # after a random pause so contending workers spread
+                        # out
+                        attempt += 1
+                        backoff = min(
+                            self.WATCH_BACKOFF * 2**attempt, self.MAX_WATCH_BACKOFF
+                        )
+                        time.sleep(random.uniform(0, backoff))
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+    def hit(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> int:
+        if _script_arguments(strategy) is None:
+            return super().hit(client_id, strategy, current_time, cost)
+        return self.decide(client_id, strategy, current_time, cost)[0]
+
+    def decide(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        current_time: float,
+        cost: int = 1,
+    ) -> Decision:
+        if _script_arguments(strategy) is None:
+            return super().decide(client_id, strategy, current_time, cost)
+        return self.decide_many(((client_id, strategy),), current_time, cost)[0]
+
+    def decide_many(
+        self,
+        levels: Sequence[Tuple[str, RateLimitStrategy]],
+        current_time: float,
+        cost: int = 1,
+    ) -> List[Decision]:
+        arguments = [repr(current_time), str(cost)]
+        for _, strategy in levels:
+            described = _script_arguments(strategy)
+            if described is None:
+                # Not implemented by the script: one transaction per level,
+                # through update()
+                return super().decide_many(levels, current_time, cost)
+            arguments.extend(described)
+
+        try:
+            replies = self._decide_script(
+                keys=[self.prefix + client_id for client_id, _ in levels],
+                args=arguments,
+            )
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+        return [
+            (
+                int(reply[0]),
+                [
+                    QuotaStatus(int(remaining), float(reset_after))
+                    for remaining, reset_after in zip(reply[2::2], reply[3::2])
+                ],
+                float(reply[1]),
+            )
+            for reply in replies
+        ]
+
+    def get(self, client_id: str, strategy: RateLimitStrategy) -> Optional[ClientState]:
+        try:
+            raw = self.client.get(self.prefix + client_id)
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+        return self._decode(raw, strategy)
+
+    def reset(self, client_id: str) -> None:
+        try:
+            self.client.delete(self.prefix + client_id)
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+    def _scan_keys(self) -> List[bytes]:
+        return list(self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+    def clear(self) -> None:
+        try:
+            keys = self._scan_keys()
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+    def items(self) -> Iterator[Tuple[str, ClientState]]:
+        try:
+            keys = self._scan_keys()
+            values = self.client.mget(keys) if keys else []
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+        prefix_length = len(self.prefix)
+        for key, raw in zip(keys, values):
+            if raw is None or len(raw) < 16:
+                continue
+            total, violations = struct.unpack_from("<2d", raw)
+            state = list(struct.unpack_from(f"<{len(raw) // 8 - 2}d", raw, 16))
+            yield key[prefix_length:].decode(), ClientState(
+                state, int(total), int(violations)
+            )
+
+    def client_count(self) -> int:
+        try:
+            return len(self._scan_keys())
+        except redis.RedisError as e:
+            raise BackendUnavailableError(str(e)) from e
+
+
+class SharedMemoryBackend(RateLimitBackend):
+    """
+    Fixed-size hash table of client records in a memory-mapped file.
+
+    Every worker process on the host maps the same file, so they share one
+    set of counters without an external store. The table is preallocated
+    and never grows: it is split into groups of ``GROUP_SLOTS`` slots, a
+    client can only live in the group its key hashes to, and when a group is
+    full the least recently seen client in it is evicted.
+
+    Each group starts with the key hashes of its slots, so a lookup is a
+    single unpack plus a tuple search. Updates take one of ``stripes`` locks,
+    chosen by group, held both as a thread lock and as an fcntl byte-range
+    lock so that other processes are excluded too.
+    """
+
+    name = "shared_memory"
+
+    MAGIC = b"RLSHM001"
+    HEADER_SIZE = 4096
+    GROUP_SLOTS = 16
+    KEY_SIZE = 64
+    MAX_STATE = 12
+
+    # Per slot: last_seen, total, violations, state length, key length
+    _BODY = struct.Struct("<dddHB5x")
+    _HASHES = struct.Struct(f"<{GROUP_SLOTS}Q")
+    _HEADER = struct.Struct("<8sQQ")
+    _LAST_SEEN = struct.Struct("<d")
+
+    SLOT_SIZE = _BODY.size + KEY_SIZE + 8 * MAX_STATE
+    GROUP_SIZE = _HASHES.size + GROUP_SLOTS * SLOT_SIZE
+
+    # fcntl lock offsets inside the header; locks do not block mmap access
+    _INIT_LOCK = 0
+    _STRIPE_LOCK_BASE = 1024
+
+    def __init__(self, path: str, capacity: int = 65536, stripes: int = 64):
+        """
+        Open or create the shared table.
+
+        Args:
+            path: File to map, ideally on a tmpfs such as /dev/shm
+            capacity: Number of client slots, rounded up to a power of two
+            stripes: Number of locks the groups are spread across
+        """
+        if fcntl is None:
+            raise RuntimeError("The shared_memory backend requires fcntl (POSIX)")
+
+        groups = 1
+        while groups * self.GROUP_SLOTS < capacity:
+            groups *= 2
+        self.path = path
+        self.capacity = groups * self.GROUP_SLOTS
+        self.stripes = max(1, min(stripes, groups, 2048))
+        self.evictions = 0
+        self._group_mask = groups - 1
+        self._size = self.HEADER_SIZE + groups * self.GROUP_SIZE
+        self._thread_locks = [threading.Lock() for _ in range(self.stripes)]
+        self._state_structs: Dict[int, struct.Struct] = {}
+
+        self._fd = self._open()
+        try:
+            self._mm = mmap.mmap(self._fd, self._size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._INIT_LOCK)
+
+        logger.info(
+            f"Shared memory rate limit table at {path}: {self.capacity} slots, "
+            f"{self._size // 1024} KiB"
+        )
+
+    def _open(self) -> int:
+        """
+        Open a table with this layout, holding its init lock.
+
+        A file in use is never resized, since workers still mapping it would
+        crash with SIGBUS on the pages cut off. A table with another layout
+        is replaced by a new file instead, and its current users keep the
+        old one until they restart.
+        """
+        expected = self._HEADER.pack(self.MAGIC, self.capacity, self.SLOT_SIZE)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX, 1, self._INIT_LOCK)
+            opened = os.fstat(fd)
+            try:
+                current = os.stat(self.path)
+                replaced = (current.st_dev, current.st_ino) != (
+                    opened.st_dev,
+                    opened.st_ino,
+                )
+            except FileNotFoundError:
+                replaced = True
+
+            if not replaced:
+                if (
+                    opened.st_size == self._size
+                    and os.pread(fd, self._HEADER.size, 0) == expected
+                ):
+                    return fd
+                if opened.st_size:
+                    logger.warning(
+                        f"Rate limit table at {self.path} has a different layout; "
+                        "replacing it"
+                    )
+                self._create(expected)
+            # Open whichever table is at the path now
+            os.close(fd)
+
+    def _create(self, header: bytes) -> None:
+        """Write an empty table beside the path and move it into place."""
+        directory, name = os.path.split(self.path)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")
+        try:
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, header, 0)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(temp_path)
+            raise
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _locked(self, stripe: int):
+        with self._thread_locks[stripe]:
+            offset = self._STRIPE_LOCK_BASE + stripe
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16384)
+    def _hash(client_id: str) -> Tuple[bytes, int]:
+        """Return the encoded key and a hash that is stable across processes."""
+        key = client_id.encode()
+        value = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+        return key, value or 1  # 0 marks an empty slot
+
+    def _locate(self, client_id: str) -> Tuple[bytes, int, int, int]:
+        """Return the encoded key, its hash, group offset and stripe."""
+        key, key_hash = self._hash(client_id)
+        group = key_hash & self._group_mask
+        return (
+            key,
+            key_hash,
+            self.HEADER_SIZE + group * self.GROUP_SIZE,
+            group % self.stripes,
+        )
+
+    def _slot_offset(self, base: int, slot: int) -> int:
+        return base + self._HASHES.size + slot * self.SLOT_SIZE
+
+    def _state_struct(self, size: int) -> struct.Struct:
+        packer = self._state_structs.get(size)
+        if packer is None:
+            packer = self._state_structs[size] = struct.Struct(f"<{size}d")
+        return packer
+
+    def _read(self, offset: int, state_size: int) -> Optional[ClientState]:
+        _, total, violations, stored_size, _ = self._BODY.unpack_from(self._mm, offset)
+        if stored_size != state_size:
+            # State written by a different strategy
+            return None
+        state = self._state_struct(state_size).unpack_from(
+            self._mm, offset + self._BODY.size + self.KEY_SIZE
+        )
+        return ClientState(list(state), int(total), int(violations))
+
+    def _read_key(self, offset: int) -> str:
+        key_length = self._BODY.unpack_from(self._mm, offset)[4]
+        start = offset + self._BODY.size
+        return self._mm[start : start + key_length].decode(errors="replace")
+
+    def _claim(self, base: int, hashes: Tuple[int, ...]) -> int:
+        """Pick a slot for a new key: an empty one, else the least recent."""
+        try:
+            return hashes.index(0)
+        except ValueError:
+            pass
+
+        self.evictions += 1
+        last_seen = [
+            self._LAST_SEEN.unpack_from(self._mm, self._slot_offset(base, slot))[0]
+            for slot in range(self.GROUP_SLOTS)
+        ]
+        return last_seen.index(min(last_seen))
+
+    def update(
+        self,
+        client_id: str,
+        strategy: RateLimitStrategy,
+        func: Callable[[ClientState], T],
+    ) -> T:
+        state_size = strategy.state_size
+        if state_size > self.MAX_STATE:
+            raise ValueError(
+                f"Strategy state of {state_size} floats does not fit in a "
+                f"shared memory slot (max {self.MAX_STATE})"
+            )
+
+        key, key_hash, base, stripe = self._locate(client_id)
+        with self._locked(stripe):
+            hashes = self._HASHES.unpack_from(self._mm, base)
+            client = None
+            try:
+                slot = hashes.index(key_hash)
+                client = self._read(self._slot_offset(base, slot), state_size)
+            except ValueError:
+                slot = self._claim(base, hashes)
+            if client is None:
+                client = ClientState(strategy.new_state())
+
+            result = func(client)
+
+            offset = self._slot_offset(base, slot)
+            stored_key = key[: self.KEY_SIZE]
+            self._BODY.pack_into(
+                self._mm,
+                offset,
+                time.time(),
+                client.total,
+                client.violations,
+                state_size,
+                len(stored_key),
+            )
+            key_offset = offset + self._BODY.size
+            self._mm[key_offset : key_offset + len(stored_key)] = stored_key
+            self._state_struct(state_size).pack_into(
+                self._mm, key_offset + self.KEY_SIZE, *client.state
+            )
+            struct.pack_into("<Q", self._mm, base + slot * 8, key_hash)
+            return result
+
+    def get(self, client_id: str, strategy: RateLimitStrategy) -> Optional[ClientState]:
+        _, key_hash, base, stripe = self._locate(client_id)
+        with self._locked(stripe):
+            hashes = self._HASHES.unpack_from(self._mm, base)
+            try:
+                slot = hashes.index(key_hash)
+            except ValueError:
+                return None
+            return self._read(self._slot_offset(base, slot), strategy.state_size)
+
+    def reset(self, client_id: str) -> None:
+        _, key_hash, base, stripe = self._locate(client_id)
+        with self._locked(stripe):
+            hashes = self._HASHES.unpack_from(self._mm, base)
+            if key_hash in hashes:
+                struct.pack_into("<Q", self._mm, base + hashes.index(key_hash) * 8, 0)
+
+    def _groups(self) -> Iterator[Tuple[int, int]]:
+        for group in range(self._group_mask + 1):
+            yield self.HEADER_SIZE + group * self.GROUP_SIZE, group % self.stripes
+
+    def clear(self) -> None:
+        empty = bytes(self._HASHES.size)
+        for base, stripe in self._groups():
+            with self._locked(stripe):
+                self._mm[base : base + self._HASHES.size] = empty
+
+    def items(self) -> Iterator[Tuple[str, ClientState]]:
+        records = []
+        for base, stripe in self._groups():
+            with self._locked(stripe):
+                hashes = self._HASHES.unpack_from(self._mm, base)
+                for slot, key_hash in enumerate(hashes):
+                    if not key_hash:
+                        continue
+                    offset = self._slot_offset(base, slot)
+                    state_size = self._BODY.unpack_from(self._mm, offset)[3]
+                    client = self._read(offset, state_size)
+                    records.append((self._read_key(offset), client))
+        return iter(records)
+
+    def client_count(self) -> int:
+        count = 0
+        for base, _ in self._groups():
+            hashes = self._HASHES.unpack_from(self._mm, base)
+            count += self.GROUP_SLOTS - hashes.count(0)
+        return count
+
+    def memory_stats(self) -> Dict[str, Any]:
+        tracked = self.client_count()
+        return {
+            "tracked_clients": tracked,
+            "capacity": self.capacity,
+            "utilization": round(tracked / self.capacity, 4),
+            "evictions": self.evictions,
+            "approx_bytes": self._size,
+        }
+
+    def close(self) -> None:
+        """Unmap the table. The file is left for other workers."""
+        self._mm.close()
+        os.close(self._fd)
+
+
+def default_shared_memory_path() -> str:
+    """Prefer tmpfs so the table never touches disk."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "portfolio-rate-limit")
+
+
+def create_backend(
+    name: str,
+    redis_url: Optional[str] = None,
+    shm_path: Optional[str] = None,
+    shm_capacity: int = 65536,
+    max_clients: Optional[int] = None,
+    idle_ttl: Optional[float] = None,
+) -> RateLimitBackend:
+    """
+    Create a rate limiter backend by name.
+
+    Args:
+        name: "memory", "redis" or "shared_memory"
+        redis_url: Server URL, required for the redis backend
+        shm_path: Table file for the shared_memory backend
+        shm_capacity: Number of client slots for the shared_memory backend
+        max_clients: Capacity of the memory backend
+        idle_ttl: Idle seconds before the memory backend drops a client
+
+    Returns:
+        Configured backend instance
+    """
+    if name == MemoryBackend.name:
+        return MemoryBackend(capacity=max_clients, idle_ttl=idle_ttl)
+    if name == RedisBackend.name:
+        if not redis_url:
+            raise ValueError("RATE_LIMIT_REDIS_URL must be set for the redis backend")
+        return RedisBackend.from_url(redis_url)
+    if name == SharedMemoryBackend.name:
+        return SharedMemoryBackend(
+            shm_path or default_shared_memory_path(), capacity=shm_capacity
+        )
+    raise ValueError(
+        f"Unknown rate limit backend '{name}'. "
+        "Available backends: memory, redis, shared_memory"
+    )
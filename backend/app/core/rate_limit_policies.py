@@ -0,0 +1,155 @@
+"""
+Per-route rate limit policies.
+
+A policy gives the cost, in rate limit units, of requests to a route. Cheap
+reads keep the default cost of 1, endpoints that do expensive work (such as
+calling SendGrid) cost more, and a cost of 0 exempts a route entirely.
+
+Policies are compiled once into a ``RouteTable``: literal paths go into a
+dict and templated paths such as ``/api/v1/posts/{slug}`` are joined into a
+single regular expression, so looking up a request's cost does not compare
+the path against every policy in turn.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Matches "{name}" and "{name:path}" parameters in a route template
+_PARAM_RE = re.compile(r"{(\w+)(:path)?}")
+
+
+class RoutePolicy(NamedTuple):
+    """Cost of requests to ``path``, optionally only for some HTTP methods."""
+
+    path: str
+    cost: int = 1
+    methods: Optional[Tuple[str, ...]] = None  # None matches every method
+
+
+DEFAULT_ROUTE_POLICIES: Tuple[RoutePolicy, ...] = (
+    # Health checks and documentation are never limited
+    RoutePolicy("/", 0),
+    RoutePolicy("/health", 0),
+    RoutePolicy("/livez", 0),
+    RoutePolicy("/readyz", 0),
+    RoutePolicy("/docs", 0),
+    RoutePolicy("/docs/oauth2-redirect", 0),
+    RoutePolicy("/redoc", 0),
+    RoutePolicy("/openapi.json", 0),
+    # Each of these makes synchronous calls to SendGrid
+    RoutePolicy("/api/v1/subscribers/subscribe", 20, ("POST",)),
+    RoutePolicy("/api/v1/subscribers/unsubscribe", 10, ("POST",)),
+    RoutePolicy("/api/v1/subscribers/status/{email}", 5, ("GET",)),
+    # Ranking and highlighting read the text of every matching post
+    RoutePolicy("/api/v1/posts/search", 3, ("GET",)),
+    # Password hashing is deliberately slow, and login is a brute force target
+    RoutePolicy("/api/v1/admin/login", 10, ("POST",)),
+)
+
+
+def _compile_template(path: str) -> str:
+    """Turn a route template into a regular expression for the whole path."""
+    pattern = []
+    position = 0
+    for match in _PARAM_RE.finditer(path):
+        pattern.append(re.escape(path[position : match.start()]))
+        pattern.append(".*" if match.group(2) else "[^/]+")
+        position = match.end()
+    pattern.append(re.escape(path[position:]))
+    return "".join(pattern)
+
+
+class RouteTable:
+    """Compiled lookup from (method, path) to request cost."""
+
+    def __init__(self, policies: Iterable[RoutePolicy], default_cost: int = 1):
+        """
+        Compile policies into a route table.
+
+        When several policies cover the same path and method, the last one
+        wins, so overrides can simply be appended to the defaults.
+
+        Args:
+            policies: Route policies to compile
+            default_cost: Cost of requests no policy matches
+        """
+        self.default_cost = default_cost
+        self.policies = tuple(policies)
+
+        # Costs per path, keyed by method (None for any method)
+        self._exact: Dict[str, Dict[Optional[str], int]] = {}
+        templates: Dict[str, Dict[Optional[str], int]] = {}
+
+        for policy in self.policies:
+            if policy.cost < 0:
+                raise ValueError(f"Rate limit cost for {policy.path} must be >= 0")
+            table = templates if _PARAM_RE.search(policy.path) else self._exact
+            costs = table.setdefault(policy.path, {})
+            for method in policy.methods or (None,):
+                costs[method.upper() if method else None] = policy.cost
+
+        # One alternation for every template; the matching group names the route
+        self._template_costs: List[Dict[Optional[str], int]] = list(templates.values())
+        self._template_re = (
+            re.compile(
+                "|".join(
+                    f"(?P<r{index}>{_compile_template(path)})"
+                    for index, path in enumerate(templates)
+                )
+            )
+            if templates
+            else None
+        )
+
+    def cost(self, method: str, path: str) -> int:
+        """
+        Get the cost of a request.
+
+        Args:
+            method: HTTP method of the request
+            path: URL path of the request
+
+        Returns:
+            Number of rate limit units the request consumes
+        """
+        costs = self._exact.get(path)
+        if costs is None and self._template_re is not None:
+            match = self._template_re.fullmatch(path)
+            if match is not None:
+                costs = self._template_costs[int(match.lastgroup[1:])]
+        if costs is None:
+            return self.default_cost
+        cost = costs.get(method)
+        if cost is None:
+            cost = costs.get(None, self.default_cost)
+        return cost
+
+
+def parse_route_policies(spec: str) -> List[RoutePolicy]:
+    """
+    Parse route policies from a comma-separated settings string.
+
+    Each entry is ``[METHOD[|METHOD...] ]PATH=COST``, for example
+    ``POST /api/v1/subscribers/subscribe=50,/api/v1/posts/{slug}=2``.
+
+    Args:
+        spec: Policies in the format above
+
+    Returns:
+        Parsed route policies, in order
+    """
+    policies = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        route, separator, cost = entry.rpartition("=")
+        parts = route.split()
+        if not separator or not parts or len(parts) > 2 or not cost.strip().isdigit():
+            raise ValueError(
+                f"Invalid rate limit route policy '{entry}', "
+                "expected '[METHOD ]PATH=COST'"
+            )
+        methods = tuple(parts[0].upper().split("|")) if len(parts) == 2 else None
+        policies.append(RoutePolicy(parts[-1], int(cost), methods))
+    return policies
@@ -0,0 +1,299 @@
+"""
+Rate limiting algorithms.
+
+A strategy decides whether a request fits within a set of quotas. It does not
+own any state itself: each client's state is a flat list of floats created by
+``new_state`` and updated in place, which keeps the state size fixed per
+strategy and lets the limiter store it however it likes.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Sequence, Type
+
+
+class Quota(NamedTuple):
+    """A limit of ``limit`` requests per ``period`` seconds."""
+
+    name: str
+    limit: int
+    period: int
+    burst: Optional[int] = None
+
+
+class QuotaStatus(NamedTuple):
+    """Units left in a quota and seconds until it is fully available again."""
+
+    remaining: int
+    reset_after: float
+
+
+class RateLimitStrategy(ABC):
+    """Base class for rate limiting algorithms."""
+
+    name: str = ""
+
+    # Number of floats of state needed for each quota
+    slots_per_quota: int = 1
+
+    def __init__(self, quotas: Sequence[Quota]):
+        self.quotas = tuple(quotas)
+        self.state_size = len(self.quotas) * self.slots_per_quota
+
+    def new_state(self) -> List[float]:
+        """Create the initial state for a client."""
+        return [0.0] * self.state_size
+
+    @abstractmethod
+    def check(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        """
+        Check whether a request fits within every quota without recording it.
+
+        Args:
+            state: Client state created by ``new_state``
+            current_time: Current timestamp
+            cost: Number of units the request consumes
+
+        Returns:
+            Index of the first exceeded quota, or -1 if the request is allowed
+        """
+
+    @abstractmethod
+    def consume(self, state: List[float], current_time: float, cost: int = 1) -> None:
+        """Record a request against every quota."""
+
+    @abstractmethod
+    def usage(self, state: List[float], current_time: float) -> List[float]:
+        """Estimate how many units of each quota are currently in use."""
+
+    @abstractmethod
+    def status(self, state: List[float], current_time: float) -> List[QuotaStatus]:
+        """Report the remaining units and reset time of each quota."""
+
+    @abstractmethod
+    def retry_after(
+        self, state: List[float], current_time: float, cost: int = 1
+    ) -> float:
+        """
+        Compute how long until a request of ``cost`` would fit every quota.
+
+        Returns:
+            Seconds to wait, or 0.0 if the request would be allowed now
+        """
+
+    def hit(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        """
+        Check a request and record it if it is allowed.
+
+        Returns:
+            Index of the first exceeded quota, or -1 if the request was allowed
+        """
+        exceeded = self.check(state, current_time, cost)
+        if exceeded < 0:
+            self.consume(state, current_time, cost)
+        return exceeded
+
+
+class SlidingWindowStrategy(RateLimitStrategy):
+    """
+    Approximate sliding window built from two fixed-window buckets per quota.
+
+    The count for the last ``period`` seconds is estimated by weighting the
+    previous bucket by how much of it still overlaps the sliding window and
+    adding the current bucket. State per quota is ``[window_start, current,
+    previous]``.
+    """
+
+    name = "sliding_window"
+    slots_per_quota = 3
+
+    def _roll(self, state: List[float], offset: int, period: int, now: float):
+        """Advance a quota's buckets so the current one contains ``now``."""
+        window_start = now - (now % period)
+        previous_start = state[offset]
+        if window_start <= previous_start:
+            return
+
+        if window_start - previous_start == period:
+            state[offset + 2] = state[offset + 1]
+        else:
+            # Idle for more than a full window: nothing overlaps any more
+            state[offset + 2] = 0.0
+        state[offset + 1] = 0.0
+        state[offset] = window_start
+
+    def _count(self, state: List[float], offset: int, period: int, now: float):
+        """Estimate the number of requests in a quota's sliding window."""
+        self._roll(state, offset, period, now)
+        weight = 1.0 - max(0.0, now - state[offset]) / period
+        return state[offset + 2] * weight + state[offset + 1]
+
+    def check(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        for index, quota in enumerate(self.quotas):
+            count = self._count(state, index * 3, quota.period, current_time)
+            if count + cost > quota.limit:
+                return index
+        return -1
+
+    def consume(self, state: List[float], current_time: float, cost: int = 1) -> None:
+        for index, quota in enumerate(self.quotas):
+            offset = index * 3
+            self._roll(state, offset, quota.period, current_time)
+            state[offset + 1] += cost
+
+    def hit(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        # check() already rolled every quota forward, so just add the cost
+        exceeded = self.check(state, current_time, cost)
+        if exceeded < 0:
+            for offset in range(1, self.state_size, 3):
+                state[offset] += cost
+        return exceeded
+
+    def usage(self, state: List[float], current_time: float) -> List[float]:
+        return [
+            self._count(state, index * 3, quota.period, current_time)
+            for index, quota in enumerate(self.quotas)
+        ]
+
+    def status(self, state: List[float], current_time: float) -> List[QuotaStatus]:
+        statuses = []
+        for index, quota in enumerate(self.quotas):
+            offset = index * 3
+            count = self._count(state, offset, quota.period, current_time)
+            statuses.append(
+                QuotaStatus(
+                    max(0, int(quota.limit - count + 1e-9)),
+                    state[offset] + quota.period - current_time,
+                )
+            )
+        return statuses
+
+    def _wait(self, state: List[float], index: int, now: float, cost: int) -> float:
+        """Seconds until a quota's sliding window has room for ``cost``."""
+        limit, period = self.quotas[index].limit, self.quotas[index].period
+        offset = index * 3
+        self._roll(state, offset, period, now)
+        window_start, current, previous = state[offset : offset + 3]
+
+        room = limit - current - cost
+        if room >= 0:
+            if previous <= 0:
+                return 0.0
+            # Enough of the previous bucket has to slide out of the window
+            return max(0.0, window_start + period * (1 - room / previous) - now)
+
+        # Not before the next window, where the current bucket becomes the
+        # previous one and keeps sliding out
+        wait = window_start + period - now
+        room = limit - cost
+        if current > room:
+            wait += period * (1 - room / current)
+        return max(0.0, wait)
+
+    def retry_after(
+        self, state: List[float], current_time: float, cost: int = 1
+    ) -> float:
+        return max(
+            self._wait(state, index, current_time, cost)
+            for index in range(len(self.quotas))
+        )
+
+
+class GCRAStrategy(RateLimitStrategy):
+    """
+    Generic Cell Rate Algorithm, equivalent to a token bucket.
+
+    Each quota keeps a single float, the theoretical arrival time (TAT) of
+    the next request. Requests drain at ``limit / period`` per second and up
+    to ``burst`` requests (defaulting to ``limit``) may arrive back to back.
+    """
+
+    name = "gcra"
+    slots_per_quota = 1
+
+    def __init__(self, quotas: Sequence[Quota]):
+        super().__init__(quotas)
+        # Precompute (emission interval, burst tolerance) for each quota
+        self._intervals = [
+            (
+                quota.period / quota.limit,
+                quota.period / quota.limit * (quota.burst or quota.limit),
+            )
+            for quota in self.quotas
+        ]
+
+    def check(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        for index, (interval, tolerance) in enumerate(self._intervals):
+            tat = max(state[index], current_time) + interval * cost
+            if tat - current_time > tolerance:
+                return index
+        return -1
+
+    def consume(self, state: List[float], current_time: float, cost: int = 1) -> None:
+        for index, (interval, _) in enumerate(self._intervals):
+            state[index] = max(state[index], current_time) + interval * cost
+
+    def hit(self, state: List[float], current_time: float, cost: int = 1) -> int:
+        new_tats = []
+        for index, (interval, tolerance) in enumerate(self._intervals):
+            tat = max(state[index], current_time) + interval * cost
+            if tat - current_time > tolerance:
+                return index
+            new_tats.append(tat)
+        state[:] = new_tats
+        return -1
+
+    def usage(self, state: List[float], current_time: float) -> List[float]:
+        return [
+            max(0.0, state[index] - current_time) / interval
+            for index, (interval, _) in enumerate(self._intervals)
+        ]
+
+    def status(self, state: List[float], current_time: float) -> List[QuotaStatus]:
+        statuses = []
+        for index, (interval, tolerance) in enumerate(self._intervals):
+            pending = max(0.0, state[index] - current_time)
+            statuses.append(
+                QuotaStatus(
+                    max(0, int((tolerance - pending) / interval + 1e-9)), pending
+                )
+            )
+        return statuses
+
+    def retry_after(
+        self, state: List[float], current_time: float, cost: int = 1
+    ) -> float:
+        return max(
+            0.0,
+            max(
+                max(state[index], current_time) + interval * cost - tolerance
+                for index, (interval, tolerance) in enumerate(self._intervals)
+            )
+            - current_time,
+        )
+
+
+STRATEGIES: Dict[str, Type[RateLimitStrategy]] = {
+    SlidingWindowStrategy.name: SlidingWindowStrategy,
+    GCRAStrategy.name: GCRAStrategy,
+}
+
+
+def create_strategy(name: str, quotas: Sequence[Quota]) -> RateLimitStrategy:
+    """
+    Create a rate limiting strategy by name.
+
+    Args:
+        name: Strategy name, one of ``STRATEGIES``
+        quotas: Quotas the strategy should enforce
+
+    Returns:
+        Configured strategy instance
+    """
+    try:
+        strategy_class = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown rate limit strategy '{name}'. "
+            f"Available strategies: {', '.join(sorted(STRATEGIES))}"
+        )
+    return strategy_class(quotas)
@@ -1,27 +1,113 @@
 """
-Rate limiting implementation using sliding window approach.
-Suitable for small applications with limited concurrent users.
+Rate limiting implementation with pluggable algorithms.
+Each client keeps a fixed amount of state, so checking the minute, hour and
+day limits costs the same no matter how busy a client is.
 """
 
+import asyncio
 import logging
+import math
 import os
 import time
-from collections import defaultdict
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .client_keys import ClientKeyMapper
+from .heavy_hitters import HeavyHitterTracker
+from .ip_filter import ALLOW, DENY, IPFilter, TrustedProxies
+from .rate_limit_backends import (
+    BackendUnavailableError,
+    ClientState,
+    Decision,
+    MemoryBackend,
+    RateLimitBackend,
+    SnapshotRecord,
+)
+from .rate_limit_policies import DEFAULT_ROUTE_POLICIES, RoutePolicy, RouteTable
+from .rate_limit_strategies import (
+    Quota,
+    QuotaStatus,
+    RateLimitStrategy,
+    create_strategy,
+)
 
 logger = logging.getLogger(__name__)
 
+# Bounds for the default in-process client table
+DEFAULT_MAX_CLIENTS = 100_000
+DEFAULT_IDLE_TTL_SECONDS = 86400
+
+# Counters per heavy-hitter summary
+DEFAULT_TOP_K_CAPACITY = 1000
+
+
+class RateLimitDecision:
+    """
+    Outcome of a rate limit check, with everything needed for the headers.
+
+    Attributes:
+        limited: Whether the request was rejected
+        reason: Why the request was rejected, if it was
+        client_id: Client the request was counted against
+        quotas: The limiter's quotas
+        statuses: Remaining units and reset time of each quota after the check
+        retry_after: Seconds until the request would be allowed (0 if allowed)
+    """
+
+    __slots__ = ("limited", "reason", "client_id", "quotas", "statuses", "retry_after")
+
+    def __init__(
+        self,
+        limited: bool,
+        reason: Optional[str],
+        client_id: Optional[str],
+        quotas: Sequence[Quota],
+        statuses: Sequence[QuotaStatus],
+        retry_after: float = 0.0,
+    ):
+        self.limited = limited
+        self.reason = reason
+        self.client_id = client_id
+        self.quotas = quotas
+        self.statuses = statuses
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_seconds(self) -> int:
+        """Retry delay rounded up to whole seconds, as sent in Retry-After."""
+        return max(1, math.ceil(self.retry_after))
+
+    def headers(self) -> Dict[str, str]:
+        """
+        Build the rate limit response headers.
+
+        Returns:
+            X-RateLimit-Limit/Remaining/Reset headers for every quota, plus
+            Retry-After if the request was rejected
+        """
+        headers = {}
+        for quota, status in zip(self.quotas, self.statuses):
+            period = quota.name.capitalize()
+            headers[f"X-RateLimit-Limit-{period}"] = str(quota.limit)
+            headers[f"X-RateLimit-Remaining-{period}"] = str(status.remaining)
+            headers[f"X-RateLimit-Reset-{period}"] = str(math.ceil(status.reset_after))
+        if self.limited:
+            headers["Retry-After"] = str(self.retry_after_seconds)
+        return headers
+
 
 class RateLimiter:
     """
-    In-memory rate limiter using sliding window approach.
+    Rate limiter with pluggable algorithms and storage.
 
-    This implementation is suitable for small applications with limited
-    concurrent users. For production applications with high traffic,
-    consider using Redis or a dedicated rate limiting service.
+    Every client is tracked with a small, fixed amount of strategy state
+    instead of a list of request timestamps, so both the work per request and
+    the memory per client are constant. State lives in a backend: in process
+    memory by default, or in a shared store so that every worker enforces the
+    same limits.
     """
 
     def __init__(
@@ -29,8 +115,16 @@ class RateLimiter:
         requests_per_minute: int = 60,
         requests_per_hour: int = 1000,
         requests_per_day: int = 10000,
-        window_size_seconds: int = 60,
         test_mode: bool = False,
+        strategy: str = "sliding_window",
+        burst: Optional[int] = None,
+        backend: Optional[RateLimitBackend] = None,
+        route_policies: Optional[Iterable[RoutePolicy]] = None,
+        heavy_hitters: Optional[HeavyHitterTracker] = None,
+        ip_filter: Optional[IPFilter] = None,
+        subnet_limits: Optional[Tuple[int, int, int]] = None,
+        client_keys: Optional[ClientKeyMapper] = None,
+        trusted_proxies: Optional[TrustedProxies] = None,
     ):
         """
         Initialize rate limiter with configurable limits.
@@ -39,20 +133,54 @@ class RateLimiter:
             requests_per_minute: Maximum requests allowed per minute
             requests_per_hour: Maximum requests allowed per hour
             requests_per_day: Maximum requests allowed per day
-            window_size_seconds: Size of the sliding window in seconds
             test_mode: If True, rate limiting is disabled (for testing)
+            strategy: Name of the rate limiting algorithm to use
+            burst: Requests allowed back to back within the minute limit
+                (only used by strategies that support bursts)
+            backend: Where client state is stored (defaults to process memory)
+            route_policies: Per-route request costs (defaults to
+                ``DEFAULT_ROUTE_POLICIES``)
+            heavy_hitters: Tracker for the top requesters and violators
+            ip_filter: Networks that are always allowed or always rejected
+            subnet_limits: Requests allowed per minute, hour and day from
+                each subnet, on top of the per-client limits (None to disable)
+            client_keys: How client addresses are aggregated into the
+                client and subnet keys that are counted
+            trusted_proxies: Proxies whose forwarding headers identify the
+                client (by default only a peer on a Unix socket)
         """
-        self.requests_per_minute = requests_per_minute
-        self.requests_per_hour = requests_per_hour
-        self.requests_per_day = requests_per_day
-        self.window_size_seconds = window_size_seconds
         self.test_mode = test_mode
 
-        # Store request timestamps for each client
-        self.client_requests: Dict[str, List[float]] = defaultdict(list)
+        # Request cost per route
+        self.routes = RouteTable(
+            DEFAULT_ROUTE_POLICIES if route_policies is None else route_policies
+        )
+
+        # Client state and violation counters
+        self.backend: RateLimitBackend = backend or MemoryBackend(
+            capacity=DEFAULT_MAX_CLIENTS, idle_ttl=DEFAULT_IDLE_TTL_SECONDS
+        )
+
+        # Top clients in this process, for monitoring
+        self.heavy_hitters = heavy_hitters or HeavyHitterTracker(DEFAULT_TOP_K_CAPACITY)
+
+        # Allow and deny lists, checked before any client state is touched
+        self.ip_filter = ip_filter if ip_filter is not None else IPFilter()
+
+        # IPv6 clients are counted per /64 by default
+        self.client_keys = client_keys or ClientKeyMapper()
 
-        # Store rate limit violations for monitoring
-        self.violations: Dict[str, int] = defaultdict(int)
+        # Forwarding headers are ignored unless a listed proxy sent them
+        self.trusted_proxies = trusted_proxies or TrustedProxies()
+
+        self.configure(
+            requests_per_minute=requests_per_minute,
+            requests_per_hour=requests_per_hour,
+            requests_per_day=requests_per_day,
+            strategy=strategy,
+            burst=burst,
+            subnet_limits=subnet_limits,
+        )
 
         if test_mode:
             logger.info(
@@ -61,122 +189,316 @@ class RateLimiter:
         else:
             logger.info(
                 f"Rate limiter initialized: {requests_per_minute}/min, "
-                f"{requests_per_hour}/hour, {requests_per_day}/day"
+                f"{requests_per_hour}/hour, {requests_per_day}/day "
+                f"({strategy})"
+            )
+
+    def configure(
+        self,
+        requests_per_minute: int,
+        requests_per_hour: int,
+        requests_per_day: int,
+        strategy: str = "sliding_window",
+        burst: Optional[int] = None,
+        backend: Optional[RateLimitBackend] = None,
+        route_policies: Optional[Iterable[RoutePolicy]] = None,
+        heavy_hitters: Optional[HeavyHitterTracker] = None,
+        ip_filter: Optional[IPFilter] = None,
+        subnet_limits: Optional[Tuple[int, int, int]] = None,
+        client_keys: Optional[ClientKeyMapper] = None,
+        trusted_proxies: Optional[TrustedProxies] = None,
+    ) -> None:
+        """
+        Set the limits, algorithm and storage used by the rate limiter.
+
+        Switching to a different strategy on the same backend discards
+        existing client state, since state from one algorithm means nothing
+        to another.
+
+        Args:
+            requests_per_minute: Maximum requests allowed per minute
+            requests_per_hour: Maximum requests allowed per hour
+            requests_per_day: Maximum requests allowed per day
+            strategy: Name of the rate limiting algorithm to use
+            burst: Requests allowed back to back within the minute limit
+            backend: Replacement storage for client state
+            route_policies: Replacement per-route request costs
+            heavy_hitters: Replacement top-client tracker
+            ip_filter: Replacement allow and deny lists
+            subnet_limits: Requests allowed per minute, hour and day from
+                each subnet (None to disable)
+            client_keys: Replacement client address aggregation
+            trusted_proxies: Replacement list of trusted proxies
+        """
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_hour = requests_per_hour
+        self.requests_per_day = requests_per_day
+        self.burst = burst
+
+        quotas = (
+            Quota("minute", requests_per_minute, 60, burst),
+            Quota("hour", requests_per_hour, 3600),
+            Quota("day", requests_per_day, 86400),
+        )
+        previous = getattr(self, "strategy", None)
+        self.strategy: RateLimitStrategy = create_strategy(strategy, quotas)
+
+        # Subnets get the same algorithm with quotas of their own
+        self.subnet_limits = subnet_limits
+        self.subnet_strategy: Optional[RateLimitStrategy] = None
+        if subnet_limits is not None:
+            subnet_quotas = tuple(
+                Quota(quota.name, limit, quota.period)
+                for quota, limit in zip(quotas, subnet_limits)
             )
+            self.subnet_strategy = create_strategy(strategy, subnet_quotas)
+            quotas += subnet_quotas
+
+        # A request costing more than the smallest quota could never succeed
+        self.max_cost = min(quota.burst or quota.limit for quota in quotas)
+
+        # Reported for requests that are not counted (test mode, exemptions)
+        self._unused: List[QuotaStatus] = self.strategy.status(
+            self.strategy.new_state(), 0.0
+        )
+
+        if route_policies is not None:
+            self.routes = RouteTable(route_policies)
+        if heavy_hitters is not None:
+            self.heavy_hitters = heavy_hitters
+        if ip_filter is not None:
+            self.ip_filter = ip_filter
+        if client_keys is not None:
+            self.client_keys = client_keys
+        if trusted_proxies is not None:
+            self.trusted_proxies = trusted_proxies
+
+        if backend is not None and backend is not self.backend:
+            self.backend = backend
+        elif previous is not None and previous.name != self.strategy.name:
+            self.backend.clear()
 
     def _get_client_identifier(self, request: Request) -> str:
         """
         Get a unique identifier for the client.
 
+        Proxy headers are only believed when a trusted proxy sent them, so a
+        client cannot pick the address it is filtered and counted under.
+
         Args:
             request: FastAPI request object
 
         Returns:
             Client identifier string
         """
-        # Try to get real IP address, considering proxy headers
-        client_ip = request.headers.get("X-Forwarded-For")
-        if not client_ip:
-            client_ip = request.headers.get("X-Real-IP")
-        if not client_ip:
-            client_ip = request.client.host if request.client else "unknown"
+        return self.trusted_proxies.client_address(
+            request.client.host if request.client else None,
+            request.headers.get("X-Forwarded-For"),
+            request.headers.get("X-Real-IP"),
+        )
 
-        # Use IP address as identifier
-        return client_ip
+    def _get_scope_client_identifier(self, scope: Scope) -> str:
+        """
+        Get the client identifier straight from an ASGI scope.
+
+        Same rules as ``_get_client_identifier``, without building a Request.
 
-    def _cleanup_old_requests(self, client_id: str, current_time: float) -> None:
+        Args:
+            scope: ASGI HTTP connection scope
+
+        Returns:
+            Client identifier string
         """
-        Remove old requests outside the sliding window.
+        forwarded_for = []
+        real_ip = None
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                # Proxies may append their hop as a header line of its own
+                forwarded_for.append(value.decode("latin-1"))
+            elif name == b"x-real-ip":
+                real_ip = real_ip or value.decode("latin-1")
+
+        client = scope.get("client")
+        return self.trusted_proxies.client_address(
+            client[0] if client else None, ",".join(forwarded_for), real_ip
+        )
+
+    def _record_request(
+        self, client_id: str, current_time: float, cost: int = 1
+    ) -> None:
+        """
+        Count a request against every quota for a client, unconditionally.
 
         Args:
             client_id: Client identifier
-            current_time: Current timestamp
+            current_time: Timestamp of the request
+            cost: Number of units the request consumes
         """
-        if client_id not in self.client_requests:
-            return
 
-        # Remove requests older than the window size
-        cutoff_time = current_time - self.window_size_seconds
-        self.client_requests[client_id] = [
-            req_time
-            for req_time in self.client_requests[client_id]
-            if req_time > cutoff_time
-        ]
+        def consume(client: ClientState) -> None:
+            self.strategy.consume(client.state, current_time, cost)
+            client.total += 1
+
+        self.backend.update(client_id, self.strategy, consume)
 
-    def _check_rate_limit(
-        self, client_id: str, current_time: float, limit: int, window_seconds: int
-    ) -> bool:
+    def route_cost(self, request: Request) -> int:
         """
-        Check if client has exceeded rate limit for a specific window.
+        Get the number of rate limit units a request consumes.
 
         Args:
-            client_id: Client identifier
-            current_time: Current timestamp
-            limit: Maximum requests allowed
-            window_seconds: Window size in seconds
+            request: FastAPI request object
 
         Returns:
-            True if rate limit is exceeded, False otherwise
+            Cost from the matching route policy, 0 for exempt routes
         """
-        if client_id not in self.client_requests:
-            return False
+        return self.routes.cost(request.method, request.url.path)
 
-        # Get requests within the window
-        cutoff_time = current_time - window_seconds
-        recent_requests = [
-            req_time
-            for req_time in self.client_requests[client_id]
-            if req_time > cutoff_time
-        ]
-
-        return len(recent_requests) >= limit
+    def _allowed(self, client_id: Optional[str] = None) -> RateLimitDecision:
+        """Build a decision for a request that was not counted."""
+        return RateLimitDecision(
+            False, None, client_id, self.strategy.quotas, self._unused
+        )
 
-    def is_rate_limited(self, request: Request) -> tuple[bool, Optional[str]]:
+    def is_rate_limited(
+        self, request: Request, cost: Optional[int] = None
+    ) -> RateLimitDecision:
         """
         Check if the request should be rate limited.
 
+        The request is counted and the client's remaining quota read back in
+        a single backend operation.
+
         Args:
             request: FastAPI request object
+            cost: Units the request consumes (looked up from the route
+                policies if not given)
 
         Returns:
-            Tuple of (is_limited, reason)
+            Decision with the outcome, remaining quota and retry delay
         """
         # If in test mode, skip rate limiting unless explicitly testing
         if self.test_mode:
-            return False, None
+            return self._allowed()
 
-        client_id = self._get_client_identifier(request)
-        current_time = time.time()
+        if cost is None:
+            cost = self.route_cost(request)
+        return self.check(self._get_client_identifier(request), cost)
+
+    def check(self, client_id: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Count a request from a known client and decide whether to allow it.
+
+        Calls the backend on the current thread; from the event loop use
+        ``check_async``, which keeps network backends off the loop.
+
+        Args:
+            client_id: Client identifier
+            cost: Units the request consumes
 
-        # Clean up old requests
-        self._cleanup_old_requests(client_id, current_time)
+        Returns:
+            Decision with the outcome, remaining quota and retry delay
+        """
+        if self.test_mode or cost <= 0:
+            return self._allowed()
+        cost = min(cost, self.max_cost)
 
-        # Check different rate limits
-        if self._check_rate_limit(
-            client_id, current_time, self.requests_per_minute, 60
-        ):
-            self.violations[client_id] += 1
-            logger.warning(f"Rate limit exceeded for {client_id}: minute limit")
-            return True, "Rate limit exceeded: too many requests per minute"
+        current_time = time.time()
+        client_id, subnet = self.client_keys.keys(client_id)
+        try:
+            decisions = self._decide(client_id, subnet, current_time, cost)
+        except BackendUnavailableError as e:
+            return self._unavailable(client_id, e)
+        return self._decision(client_id, subnet, current_time, decisions)
+
+    async def check_async(self, client_id: str, cost: int = 1) -> RateLimitDecision:
+        """
+        Like ``check``, but run a blocking backend in a worker thread so a
+        slow or unreachable store never stalls the event loop.
+        """
+        if self.test_mode or cost <= 0:
+            return self._allowed()
+        cost = min(cost, self.max_cost)
 
-        if self._check_rate_limit(
-            client_id, current_time, self.requests_per_hour, 3600
-        ):
-            self.violations[client_id] += 1
-            logger.warning(f"Rate limit exceeded for {client_id}: hour limit")
-            return True, "Rate limit exceeded: too many requests per hour"
+        current_time = time.time()
+        client_id, subnet = self.client_keys.keys(client_id)
+        try:
+            if self.backend.blocking:
+                decisions = await asyncio.to_thread(
+                    self._decide, client_id, subnet, current_time, cost
+                )
+            else:
+                decisions = self._decide(client_id, subnet, current_time, cost)
+        except BackendUnavailableError as e:
+            return self._unavailable(client_id, e)
+        return self._decision(client_id, subnet, current_time, decisions)
+
+    def _decide(
+        self, client_id: str, subnet: Optional[str], current_time: float, cost: int
+    ) -> List[Decision]:
+        """Count a request in the backend, for the subnet too if enabled."""
+        if self.subnet_strategy is None or subnet is None:
+            return [self.backend.decide(client_id, self.strategy, current_time, cost)]
+        # Client and subnet counters are checked in a single pass
+        return self.backend.decide_many(
+            ((client_id, self.strategy), (subnet, self.subnet_strategy)),
+            current_time,
+            cost,
+        )
 
-        if self._check_rate_limit(
-            client_id, current_time, self.requests_per_day, 86400
-        ):
-            self.violations[client_id] += 1
-            logger.warning(f"Rate limit exceeded for {client_id}: day limit")
-            return True, "Rate limit exceeded: too many requests per day"
+    def _unavailable(
+        self, client_id: str, error: BackendUnavailableError
+    ) -> RateLimitDecision:
+        """Build the decision for a request the backend could not count."""
+        # Fail open: an unreachable store should not take the API down
+        logger.error(f"Rate limit backend unavailable: {error}")
+        return self._allowed(client_id)
 
-        # Add current request to tracking
-        self.client_requests[client_id].append(current_time)
+    def _decision(
+        self,
+        client_id: str,
+        subnet: Optional[str],
+        current_time: float,
+        decisions: List[Decision],
+    ) -> RateLimitDecision:
+        """Turn the backend's decisions into the limiter's verdict."""
+        exceeded, statuses, retry_after = decisions[-1]
+        self.heavy_hitters.record(client_id, current_time, exceeded >= 0)
+
+        quotas = self.strategy.quotas
+        if exceeded >= 0:
+            by_subnet = len(decisions) > 1
+            if by_subnet:
+                quotas = self.subnet_strategy.quotas
+            period = quotas[exceeded].name
+            source = " from your network" if by_subnet else ""
+            logger.warning(
+                f"Rate limit exceeded for {subnet if by_subnet else client_id}: "
+                f"{period} limit"
+            )
+            return RateLimitDecision(
+                True,
+                f"Rate limit exceeded: too many requests{source} per {period}",
+                client_id,
+                quotas,
+                statuses,
+                retry_after,
+            )
 
-        return False, None
+        if len(decisions) > 1:
+            quotas, statuses = self._tightest(decisions[0][1], decisions[1][1])
+        return RateLimitDecision(False, None, client_id, quotas, statuses)
+
+    def _tightest(
+        self, client: List[QuotaStatus], subnet: List[QuotaStatus]
+    ) -> Tuple[List[Quota], List[QuotaStatus]]:
+        """Pick the client or subnet quota with less left in each period."""
+        quotas = list(self.strategy.quotas)
+        statuses = list(client)
+        for index, status in enumerate(subnet):
+            if status.remaining < statuses[index].remaining:
+                quotas[index] = self.subnet_strategy.quotas[index]
+                statuses[index] = status
+        return quotas, statuses
 
     def get_client_stats(self, client_id: str) -> Dict:
         """
@@ -189,20 +511,25 @@ class RateLimiter:
             Dictionary with client statistics
         """
         current_time = time.time()
-        requests = self.client_requests.get(client_id, [])
+        client_id = self.client_keys.keys(client_id).client
+        client = self.backend.get(client_id, self.strategy)
 
-        # Calculate requests in different time windows
-        minute_ago = current_time - 60
-        hour_ago = current_time - 3600
-        day_ago = current_time - 86400
+        if client is None:
+            minute = hour = day = total = violations = 0
+        else:
+            minute, hour, day = (
+                round(used) for used in self.strategy.usage(client.state, current_time)
+            )
+            total = client.total
+            violations = client.violations
 
         return {
             "client_id": client_id,
-            "requests_last_minute": len([r for r in requests if r > minute_ago]),
-            "requests_last_hour": len([r for r in requests if r > hour_ago]),
-            "requests_last_day": len([r for r in requests if r > day_ago]),
-            "total_requests": len(requests),
-            "violations": self.violations.get(client_id, 0),
+            "requests_last_minute": minute,
+            "requests_last_hour": hour,
+            "requests_last_day": day,
+            "total_requests": total,
+            "violations": violations,
             "limits": {
                 "per_minute": self.requests_per_minute,
                 "per_hour": self.requests_per_hour,
@@ -218,8 +545,29 @@ class RateLimiter:
             Dictionary with global statistics
         """
         return {
-            "total_clients": len(self.client_requests),
-            "total_violations": sum(self.violations.values()),
+            "total_clients": self.backend.client_count(),
+            "total_violations": self.backend.total_violations(),
+            "strategy": self.strategy.name,
+            "backend": self.backend.name,
+            "route_policies": [
+                {
+                    "path": policy.path,
+                    "methods": list(policy.methods) if policy.methods else None,
+                    "cost": policy.cost,
+                }
+                for policy in self.routes.policies
+            ],
+            "ip_rules": len(self.ip_filter),
+            "client_prefixes": {
+                f"ipv{version}": {"client": client, "subnet": subnet}
+                for version, (client, subnet) in self.client_keys.prefixes.items()
+            },
+            "subnet_limits": (
+                dict(zip(("per_minute", "per_hour", "per_day"), self.subnet_limits))
+                if self.subnet_limits is not None
+                else None
+            ),
+            "memory": self.backend.memory_stats(),
             "limits": {
                 "per_minute": self.requests_per_minute,
                 "per_hour": self.requests_per_hour,
@@ -227,6 +575,117 @@ class RateLimiter:
             },
         }
 
+    def get_top_clients(self, window: str = "1h", limit: int = 10) -> Dict:
+        """
+        Get the clients sending the most requests and causing the most
+        violations.
+
+        Counts come from a fixed-size summary of the requests this process
+        has seen, so they are estimates: each is at most ``error`` too high.
+
+        Args:
+            window: Time window, one of ``heavy_hitters.windows``
+            limit: Number of clients to return per list
+
+        Returns:
+            Dictionary with the window and its top requesters and violators
+        """
+        return self.heavy_hitters.top(window, limit, time.time())
+
+    async def run_sweeper(self, interval_seconds: float) -> None:
+        """
+        Periodically drop idle clients from the backend.
+
+        Runs until cancelled; meant to be started as a background task for
+        the lifetime of the application.
+
+        Args:
+            interval_seconds: Time between sweeps
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = self.backend.sweep(time.time())
+            except Exception as e:
+                logger.error(f"Rate limiter sweep failed: {e}")
+                continue
+            if removed:
+                logger.info(f"Rate limiter sweep removed {removed} idle clients")
+
+    def save_snapshot(self, path: str) -> int:
+        """
+        Save client state to a snapshot file, so a restart keeps enforcing
+        the current limits.
+
+        Only needed for the in-process backend; shared backends already
+        outlive the process.
+
+        Args:
+            path: Snapshot file to write (replaced atomically)
+
+        Returns:
+            Number of client records saved
+        """
+        return self._write_snapshot(path, self.backend.snapshot_records())
+
+    def _write_snapshot(self, path: str, records: List[SnapshotRecord]) -> int:
+        start = time.perf_counter()
+        try:
+            saved = self.backend.write_snapshot(path, self.strategy, records)
+        except Exception as e:
+            logger.error(f"Failed to save rate limiter snapshot: {e}")
+            return 0
+        if saved:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(
+                f"Saved {saved} rate limit records to {path} in {elapsed:.1f}ms"
+            )
+        return saved
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Restore client state saved by ``save_snapshot``.
+
+        A missing, corrupt or incompatible snapshot is skipped, so startup
+        never fails because of it.
+
+        Args:
+            path: Snapshot file to read
+
+        Returns:
+            Number of client records restored
+        """
+        start = time.perf_counter()
+        try:
+            restored = self.backend.load_snapshot(path, self.strategy)
+        except Exception as e:
+            logger.error(f"Failed to load rate limiter snapshot: {e}")
+            return 0
+        if restored:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(
+                f"Restored {restored} rate limit records from {path} "
+                f"in {elapsed:.1f}ms"
+            )
+        return restored
+
+    async def run_checkpoints(self, path: str, interval_seconds: float) -> None:
+        """
+        Periodically save a snapshot, so a crash loses little state.
+
+        Runs until cancelled. Records are copied on the event loop, so no
+        request changes them mid-copy, then packed and written from a worker
+        thread to keep the loop responsive.
+
+        Args:
+            path: Snapshot file to write
+            interval_seconds: Time between checkpoints
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            records = self.backend.snapshot_records()
+            await asyncio.to_thread(self._write_snapshot, path, records)
+
     def reset_client(self, client_id: str) -> None:
         """
         Reset rate limiting for a specific client.
@@ -234,10 +693,8 @@ class RateLimiter:
         Args:
             client_id: Client identifier
         """
-        if client_id in self.client_requests:
-            del self.client_requests[client_id]
-        if client_id in self.violations:
-            del self.violations[client_id]
+        client_id = self.client_keys.keys(client_id).client
+        self.backend.reset(client_id)
         logger.info(f"Rate limiting reset for client: {client_id}")
 
 
@@ -248,10 +705,103 @@ TEST_MODE = os.getenv("TESTING", "false").lower() == "true"
 rate_limiter = RateLimiter(test_mode=TEST_MODE)
 
 
+def _denied_response() -> JSONResponse:
+    """Build the 403 response for a client on the deny list."""
+    return JSONResponse(
+        status_code=403,
+        content={"detail": "Access from this network is blocked", "error": "Forbidden"},
+    )
+
+
+def _limited_response(decision: RateLimitDecision) -> JSONResponse:
+    """Build the 429 response for a rejected request."""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "detail": decision.reason,
+            "error": "Too Many Requests",
+            "retry_after": decision.retry_after_seconds,
+        },
+        headers=decision.headers(),
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware for rate limiting.
+
+    Decides on the raw scope and adds the rate limit headers to the
+    ``http.response.start`` message as it passes through. Unlike
+    ``rate_limit_middleware``, which runs under Starlette's
+    ``BaseHTTPMiddleware``, it does not wrap the response body in an extra
+    task and stream.
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware)
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            app: Next ASGI application in the stack
+            limiter: Limiter to use (defaults to the global ``rate_limiter``)
+        """
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Looked up per request so the global limiter can be swapped out
+        limiter = self.limiter if self.limiter is not None else rate_limiter
+
+        client_id = limiter._get_scope_client_identifier(scope)
+
+        # Listed networks are settled before any client state is touched
+        action = limiter.ip_filter.match(client_id)
+        if action == DENY:
+            logger.warning(f"Rejected request from denied network: {client_id}")
+            await _denied_response()(scope, receive, send)
+            return
+
+        # Exempt routes (health checks, docs) and allowed networks skip rate
+        # limiting entirely
+        cost = limiter.routes.cost(scope["method"], scope["path"])
+        if cost == 0 or action == ALLOW:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await limiter.check_async(client_id, cost)
+
+        if decision.limited:
+            logger.warning(
+                f"Rate limit exceeded: {decision.client_id} - {decision.reason}"
+            )
+            await _limited_response(decision)(scope, receive, send)
+            return
+
+        extra_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in decision.headers().items()
+        ]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *extra_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
 async def rate_limit_middleware(request: Request, call_next):
     """
     FastAPI middleware for rate limiting.
 
+    Kept for ``app.middleware("http")``; ``RateLimitMiddleware`` does the
+    same work with less overhead per request.
+
     Args:
         request: FastAPI request object
         call_next: Next middleware/endpoint function
@@ -259,40 +809,28 @@ async def rate_limit_middleware(request: Request, call_next):
     Returns:
         FastAPI response
     """
-    # Skip rate limiting for health check and root endpoints
-    if request.url.path in ["/health", "/", "/docs", "/redoc", "/openapi.json"]:
+    # Listed networks are settled before any client state is touched
+    action = rate_limiter.ip_filter.match(rate_limiter._get_client_identifier(request))
+    if action == DENY:
+        return _denied_response()
+
+    # Exempt routes (health checks, docs) and allowed networks skip rate
+    # limiting entirely
+    cost = rate_limiter.route_cost(request)
+    if cost == 0 or action == ALLOW:
         return await call_next(request)
 
     # Check rate limit
-    is_limited, reason = rate_limiter.is_rate_limited(request)
-
-    if is_limited:
-        logger.warning(f"Rate limit exceeded: {request.client.host} - {reason}")
-        return JSONResponse(
-            status_code=429,
-            content={"detail": reason, "error": "Too Many Requests", "retry_after": 60},
-            headers={"Retry-After": "60"},
-        )
-
-    # Add rate limit headers to response
-    response = await call_next(request)
+    decision = await rate_limiter.check_async(
+        rate_limiter._get_client_identifier(request), cost
+    )
 
-    # Get client stats for headers
-    client_id = rate_limiter._get_client_identifier(request)
-    stats = rate_limiter.get_client_stats(client_id)
+    if decision.limited:
+        logger.warning(f"Rate limit exceeded: {decision.client_id} - {decision.reason}")
+        return _limited_response(decision)
 
-    # Add rate limit headers
-    response.headers["X-RateLimit-Limit-Minute"] = str(rate_limiter.requests_per_minute)
-    response.headers["X-RateLimit-Limit-Hour"] = str(rate_limiter.requests_per_hour)
-    response.headers["X-RateLimit-Limit-Day"] = str(rate_limiter.requests_per_day)
-    response.headers["X-RateLimit-Remaining-Minute"] = str(
-        max(0, rate_limiter.requests_per_minute - stats["requests_last_minute"])
-    )
-    response.headers["X-RateLimit-Remaining-Hour"] = str(
-        max(0, rate_limiter.requests_per_hour - stats["requests_last_hour"])
-    )
-    response.headers["X-RateLimit-Remaining-Day"] = str(
-        max(0, rate_limiter.requests_per_day - stats["requests_last_day"])
-    )
+    # The decision already holds the remaining quota, so no second lookup
+    response = await call_next(request)
+    response.headers.update(decision.headers())
 
     return response
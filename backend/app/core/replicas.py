@@ -0,0 +1,196 @@
+"""
+Routing of read-only queries to database replicas.
+
+Public pages only read, so their queries can go to replicas and leave the
+primary to the admin writes. Each read-only request takes the next healthy
+replica in turn. A replica that fails a background ping, or a query with a
+connection error, is ejected for a while, and reads fall back to the
+primary when no replica is left.
+
+Replicas trail the primary by their replication lag, so a client that has
+just written could read stale data from one. After a successful write, the
+response carries a short-lived cookie, and requests that bring it back
+read from the primary until it expires. Authenticated requests (the admin
+panel) always read from the primary.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Cookie marking a client that wrote recently; holds the time it expires
+PRIMARY_COOKIE = "db_primary_until"
+
+# Methods that never count as writes
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Replica:
+    """A replica engine, its session factory and its health."""
+
+    def __init__(self, name: str, engine, sessionmaker):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = sessionmaker
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+        self.failures = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas, ejecting those that fail."""
+
+    def __init__(self, eject_seconds: float = 30.0, timeout: float = 2.0):
+        """
+        Args:
+            eject_seconds: How long a failed replica receives no reads
+            timeout: Seconds a health check ping may take
+        """
+        self.eject_seconds = eject_seconds
+        self.timeout = timeout
+        self.replicas: List[Replica] = []
+        self._next = itertools.count()
+
+    def add(self, name: str, engine, sessionmaker) -> Replica:
+        """Register a replica's async engine and session factory."""
+        replica = Replica(name, engine, sessionmaker)
+        self.replicas.append(replica)
+        return replica
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Pick the replica for the next read-only request.
+
+        Returns:
+            The next healthy replica in turn, or None to use the primary
+        """
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        start = next(self._next)
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if replica.is_healthy(now):
+                return replica
+        return None
+
+    def eject(self, replica: Replica, error: Any) -> None:
+        """Stop sending reads to a replica for ``eject_seconds``."""
+        if replica.is_healthy(time.monotonic()):
+            logger.warning(f"Ejecting database replica {replica.name}: {error}")
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        replica.last_error = str(error) or type(error).__name__
+        replica.failures += 1
+
+    async def _ping(self, replica: Replica) -> None:
+        async with replica.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def check(self) -> None:
+        """Ping every replica, ejecting failures and readmitting recoveries."""
+        for replica in self.replicas:
+            try:
+                await asyncio.wait_for(self._ping(replica), self.timeout)
+            except Exception as e:
+                self.eject(replica, e)
+                continue
+            if not replica.is_healthy(time.monotonic()):
+                logger.info(f"Database replica {replica.name} recovered")
+                replica.ejected_until = 0.0
+
+    async def run(self, interval_seconds: float) -> None:
+        """
+        Check the replicas every interval.
+
+        Runs until cancelled; meant to be started as a background task for
+        the lifetime of the application.
+        """
+        while True:
+            await self.check()
+            await asyncio.sleep(interval_seconds)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Health of each replica, with the time left on any ejection."""
+        now = time.monotonic()
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.is_healthy(now),
+                "ejected_for_seconds": round(max(0.0, replica.ejected_until - now), 3),
+                "failures": replica.failures,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        """Close the replicas' pooled connections."""
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def wrote_recently(cookie_header: Optional[str], now: Optional[float] = None) -> bool:
+    """Whether a Cookie header carries an unexpired primary cookie."""
+    if not cookie_header or PRIMARY_COOKIE not in cookie_header:
+        return False
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cookie_header)
+        until = float(cookie[PRIMARY_COOKIE].value)
+    except (CookieError, KeyError, ValueError):
+        return False
+    return (time.time() if now is None else now) < until
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware that marks clients which just wrote.
+
+    Successful responses to unsafe methods get a cookie that keeps the
+    client's reads on the primary for ``window`` seconds, long enough for
+    the replicas to catch up.
+
+    Usage:
+        app.add_middleware(ReadYourWritesMiddleware, window=5)
+    """
+
+    def __init__(self, app: ASGIApp, window: float = 5.0):
+        """
+        Args:
+            app: Next ASGI application in the stack
+            window: Seconds a client reads from the primary after a write
+        """
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.window
+                cookie = (
+                    f"{PRIMARY_COOKIE}={until:.3f}; Max-Age={int(self.window) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"set-cookie", cookie.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,116 @@
+"""
+Full-text search over published posts.
+
+Posts are indexed by the database itself, on every insert and update, so a
+search never scans post bodies:
+
+- PostgreSQL keeps a generated ``search_vector`` column (title weighted
+  above excerpt, above content) with a GIN index. Queries use
+  ``websearch_to_tsquery``, rank with ``ts_rank_cd`` and highlight with
+  ``ts_headline``.
+- SQLite, used in development and tests, keeps an FTS5 table over the same
+  fields, filled by triggers. Queries rank with ``bm25`` and highlight with
+  ``snippet``.
+
+The index definitions live with the ``Post`` model and its migration.
+"""
+
+import re
+from typing import Any, List, Tuple
+
+from sqlalchemy import bindparam, desc, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..models import Post
+from ..schemas import PostList
+from .projection import load_schema_fields
+
+# Markers around matched terms in snippets
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+ELLIPSIS = "…"
+# Approximate number of words in a snippet
+SNIPPET_WORDS = 24
+
+
+def _search_statement(rank, snippet, *criteria):
+    """Page of published posts matching ``criteria``, best match first."""
+    return (
+        select(Post, rank.label("rank"), snippet.label("snippet"))
+        .options(load_schema_fields(Post, PostList), selectinload(Post.category))
+        .where(Post.published_at.isnot(None), *criteria)
+        .order_by(desc("rank"), Post.published_at.desc(), Post.id.desc())
+        .offset(bindparam("skip"))
+        .limit(bindparam("limit"))
+    )
+
+
+# The text search configuration and headline options are SQL literals, not
+# parameters, so PostgreSQL resolves them to regconfig and text at prepare time
+_language = literal_column("'english'")
+_headline_options = literal_column(
+    f"'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    f'FragmentDelimiter=" {ELLIPSIS} ", MaxFragments=2, '
+    f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}'"
+)
+_tsquery = func.websearch_to_tsquery(_language, bindparam("q"))
+_search_vector = literal_column("posts.search_vector")
+_postgres_search = _search_statement(
+    func.ts_rank_cd(_search_vector, _tsquery),
+    func.ts_headline(_language, Post.content, _tsquery, _headline_options),
+    _search_vector.op("@@")(_tsquery),
+)
+
+_posts_fts = literal_column("posts_fts")
+_sqlite_search = _search_statement(
+    # bm25 is lower for better matches. Title, excerpt and content are
+    # weighted 5:2:1, like the A, B and C weights of ts_rank_cd
+    -func.bm25(_posts_fts, 5.0, 2.0, 1.0),
+    func.snippet(
+        _posts_fts, -1, HIGHLIGHT_START, HIGHLIGHT_STOP, ELLIPSIS, SNIPPET_WORDS
+    ),
+    _posts_fts.op("MATCH")(bindparam("q")),
+).join(
+    table("posts_fts", literal_column("rowid")),
+    literal_column("posts_fts.rowid") == Post.id,
+)
+
+
+def fts5_query(q: str) -> str:
+    """
+    Turn visitor input into an FTS5 query matching posts with every word.
+
+    Each word is quoted, so FTS5 operators and punctuation in the input are
+    searched for as text rather than parsed as query syntax.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+
+async def search_posts(
+    db: AsyncSession, q: str, skip: int = 0, limit: int = 10
+) -> List[Tuple[Post, float, str]]:
+    """
+    Search published posts.
+
+    Args:
+        db: Session on the primary or a replica
+        q: Search terms as typed by the visitor
+        skip: Number of results to skip
+        limit: Maximum number of results
+
+    Returns:
+        Matching posts with their rank (higher is better) and a snippet of
+        the best matching text, best match first
+    """
+    params: dict[str, Any] = {"skip": skip, "limit": limit}
+    if db.get_bind().dialect.name == "postgresql":
+        statement = _postgres_search
+        params["q"] = q
+    else:
+        statement = _sqlite_search
+        params["q"] = fts5_query(q)
+        if not params["q"]:
+            return []
+    result = await db.execute(statement, params)
+    return [(post, rank, snippet) for post, rank, snippet in result.all()]
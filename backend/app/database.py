@@ -1,12 +1,25 @@
 import logging
-import subprocess
-import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Set
 
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.exc import SQLAlchemyError
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import URL, make_url
+from fastapi import Depends, Request
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .config import settings
+from .core.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    get_pool_stats,
+)
+from .core.replicas import ReplicaRouter, wrote_recently
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,19 +27,126 @@ logger = logging.getLogger(__name__)
 # Use the DATABASE_URL from settings or construct it from individual components
 database_url = settings.DATABASE_URL or settings.get_database_url()
 
+# Pool settings shared by both engines
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
 # Create database engine
 engine = create_engine(
     database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=10,
-    max_overflow=20,
+    poolclass=InstrumentedQueuePool,
+    **POOL_OPTIONS,
     echo=settings.LOG_SQL_QUERIES,  # Log SQL queries only when explicitly enabled
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for each database backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def get_async_database_url(url: str) -> URL:
+    """Swap the driver in a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    # Heroku-style URLs (as Railway hands out) use the "postgres" scheme
+    backend = (
+        "postgresql" if parsed.drivername == "postgres" else parsed.get_backend_name()
+    )
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    if backend == "postgresql" and "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def get_async_connect_args(url: URL) -> dict:
+    """Driver options for an async engine"""
+    if url.get_backend_name() == "postgresql":
+        # asyncpg prepares every statement on the server; keep the most used
+        # ones prepared per connection so they are not parsed again
+        return {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return {}
+
+
+# Create async database engine, used by the request handlers so that queries
+# do not block the event loop
+async_database_url = get_async_database_url(database_url)
+async_engine = create_async_engine(
+    async_database_url,
+    connect_args=get_async_connect_args(async_database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    **POOL_OPTIONS,
+    echo=settings.LOG_SQL_QUERIES,
+)
+
+# Create async session factory. Objects stay loaded after a commit, since
+# reloading an expired attribute would need another awaited query
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+# Read replicas, used by the public read-only endpoints
+replica_router = ReplicaRouter(
+    eject_seconds=settings.DATABASE_REPLICA_EJECT_SECONDS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+)
+for index, replica_url in enumerate(
+    url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+):
+    replica_async_url = get_async_database_url(replica_url)
+    replica_engine = create_async_engine(
+        replica_async_url,
+        connect_args=get_async_connect_args(replica_async_url),
+        poolclass=InstrumentedAsyncQueuePool,
+        **POOL_OPTIONS,
+        echo=settings.LOG_SQL_QUERIES,
+    )
+    replica_router.add(
+        f"replica-{index}",
+        replica_engine,
+        async_sessionmaker(
+            replica_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        ),
+    )
+
+
+def get_pools_stats():
+    """Settings, usage and checkout metrics of every connection pool"""
+    return {
+        "sync": get_pool_stats(engine.pool),
+        "async": get_pool_stats(async_engine.pool),
+        "replicas": [
+            {**health, "pool": get_pool_stats(replica.engine.pool)}
+            for replica, health in zip(
+                replica_router.replicas, replica_router.get_stats()
+            )
+        ],
+    }
+
+
+def reset_pool_metrics():
+    """Clear the checkout metrics of every connection pool"""
+    pools = [engine.pool, async_engine.pool]
+    pools.extend(replica.engine.pool for replica in replica_router.replicas)
+    for pool in pools:
+        pool.metrics.reset()
+
+
 # Create base class for models
 Base = declarative_base()
 
@@ -44,6 +164,45 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {e}")
+            await db.rollback()
+            raise
+
+
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Dependency to get an async session for read-only queries, on a replica
+    when one is healthy. Clients that wrote recently and authenticated
+    requests read from the primary, so they see their own writes.
+    """
+    replica = None
+    if "authorization" not in request.headers and not wrote_recently(
+        request.headers.get("cookie")
+    ):
+        replica = replica_router.choose()
+    if replica is None:
+        yield db
+        return
+
+    async with replica.sessionmaker() as replica_db:
+        try:
+            yield replica_db
+        except (OperationalError, InterfaceError, OSError) as e:
+            # Lost or refused connection: send reads elsewhere for a while
+            replica_router.eject(replica, e)
+            raise
+        except SQLAlchemyError as e:
+            logger.error(f"Database error on {replica.name}: {e}")
+            await replica_db.rollback()
+            raise
+
+
 def check_tables_exist():
     """Check if all required tables exist in the database"""
     try:
@@ -77,23 +236,79 @@ def check_tables_exist():
         return False
 
 
-def run_migrations():
-    """Run database migrations using Alembic"""
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Key of the PostgreSQL advisory lock held while migrating ("PBLGMIGR")
+MIGRATION_LOCK_ID = 0x50424C474D494752
+
+
+def get_alembic_config() -> Config:
+    """Alembic configuration for running migrations inside the application"""
+    config = Config(str(ALEMBIC_INI))
+    # Logging is already set up; env.py must not replace it
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def get_current_revisions(connection) -> Set[str]:
+    """Revisions recorded in alembic_version, empty if it does not exist yet"""
+    try:
+        rows = connection.execute(text("SELECT version_num FROM alembic_version"))
+        return {row[0] for row in rows}
+    except SQLAlchemyError:
+        # A failed query aborts the transaction on PostgreSQL
+        return set()
+    finally:
+        connection.rollback()
+
+
+@contextmanager
+def migration_lock(connection):
+    """
+    Hold a PostgreSQL session advisory lock so that only one worker or node
+    migrates at a time; the others wait and then find the schema current.
+    Other databases run without a lock.
+    """
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    connection.execute(
+        text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_ID}
+    )
+    connection.commit()
     try:
-        logger.info("Running database migrations...")
-        result = subprocess.run(
-            [sys.executable, "-m", "alembic", "upgrade", "head"],
-            capture_output=True,
-            text=True,
-            cwd=".",
+        yield
+    finally:
+        connection.rollback()
+        connection.execute(
+            text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_ID}
         )
+        connection.commit()
 
-        if result.returncode == 0:
-            logger.info("Database migrations completed successfully")
-            return True
-        else:
-            logger.error(f"Migration failed: {result.stderr}")
-            return False
+
+def run_migrations():
+    """Upgrade the database to the latest Alembic revision in-process"""
+    try:
+        config = get_alembic_config()
+        heads = set(ScriptDirectory.from_config(config).get_heads())
+        with engine.connect() as connection:
+            # Fast path: one query when the schema is already current
+            if get_current_revisions(connection) == heads:
+                logger.info("Database schema is up to date")
+                return True
+
+            with migration_lock(connection):
+                # Another worker may have migrated while we waited for the lock
+                if get_current_revisions(connection) == heads:
+                    logger.info("Database schema is up to date")
+                    return True
+                logger.info("Running database migrations...")
+                config.attributes["connection"] = connection
+                command.upgrade(config, "head")
+                connection.commit()
+
+        logger.info("Database migrations completed successfully")
+        return True
     except Exception as e:
         logger.error(f"Error running migrations: {e}")
         return False
@@ -130,3 +345,9 @@ def test_db_connection():
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return False
+
+
+async def ping_database():
+    """Run a trivial query on the async engine; raises if the database is down"""
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
@@ -1,13 +1,30 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.v1.api import api_router
 from .config import settings
-from .core.rate_limiter import rate_limit_middleware, rate_limiter
-from .database import run_migrations, test_db_connection
+from .core.client_keys import ClientKeyMapper
+from .core.health import health_checker
+from .core.heavy_hitters import HeavyHitterTracker
+from .core.ip_filter import IPFilter, TrustedProxies, parse_cidr_list
+from .core.loop_monitor import loop_monitor
+from .core.rate_limit_backends import create_backend
+from .core.rate_limit_policies import DEFAULT_ROUTE_POLICIES, parse_route_policies
+from .core.query_stats import QueryStatsMiddleware
+from .core.rate_limiter import RateLimitMiddleware, rate_limiter
+from .core.replicas import ReadYourWritesMiddleware
+from .database import (
+    async_engine,
+    ping_database,
+    replica_router,
+    run_migrations,
+    test_db_connection,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -25,7 +42,7 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan event handler for database initialization"""
+    """Lifespan event handler for startup and shutdown tasks"""
     # Startup
     logger.info("Starting Portfolio Blog API...")
 
@@ -41,10 +58,66 @@ async def lifespan(app: FastAPI):
             "Failed to connect to database. Please check your database configuration."
         )
 
+    # Measure event loop lag and catch code that blocks it
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.configure(
+            settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+            settings.LOOP_MONITOR_THRESHOLD_MS / 1000,
+        )
+        loop_monitor.start()
+
+    # Check dependencies once now, then keep the readiness status fresh in
+    # the background so probes never wait on them
+    health_checker.configure(
+        settings.HEALTH_CHECK_INTERVAL_SECONDS, settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    )
+    health_checker.register("database", ping_database)
+    await health_checker.refresh()
+
+    # Pick up rate limits where the previous process left off
+    snapshot_path = settings.RATE_LIMIT_SNAPSHOT_PATH
+    if snapshot_path:
+        rate_limiter.load_snapshot(snapshot_path)
+
+    # Drop idle clients from the rate limiter in the background
+    tasks = [
+        asyncio.create_task(
+            rate_limiter.run_sweeper(settings.RATE_LIMIT_SWEEP_INTERVAL_SECONDS)
+        ),
+        asyncio.create_task(health_checker.run()),
+    ]
+    if replica_router.replicas:
+        tasks.append(
+            asyncio.create_task(
+                replica_router.run(settings.HEALTH_CHECK_INTERVAL_SECONDS)
+            )
+        )
+    if snapshot_path and settings.RATE_LIMIT_CHECKPOINT_INTERVAL_SECONDS > 0:
+        tasks.append(
+            asyncio.create_task(
+                rate_limiter.run_checkpoints(
+                    snapshot_path, settings.RATE_LIMIT_CHECKPOINT_INTERVAL_SECONDS
+                )
+            )
+        )
+
     yield
 
-    # Shutdown (if needed)
+    # Shutdown
     logger.info("Shutting down Portfolio Blog API...")
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    await loop_monitor.stop()
+
+    if snapshot_path:
+        rate_limiter.save_snapshot(snapshot_path)
+
+    # Close pooled async connections while their event loop is still running
+    await async_engine.dispose()
+    await replica_router.dispose()
 
 
 # Create FastAPI app
@@ -58,9 +131,48 @@ app = FastAPI(
 )
 
 # Initialize rate limiter with settings
-rate_limiter.requests_per_minute = settings.RATE_LIMIT_REQUESTS_PER_MINUTE
-rate_limiter.requests_per_hour = settings.RATE_LIMIT_REQUESTS_PER_HOUR
-rate_limiter.requests_per_day = settings.RATE_LIMIT_REQUESTS_PER_DAY
+rate_limiter.configure(
+    requests_per_minute=settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+    requests_per_hour=settings.RATE_LIMIT_REQUESTS_PER_HOUR,
+    requests_per_day=settings.RATE_LIMIT_REQUESTS_PER_DAY,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    burst=settings.RATE_LIMIT_BURST,
+    backend=create_backend(
+        settings.RATE_LIMIT_BACKEND,
+        redis_url=settings.RATE_LIMIT_REDIS_URL,
+        shm_path=settings.RATE_LIMIT_SHM_PATH,
+        shm_capacity=settings.RATE_LIMIT_SHM_CAPACITY,
+        max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+        idle_ttl=settings.RATE_LIMIT_IDLE_TTL_SECONDS,
+    ),
+    route_policies=[
+        *DEFAULT_ROUTE_POLICIES,
+        *parse_route_policies(settings.RATE_LIMIT_ROUTE_COSTS),
+    ],
+    heavy_hitters=HeavyHitterTracker(settings.RATE_LIMIT_TOP_K_CAPACITY),
+    ip_filter=IPFilter(
+        allow=parse_cidr_list(settings.RATE_LIMIT_ALLOW_CIDRS),
+        deny=parse_cidr_list(settings.RATE_LIMIT_DENY_CIDRS),
+    ),
+    subnet_limits=(
+        (
+            settings.RATE_LIMIT_SUBNET_REQUESTS_PER_MINUTE,
+            settings.RATE_LIMIT_SUBNET_REQUESTS_PER_HOUR,
+            settings.RATE_LIMIT_SUBNET_REQUESTS_PER_DAY,
+        )
+        if settings.RATE_LIMIT_SUBNET_LIMITS_ENABLED
+        else None
+    ),
+    client_keys=ClientKeyMapper(
+        ipv4_prefix=settings.RATE_LIMIT_IPV4_PREFIX,
+        ipv6_prefix=settings.RATE_LIMIT_IPV6_PREFIX,
+        ipv4_subnet_prefix=settings.RATE_LIMIT_SUBNET_IPV4_PREFIX,
+        ipv6_subnet_prefix=settings.RATE_LIMIT_SUBNET_IPV6_PREFIX,
+    ),
+    trusted_proxies=TrustedProxies(
+        parse_cidr_list(settings.RATE_LIMIT_TRUSTED_PROXIES)
+    ),
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -79,12 +191,33 @@ app.add_middleware(
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers",
     ],
-    expose_headers=["Content-Length", "Content-Type"],
+    expose_headers=[
+        "Content-Length",
+        "Content-Type",
+        "X-DB-Query-Count",
+        "X-DB-Query-Time-Ms",
+        "X-Next-Cursor",
+    ],
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
+# Count and time SQL statements per request, and flag N+1 queries
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        headers=settings.DEBUG,
+        n_plus_one_threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD,
+        log_level=logging.INFO if settings.DEBUG else logging.DEBUG,
+    )
+
+# Keep clients that just wrote on the primary until replicas catch up
+if replica_router.replicas:
+    app.add_middleware(
+        ReadYourWritesMiddleware, window=settings.DATABASE_READ_YOUR_WRITES_SECONDS
+    )
+
 # Add rate limiting middleware
-app.middleware("http")(rate_limit_middleware)
+app.add_middleware(RateLimitMiddleware)
 
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
@@ -97,6 +230,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    db_status = "healthy" if test_db_connection() else "unhealthy"
+    """Health check endpoint, reporting the cached database status"""
+    database = health_checker.status()["checks"].get("database")
+    db_status = "healthy" if database and database["healthy"] else "unhealthy"
     return {"status": "healthy", "database": db_status, "version": "1.0.0"}
+
+
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the process is serving requests; no dependencies"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readiness_check():
+    """Readiness probe: the dependency status from the last background check"""
+    status = health_checker.status()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
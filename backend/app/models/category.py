@@ -15,7 +15,7 @@ class Category(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(
-        String, nullable=False
+        String, index=True, nullable=False
     )  # Display name (e.g., "Technology", "Career Tips")
     slug = Column(
         String, unique=True, index=True, nullable=False
@@ -24,5 +24,9 @@ class Category(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    # Relationship to blog posts
-    posts = relationship("Post", back_populates="category")
+    # Relationship to blog posts. Never loaded by the API: checks for posts
+    # use EXISTS, and deleting a category leaves its (absent) posts alone
+    # rather than loading them to clear their foreign keys
+    posts = relationship(
+        "Post", back_populates="category", lazy="select", passive_deletes=True
+    )
@@ -1,11 +1,31 @@
-from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Integer, String, Text
-from sqlalchemy.sql import func
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.sql import func, text
 
 from ..database import Base
 
 
 class Experience(Base):
     __tablename__ = "experience"
+    __table_args__ = (
+        # Public listing: active entries, most recent start first
+        Index(
+            "ix_experience_active_start",
+            "start_date",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -1,12 +1,40 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+)
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from ..database import Base
 
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Public listings: published posts, newest first, optionally by category
+        Index(
+            "ix_posts_published",
+            "published_at",
+            "id",
+            postgresql_where=text("published_at IS NOT NULL"),
+            sqlite_where=text("published_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_posts_category_published",
+            "category_id",
+            "published_at",
+            "id",
+            postgresql_where=text("published_at IS NOT NULL"),
+            sqlite_where=text("published_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -25,5 +53,74 @@ class Post(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     # Relationships
-    category = relationship("Category", back_populates="posts")  # Blog post category
+    # Blog post category, needed whenever a post is serialized: many-to-one, so
+    # joined into the post's own query by default. Listings override this
+    # with selectinload to fetch each distinct category once
+    category = relationship("Category", back_populates="posts", lazy="joined")
     author = relationship("User", back_populates="posts")
+
+
+# Full-text search over title, excerpt and content, kept current by the
+# database on every insert and update (see app/core/search.py). These are
+# created with the table; the add_post_search migration creates them for
+# existing databases.
+
+# PostgreSQL: a generated tsvector column, weighted by field, with a GIN index
+POSTGRES_SEARCH_DDL = (
+    """
+    ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(excerpt, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)",
+)
+
+# SQLite: an FTS5 index over the posts table, maintained by triggers
+SQLITE_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE posts_fts USING fts5(
+        title, excerpt, content,
+        content='posts', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts (rowid, title, excerpt, content)
+        VALUES (new.id, new.title, new.excerpt, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, excerpt, content
+    ON posts BEGIN
+        INSERT INTO posts_fts (posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.id, old.title, old.excerpt, old.content);
+        INSERT INTO posts_fts (rowid, title, excerpt, content)
+        VALUES (new.id, new.title, new.excerpt, new.content);
+    END
+    """,
+)
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(
+        Post.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        Post.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+# Triggers go with the table, but the FTS5 table outlives it
+event.listen(
+    Post.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite"),
+)
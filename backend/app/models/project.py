@@ -1,11 +1,39 @@
-from sqlalchemy import JSON, Boolean, Column, DateTime, Integer, String, Text
-from sqlalchemy.sql import func
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.sql import func, text
 
 from ..database import Base
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Public listings: active (and featured) projects, newest first.
+        # SQLite stores booleans as integers and queries compare them to 1
+        Index(
+            "ix_projects_active_created",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_projects_active_featured",
+            "featured",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -1,7 +1,8 @@
 from .category import Category, CategoryCreate, CategoryUpdate
 from .experience import Experience, ExperienceCreate, ExperienceList, ExperienceUpdate
-from .post import Post, PostCreate, PostList, PostUpdate
+from .post import Post, PostCreate, PostList, PostSearchResult, PostUpdate
 from .project import Project, ProjectCreate, ProjectList, ProjectUpdate
+from .rate_limit import IPRule
 from .subscriber import NewsletterSubscription
 from .user import Token, TokenData, User, UserCreate, UserLogin, UserUpdate
 
@@ -19,6 +20,7 @@ __all__ = [
     "PostCreate",
     "PostUpdate",
     "PostList",
+    "PostSearchResult",
     "NewsletterSubscription",
     "Project",
     "ProjectCreate",
@@ -28,4 +30,5 @@ __all__ = [
     "ExperienceCreate",
     "ExperienceUpdate",
     "ExperienceList",
+    "IPRule",
 ]
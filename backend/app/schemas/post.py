@@ -50,3 +50,9 @@ class PostList(BaseModel):
     category: Optional[Category] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PostSearchResult(BaseModel):
+    post: PostList
+    rank: float  # Relevance, higher is better
+    snippet: str  # Best matching text, terms wrapped in <mark> tags
@@ -0,0 +1,20 @@
+import ipaddress
+from typing import Literal
+
+from pydantic import BaseModel, field_validator
+
+
+class IPRule(BaseModel):
+    """Schema for a rate limiter allow/deny rule"""
+
+    cidr: str
+    action: Literal["allow", "deny"]
+
+    @field_validator("cidr")
+    @classmethod
+    def validate_cidr(cls, v):
+        """Accept a network or single address and return it in CIDR form"""
+        try:
+            return str(ipaddress.ip_network(v.strip(), strict=False))
+        except ValueError:
+            raise ValueError("Must be an IPv4 or IPv6 network, e.g. 203.0.113.0/24")
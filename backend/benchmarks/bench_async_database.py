@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark API throughput while slow queries run, with sync and async sessions.
+
+Concurrent clients request GET /api/v1/posts/ on the real application while
+others hit a slow endpoint that runs a deliberately expensive query. The
+slow endpoint is mounted twice: once on the synchronous ``Session`` from
+``get_db``, as every handler used to be, and once on the ``AsyncSession``
+from ``get_async_db``. A synchronous query blocks the event loop, so every
+fast request queued behind it waits too; an async query yields while the
+database works.
+
+Requests go through httpx's in-process ASGI transport. By default the
+database is a temporary SQLite file and the slow query is a recursive CTE;
+set BENCH_DATABASE_URL to a PostgreSQL URL to use ``pg_sleep`` instead.
+
+Usage (from the backend directory):
+    python benchmarks/bench_async_database.py [--clients N] [--duration S]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite:///{_db_dir.name}/bench.db"
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ["TESTING"] = "true"  # No rate limiting
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, Depends  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import (  # noqa: E402
+    Base,
+    SessionLocal,
+    async_engine,
+    engine,
+    get_async_db,
+    get_db,
+)
+from app.main import app  # noqa: E402
+from app.models import Category, Post  # noqa: E402
+
+FAST_URL = "/api/v1/posts/"
+
+if engine.dialect.name == "postgresql":
+    SLOW_QUERY = text("SELECT pg_sleep(0.05)")
+else:
+    # Expensive work inside SQLite, which releases the GIL while it runs
+    SLOW_QUERY = text(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+        "WHERE i < 400000) SELECT count(*) FROM n"
+    )
+
+bench_router = APIRouter()
+
+
+@bench_router.get("/sync")
+async def slow_sync(db: Session = Depends(get_db)):
+    return {"result": db.execute(SLOW_QUERY).scalar()}
+
+
+@bench_router.get("/async")
+async def slow_async(db: AsyncSession = Depends(get_async_db)):
+    return {"result": (await db.execute(SLOW_QUERY)).scalar()}
+
+
+app.include_router(bench_router, prefix="/bench/slow")
+
+
+def seed_database(posts: int = 10) -> None:
+    """Create the schema and a handful of published posts."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    category = Category(name="Benchmarks", slug="benchmarks")
+    db.add(category)
+    db.flush()
+    for i in range(posts):
+        db.add(
+            Post(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                content="Benchmark content. " * 50,
+                excerpt="Benchmark excerpt",
+                category_id=category.id,
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+    db.commit()
+    db.close()
+
+
+async def run_client(client, url: str, deadline: float, latencies: list) -> None:
+    """Send requests back to back until the deadline."""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+
+
+async def measure(variant: str, clients: int, slow_clients: int, duration: float):
+    """Return fast and slow request latencies for one variant."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+        await client.get(FAST_URL)  # Warm up
+        fast, slow = [], []
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(run_client(client, FAST_URL, deadline, fast) for _ in range(clients)),
+            *(
+                run_client(client, f"/bench/slow/{variant}", deadline, slow)
+                for _ in range(slow_clients)
+            ),
+        )
+    await async_engine.dispose()
+    return fast, slow
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20, help="Fast clients")
+    parser.add_argument("--slow-clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds")
+    args = parser.parse_args()
+
+    seed_database()
+
+    print(
+        f"{args.clients} clients on {FAST_URL}, {args.slow_clients} on a slow "
+        f"query, {args.duration:.0f}s per variant ({engine.dialect.name})"
+    )
+    print(
+        f"{'session':<10}{'fast req/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'slow req/s':>12}"
+    )
+    for variant in ("sync", "async"):
+        fast, slow = asyncio.run(
+            measure(variant, args.clients, args.slow_clients, args.duration)
+        )
+        print(
+            f"{variant:<10}{len(fast) / args.duration:>12.1f}"
+            f"{percentile(fast, 0.50):>10.2f}{percentile(fast, 0.99):>10.2f}"
+            f"{len(slow) / args.duration:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
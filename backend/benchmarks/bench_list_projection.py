@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading full posts against the projected post list query.
+
+The post list serializes ``PostList``, which has no ``content``, yet it used
+to select whole ``Post`` entities, markdown bodies included. The list
+statement in ``posts.py`` now loads only the columns the schema reads. This
+measures, for one page of posts with large bodies:
+
+  bytes      data fetched from the database for the page's rows
+  us/call    time to execute the query and build the ORM objects
+
+Queries run on an in-memory SQLite database, so there is no network in the
+way; over a real connection the saved bytes also cost transfer time.
+
+Usage (from the backend directory):
+    python benchmarks/bench_list_projection.py [--body-kb N] [--posts N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from sqlalchemy import bindparam, create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.api.v1.endpoints.posts import _published_posts  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import Category, Post  # noqa: E402
+
+# The post list query loading whole entities, as before projection
+full_posts = (
+    select(Post)
+    .options(selectinload(Post.category))
+    .where(Post.published_at.isnot(None))
+    .order_by(Post.published_at.desc(), Post.id.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+
+
+def make_engine(posts: int, body_kb: int):
+    """Create an in-memory database holding posts with large bodies."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = Session(engine)
+    category = Category(name="Benchmarks", slug="benchmarks")
+    session.add(category)
+    session.flush()
+    for i in range(posts):
+        session.add(
+            Post(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                content="Benchmark paragraph. " * (body_kb * 1024 // 21),
+                excerpt="A short summary of the post.",
+                read_time="5 min read",
+                category_id=category.id,
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+    session.commit()
+    session.close()
+    return engine
+
+
+def fetched_bytes(engine, statement, params) -> int:
+    """Size of the raw column values a statement returns for its rows."""
+    with engine.connect() as connection:
+        rows = connection.execute(statement, params).all()
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+def per_call_us(fn, iterations: int) -> float:
+    for _ in range(min(20, iterations)):  # Warm up caches
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=50, help="Posts per page")
+    parser.add_argument("--body-kb", type=int, default=64, help="Size of each body")
+    args = parser.parse_args()
+
+    engine = make_engine(args.posts, args.body_kb)
+    session = Session(engine)
+    params = {"skip": 0, "limit": args.posts}
+
+    def load(statement):
+        def run():
+            session.scalars(statement, params).all()
+            session.expunge_all()
+
+        return run
+
+    results = {
+        name: (
+            fetched_bytes(engine, statement, params),
+            per_call_us(load(statement), args.iterations),
+        )
+        for name, statement in (
+            ("full", full_posts),
+            ("projected", _published_posts),
+        )
+    }
+
+    print(
+        f"Post list of {args.posts} posts with {args.body_kb}KB bodies, "
+        f"{args.iterations} iterations"
+    )
+    print(f"{'variant':<12}{'bytes':>12}{'us/call':>12}")
+    for name, (size, duration) in results.items():
+        print(f"{name:<12}{size:>12,}{duration:>12.1f}")
+    (full_bytes, full_us), (projected_bytes, projected_us) = results.values()
+    print(
+        f"projection fetches {1 - projected_bytes / full_bytes:.1%} fewer bytes "
+        f"and takes {1 - projected_us / full_us:.1%} less time"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rate limiter storage backends against each other.
+
+Measures the mean cost of a ``hit`` through each backend with the sliding
+window strategy, spread over a pool of client keys. The redis backend runs
+against the in-process stand-in server unless --redis-url is given, so its
+numbers include a local TCP round trip.
+
+Usage (from the backend directory):
+    python benchmarks/bench_rate_limit_backends.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.rate_limit_backends import (  # noqa: E402
+    MemoryBackend,
+    RedisBackend,
+    SharedMemoryBackend,
+)
+from app.core.rate_limit_strategies import Quota, SlidingWindowStrategy  # noqa: E402
+from tests.redis_standin import StandInRedisServer  # noqa: E402
+
+STRATEGY = SlidingWindowStrategy(
+    (
+        Quota("minute", 1000, 60),
+        Quota("hour", 60000, 3600),
+        Quota("day", 1440000, 86400),
+    )
+)
+CLIENTS = [f"198.51.100.{i}" for i in range(256)]
+
+
+def bench(backend, iterations: int) -> float:
+    """Return the mean microseconds per hit."""
+    now = time.time()
+    hit = backend.hit
+    start = time.perf_counter()
+    for i in range(iterations):
+        hit(CLIENTS[i % len(CLIENTS)], STRATEGY, now + i * 0.001)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--redis-url", help="Benchmark a real Redis server")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        shared = SharedMemoryBackend(os.path.join(directory, "table"), capacity=4096)
+        results = [
+            ("memory", bench(MemoryBackend(), args.iterations)),
+            ("shared_memory", bench(shared, args.iterations)),
+        ]
+        shared.close()
+
+    # Network round trips are much slower; fewer iterations keep runs short
+    redis_iterations = max(1, args.iterations // 10)
+    if args.redis_url:
+        results.append(
+            ("redis", bench(RedisBackend.from_url(args.redis_url), redis_iterations))
+        )
+    else:
+        with StandInRedisServer() as server:
+            backend = RedisBackend.from_url(server.url)
+            results.append(("redis (stand-in)", bench(backend, redis_iterations)))
+
+    print(f"{'backend':<20}{'us/hit':>10}")
+    for name, micros in results:
+        print(f"{name:<20}{micros:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark request latency through the rate limiting middleware variants.
+
+Sends sequential requests to GET /api/v1/posts/ on the real application and
+reports p50/p99 latency with no rate limiting, with ``rate_limit_middleware``
+under Starlette's BaseHTTPMiddleware, and with the pure ASGI
+``RateLimitMiddleware``. Requests go through httpx's in-process ASGI
+transport against a temporary SQLite database seeded with a few posts, so
+the numbers cover the application stack without network noise.
+
+Usage (from the backend directory):
+    python benchmarks/bench_rate_limit_middleware.py [--requests N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir.name}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+import httpx  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.rate_limiter import (  # noqa: E402
+    RateLimitMiddleware,
+    rate_limit_middleware,
+    rate_limiter,
+)
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Category, Post  # noqa: E402
+
+URL = "/api/v1/posts/"
+
+VARIANTS = {
+    "none": None,
+    "http middleware": Middleware(BaseHTTPMiddleware, dispatch=rate_limit_middleware),
+    "asgi middleware": Middleware(RateLimitMiddleware),
+}
+
+
+def seed_database(posts: int = 10) -> None:
+    """Create the schema and a handful of published posts."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    category = Category(name="Benchmarks", slug="benchmarks")
+    db.add(category)
+    db.flush()
+    for i in range(posts):
+        db.add(
+            Post(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                content="Benchmark content. " * 50,
+                excerpt="Benchmark excerpt",
+                category_id=category.id,
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+    db.commit()
+    db.close()
+
+
+def use_variant(middleware) -> None:
+    """Swap the rate limiting middleware in the app's stack."""
+    app.user_middleware = [
+        entry
+        for entry in app.user_middleware
+        if entry.cls not in (RateLimitMiddleware, BaseHTTPMiddleware)
+    ]
+    if middleware is not None:
+        # Outermost, as in app.main
+        app.user_middleware.insert(0, middleware)
+    app.middleware_stack = None  # Rebuilt on the next request
+
+
+async def measure(requests: int, warmup: int) -> list:
+    """Return the latency of each request in milliseconds."""
+    transport = httpx.ASGITransport(app=app, client=("203.0.113.5", 50000))
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+        for _ in range(warmup):
+            await client.get(URL)
+
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(URL)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+    return latencies
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Interleaved runs per variant"
+    )
+    args = parser.parse_args()
+
+    seed_database()
+
+    # Count every request, with limits high enough never to reject one
+    rate_limiter.test_mode = False
+    rate_limiter.configure(10**9, 10**9, 10**9)
+
+    results = {name: [] for name in VARIANTS}
+    for _ in range(args.rounds):
+        for name, middleware in VARIANTS.items():
+            use_variant(middleware)
+            results[name].extend(asyncio.run(measure(args.requests, args.warmup)))
+
+    print(f"{'variant':<18}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, latencies in results.items():
+        print(
+            f"{name:<18}{percentile(latencies, 0.50):>10.3f}"
+            f"{percentile(latencies, 0.99):>10.3f}"
+            f"{statistics.fmean(latencies):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark the rate limiting strategies against each other.
+
+Measures the cost of a single ``hit`` for each strategy, for a steady stream
+of allowed requests and for a client that is being rejected.
+
+Usage (from the backend directory):
+    python benchmarks/bench_rate_limit_strategies.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.rate_limit_strategies import STRATEGIES, Quota  # noqa: E402
+
+# Hour and day quotas are loose enough that a steady minute rate never trips them
+QUOTAS = (
+    Quota("minute", 1000, 60),
+    Quota("hour", 60000, 3600),
+    Quota("day", 1440000, 86400),
+)
+
+
+def bench(strategy_name: str, iterations: int, limited: bool) -> float:
+    """Return the mean nanoseconds per hit."""
+    strategy = STRATEGIES[strategy_name](QUOTAS)
+    state = strategy.new_state()
+    now = time.time()
+
+    if limited:
+        # Exhaust the minute quota so every measured hit is rejected
+        while strategy.hit(state, now) < 0:
+            pass
+        step = 0.0
+    else:
+        # Space requests so the minute quota is never exceeded
+        step = 60.0 / QUOTAS[0].limit
+
+    hit = strategy.hit
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        hit(state, now + i * step)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'strategy':<16}{'allowed ns/hit':>16}{'limited ns/hit':>16}")
+    for name in STRATEGIES:
+        allowed = bench(name, args.iterations, limited=False)
+        limited = bench(name, args.iterations, limited=True)
+        print(f"{name:<16}{allowed:>16.0f}{limited:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
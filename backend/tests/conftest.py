@@ -5,17 +5,22 @@ Pytest configuration and fixtures for the Portfolio Blog API tests
 import asyncio
 import os
 import sys
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from typing import AsyncGenerator, Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 # Set testing environment variable
 os.environ["TESTING"] = "true"
+# Query counts are asserted on, so count them as in development
+os.environ.setdefault("QUERY_STATS_ENABLED", "true")
 
 
 # Register custom pytest marks
@@ -33,8 +38,9 @@ def pytest_configure(config):
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from app.config import settings
+from app.core.query_stats import get_request_query_stats
 from app.core.security import create_access_token, get_password_hash
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
 from app.main import app
 from app.models import Category, Experience, Post, Project, User
 
@@ -51,6 +57,15 @@ test_engine = create_engine(
 # Create test session factory
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Async engine on the same database file. Each TestClient runs its own event
+# loop, so connections are not pooled between them
+test_async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db", poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    test_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -89,7 +104,12 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
         finally:
             pass  # Don't close the session here as it's managed by the fixture
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -240,6 +260,41 @@ def invalid_auth_headers() -> dict:
     return {"Authorization": "Bearer invalid_token"}
 
 
+@pytest.fixture
+def assert_max_queries():
+    """
+    Assert that requests made inside a block issue at most a number of
+    SQL statements.
+
+    Only statements run while serving a request are counted, as recorded by
+    the query stats middleware; fixture setup and background tasks are not.
+
+    Usage:
+        with assert_max_queries(2) as statements:
+            client.get("/api/v1/posts/")
+    """
+
+    @contextmanager
+    def check(limit: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if get_request_query_stats() is not None:
+                statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        assert len(statements) <= limit, (
+            f"{len(statements)} SQL statements, expected at most {limit}:\n"
+            + "\n".join(statements)
+        )
+
+    return check
+
+
 # Test data fixtures
 @pytest.fixture
 def sample_post_data() -> dict:
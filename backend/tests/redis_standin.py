@@ -0,0 +1,498 @@
+"""
+In-process stand-in for a Redis server.
+
+Speaks enough of the Redis protocol (RESP2) for the rate limiter's Redis
+backend: strings with expiry, key scanning, WATCH/MULTI/EXEC transactions
+and Lua scripts. Scripts run on Lua 5.1, as in Redis, through ``lupa``,
+with the ``redis.call`` and ``struct`` libraries they use.
+It runs in a background thread, so the tests and benchmarks can exercise
+the shared backend, including several limiter instances acting as separate
+workers, without an external server.
+
+Usage:
+    with StandInRedisServer() as server:
+        backend = RedisBackend.from_url(server.url)
+"""
+
+import fnmatch
+import hashlib
+import logging
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lupa import LuaError, lua51
+
+logger = logging.getLogger(__name__)
+
+
+class _Status(str):
+    """Simple string reply, such as +OK."""
+
+
+class _Error(Exception):
+    """Error reply, such as -ERR unknown command."""
+
+
+class _NullArray:
+    """Null array reply, returned by EXEC when a transaction is aborted."""
+
+
+OK = _Status("OK")
+QUEUED = _Status("QUEUED")
+
+
+def _encode(reply) -> bytes:
+    """Encode a Python value as a RESP2 reply."""
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, _NullArray):
+        return b"*-1\r\n"
+    if isinstance(reply, _Status):
+        return b"+" + reply.encode() + b"\r\n"
+    if isinstance(reply, _Error):
+        return b"-" + str(reply).encode() + b"\r\n"
+    if isinstance(reply, bool):
+        reply = int(reply)
+    if isinstance(reply, int):
+        return b":" + str(reply).encode() + b"\r\n"
+    if isinstance(reply, str):
+        reply = reply.encode()
+    if isinstance(reply, bytes):
+        return b"$" + str(len(reply)).encode() + b"\r\n" + reply + b"\r\n"
+    if isinstance(reply, (list, tuple)):
+        return b"*" + str(len(reply)).encode() + b"\r\n" + b"".join(map(_encode, reply))
+    raise TypeError(f"Cannot encode reply of type {type(reply).__name__}")
+
+
+def _struct_pack(format: bytes, *values) -> bytes:
+    return struct.pack(format.decode(), *values)
+
+
+def _struct_unpack(format: bytes, data: bytes, position: int = 1) -> tuple:
+    # Like Redis' struct.unpack, also return the position after the values
+    values = struct.unpack_from(format.decode(), data, position - 1)
+    return (*values, position + struct.calcsize(format.decode()))
+
+
+class _Store:
+    """Key space shared by every connection, guarded by a single lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        # Bumped on every write so WATCH can detect concurrent changes
+        self.versions: Dict[bytes, int] = {}
+        # Compiled scripts by SHA1, all run by one interpreter under the lock
+        self.lua = lua51.LuaRuntime(encoding=None, unpack_returned_tuples=True)
+        self.lua.globals().struct = self.lua.table_from(
+            {b"pack": _struct_pack, b"unpack": _struct_unpack}
+        )
+        self.scripts: Dict[bytes, Any] = {}
+
+    def load_script(self, script: bytes) -> bytes:
+        sha = hashlib.sha1(script).hexdigest().encode()
+        if sha not in self.scripts:
+            try:
+                self.scripts[sha] = self.lua.eval(b"function()\n" + script + b"\nend")
+            except LuaError as e:
+                raise _Error(f"ERR Error compiling script: {e}")
+        return sha
+
+    def _touch(self, key: bytes) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            self._touch(key)
+            return None
+        return value
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self.data[key] = (value, expires_at)
+        self._touch(key)
+
+    def delete(self, key: bytes) -> bool:
+        existed = self.get(key) is not None
+        if existed:
+            del self.data[key]
+            self._touch(key)
+        return existed
+
+    def keys(self, pattern: bytes = b"*") -> List[bytes]:
+        matches = []
+        for key in list(self.data):
+            if self.get(key) is not None and fnmatch.fnmatchcase(
+                key.decode(), pattern.decode()
+            ):
+                matches.append(key)
+        return sorted(matches)
+
+
+class _Connection:
+    """Per-connection transaction state and command dispatch."""
+
+    def __init__(self, store: _Store):
+        self.store = store
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+    def handle(self, args: List[bytes]):
+        command = args[0].upper().decode()
+
+        if self.queued is not None and command not in (
+            "EXEC",
+            "DISCARD",
+            "MULTI",
+            "WATCH",
+        ):
+            self.queued.append(args)
+            return QUEUED
+
+        handler = getattr(self, "cmd_" + command.lower(), None)
+        if handler is None:
+            return _Error(f"ERR unknown command '{command}'")
+
+        with self.store.lock:
+            try:
+                return handler(*args[1:])
+            except TypeError:
+                return _Error(
+                    f"ERR wrong number of arguments for '{command.lower()}' command"
+                )
+            except _Error as e:
+                return e
+
+    # Connection commands
+    def cmd_ping(self, message: Optional[bytes] = None):
+        return _Status("PONG") if message is None else message
+
+    def cmd_echo(self, message: bytes):
+        return message
+
+    def cmd_select(self, index: bytes):
+        return OK
+
+    def cmd_client(self, *args):
+        return OK
+
+    # String commands
+    def cmd_get(self, key: bytes):
+        return self.store.get(key)
+
+    def cmd_mget(self, *keys: bytes):
+        return [self.store.get(key) for key in keys]
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes):
+        ttl = None
+        only_if_missing = only_if_exists = False
+        options = [option.upper() for option in options]
+        index = 0
+        while index < len(options):
+            option = options[index]
+            if option in (b"EX", b"PX"):
+                amount = float(options[index + 1])
+                ttl = amount if option == b"EX" else amount / 1000
+                index += 2
+                continue
+            if option == b"NX":
+                only_if_missing = True
+            elif option == b"XX":
+                only_if_exists = True
+            else:
+                raise _Error("ERR syntax error")
+            index += 1
+
+        exists = self.store.get(key) is not None
+        if (only_if_missing and exists) or (only_if_exists and not exists):
+            return None
+        self.store.set(key, value, ttl)
+        return OK
+
+    def cmd_incrby(self, key: bytes, amount: bytes):
+        current = self.store.get(key)
+        try:
+            value = int(current or 0) + int(amount)
+        except ValueError:
+            raise _Error("ERR value is not an integer or out of range")
+        _, expires_at = self.store.data.get(key, (None, None))
+        ttl = expires_at - time.monotonic() if expires_at is not None else None
+        self.store.set(key, str(value).encode(), ttl)
+        return value
+
+    def cmd_incr(self, key: bytes):
+        return self.cmd_incrby(key, b"1")
+
+    # Key space commands
+    def cmd_del(self, *keys: bytes):
+        return sum(self.store.delete(key) for key in keys)
+
+    def cmd_exists(self, *keys: bytes):
+        return sum(self.store.get(key) is not None for key in keys)
+
+    def cmd_expire(self, key: bytes, seconds: bytes):
+        value = self.store.get(key)
+        if value is None:
+            return 0
+        self.store.set(key, value, float(seconds))
+        return 1
+
+    def cmd_ttl(self, key: bytes):
+        if self.store.get(key) is None:
+            return -2
+        _, expires_at = self.store.data[key]
+        if expires_at is None:
+            return -1
+        return int(round(expires_at - time.monotonic()))
+
+    def cmd_keys(self, pattern: bytes):
+        return self.store.keys(pattern)
+
+    def cmd_scan(self, cursor: bytes, *options: bytes):
+        pattern, count = b"*", 10
+        options = list(options)
+        for index in range(0, len(options) - 1, 2):
+            if options[index].upper() == b"MATCH":
+                pattern = options[index + 1]
+            elif options[index].upper() == b"COUNT":
+                count = int(options[index + 1])
+
+        keys = self.store.keys(pattern)
+        start = int(cursor)
+        end = start + count
+        next_cursor = end if end < len(keys) else 0
+        return [str(next_cursor).encode(), keys[start:end]]
+
+    def cmd_dbsize(self):
+        return len(self.store.keys())
+
+    def cmd_flushdb(self, *options: bytes):
+        for key in list(self.store.data):
+            self.store.delete(key)
+        return OK
+
+    cmd_flushall = cmd_flushdb
+
+    # Scripting
+    def cmd_eval(self, script: bytes, numkeys: bytes, *args: bytes):
+        return self._run(self.store.load_script(script), numkeys, args)
+
+    def cmd_evalsha(self, sha: bytes, numkeys: bytes, *args: bytes):
+        return self._run(sha.lower(), numkeys, args)
+
+    def cmd_script(self, subcommand: bytes, *args: bytes):
+        subcommand = subcommand.upper()
+        if subcommand == b"LOAD":
+            return self.store.load_script(*args)
+        if subcommand == b"EXISTS":
+            return [int(sha.lower() in self.store.scripts) for sha in args]
+        if subcommand == b"FLUSH":
+            self.store.scripts.clear()
+            return OK
+        raise _Error(f"ERR unknown subcommand '{subcommand.decode()}'")
+
+    def _run(self, sha: bytes, numkeys: bytes, args: Tuple[bytes, ...]):
+        function = self.store.scripts.get(sha)
+        if function is None:
+            raise _Error("NOSCRIPT No matching script. Please use EVAL.")
+        keys, argv = args[: int(numkeys)], args[int(numkeys) :]
+
+        lua = self.store.lua
+        lua_globals = lua.globals()
+        lua_globals.KEYS = lua.table(*keys)
+        lua_globals.ARGV = lua.table(*argv)
+        lua_globals.redis = lua.table_from({b"call": self._call_from_lua})
+        try:
+            return self._from_lua(function())
+        except LuaError as e:
+            raise _Error(f"ERR Error running script: {e}")
+
+    def _call_from_lua(self, name: bytes, *args):
+        handler: Optional[Callable] = getattr(
+            self, "cmd_" + name.decode().lower(), None
+        )
+        if handler is None or name.upper() in (b"EVAL", b"EVALSHA", b"MULTI"):
+            raise _Error(f"ERR command '{name.decode()}' not allowed from scripts")
+        # Lua numbers arrive as floats; Redis formats integral ones as integers
+        args = [
+            (
+                arg
+                if isinstance(arg, bytes)
+                else (
+                    str(int(arg)).encode()
+                    if float(arg).is_integer()
+                    else repr(arg).encode()
+                )
+            )
+            for arg in args
+        ]
+        return self._to_lua(handler(*args))
+
+    def _to_lua(self, reply):
+        if reply is None or isinstance(reply, _NullArray):
+            return False
+        if isinstance(reply, _Status):
+            return self.store.lua.table_from({b"ok": reply.encode()})
+        if isinstance(reply, list):
+            return self.store.lua.table(*map(self._to_lua, reply))
+        return reply
+
+    def _from_lua(self, value):
+        if value is None or value is False:
+            return None
+        if value is True:
+            return 1
+        if isinstance(value, (int, float)):
+            # Redis truncates Lua numbers to integers
+            return int(value)
+        if isinstance(value, bytes):
+            return value
+        if value[b"err"] is not None:
+            return _Error(value[b"err"].decode())
+        if value[b"ok"] is not None:
+            return _Status(value[b"ok"].decode())
+        items = []
+        # Arrays end at the first nil, as in Redis
+        while value[len(items) + 1] is not None:
+            items.append(self._from_lua(value[len(items) + 1]))
+        return items
+
+    # Transactions
+    def cmd_watch(self, *keys: bytes):
+        if self.queued is not None:
+            raise _Error("ERR WATCH inside MULTI is not allowed")
+        for key in keys:
+            self.watched[key] = self.store.versions.get(key, 0)
+        return OK
+
+    def cmd_unwatch(self):
+        self.watched.clear()
+        return OK
+
+    def cmd_multi(self):
+        if self.queued is not None:
+            raise _Error("ERR MULTI calls can not be nested")
+        self.queued = []
+        return OK
+
+    def cmd_discard(self):
+        if self.queued is None:
+            raise _Error("ERR DISCARD without MULTI")
+        self.queued = None
+        self.watched.clear()
+        return OK
+
+    def cmd_exec(self):
+        if self.queued is None:
+            raise _Error("ERR EXEC without MULTI")
+        queued, self.queued = self.queued, None
+
+        # Expired watched keys count as changed, so check them first
+        for key in self.watched:
+            self.store.get(key)
+        changed = any(
+            self.store.versions.get(key, 0) != version
+            for key, version in self.watched.items()
+        )
+        self.watched.clear()
+        if changed:
+            return _NullArray()
+
+        replies = []
+        for args in queued:
+            handler = getattr(self, "cmd_" + args[0].decode().lower(), None)
+            if handler is None:
+                replies.append(_Error(f"ERR unknown command '{args[0].decode()}'"))
+                continue
+            try:
+                replies.append(handler(*args[1:]))
+            except _Error as e:
+                replies.append(e)
+        return replies
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads RESP arrays from a client and writes back replies."""
+
+    # Replies to pipelined commands are written one at a time; without
+    # TCP_NODELAY they stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet
+            return line.split() or self._read_command()
+
+        args = []
+        for _ in range(int(line[1:])):
+            header = self.rfile.readline()
+            length = int(header[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        connection = _Connection(self.server.store)
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            if args[0].upper() == b"QUIT":
+                self.wfile.write(_encode(OK))
+                return
+            self.wfile.write(_encode(connection.handle(args)))
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Redis' default tcp-backlog, so bursts of clients can connect at once
+    request_queue_size = 511
+
+
+class StandInRedisServer:
+    """Threaded TCP server answering a subset of the Redis protocol."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = _ThreadingServer((host, port), _RequestHandler)
+        self._server.store = _Store()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "StandInRedisServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="redis-standin", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Stand-in Redis server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StandInRedisServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,147 @@
+"""
+Unit tests for client address aggregation and subnet limits
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.core.client_keys import ClientKeyMapper, ClientKeys
+from app.core.rate_limiter import RateLimiter
+
+NOW = 1_700_006_400.0
+
+
+class TestClientKeyMapper:
+    """Test cases for mapping addresses to client and subnet keys."""
+
+    def test_ipv4_defaults(self):
+        """Test that IPv4 clients are single addresses in a /24."""
+        mapper = ClientKeyMapper()
+        assert mapper.keys("203.0.113.7") == ClientKeys("203.0.113.7", "203.0.113.0/24")
+
+    def test_ipv6_defaults(self):
+        """Test that IPv6 clients are /64s in a /48."""
+        mapper = ClientKeyMapper()
+        assert mapper.keys("2001:db8:1:2:3:4:5:6") == ClientKeys(
+            "2001:db8:1:2::/64", "2001:db8:1::/48"
+        )
+
+    def test_rotating_ipv6_addresses_share_a_key(self):
+        """Test that every address in a /64 maps to the same client."""
+        mapper = ClientKeyMapper()
+        keys = {mapper.keys(f"2001:db8::{i:x}").client for i in range(1000)}
+        assert keys == {"2001:db8::/64"}
+
+    def test_custom_prefixes(self):
+        """Test aggregating to configurable prefix lengths."""
+        mapper = ClientKeyMapper(ipv4_prefix=24, ipv4_subnet_prefix=16, ipv6_prefix=48)
+        assert mapper.keys("198.51.100.9") == ClientKeys(
+            "198.51.100.0/24", "198.51.0.0/16"
+        )
+        assert mapper.keys("2001:db8:1:2::1").client == "2001:db8:1::/48"
+
+    def test_mapped_addresses(self):
+        """Test that IPv4-mapped identifiers count as the IPv4 address."""
+        mapper = ClientKeyMapper()
+        assert mapper.keys("::ffff:203.0.113.7").client == "203.0.113.7"
+
+    def test_hop_lists_are_not_addresses(self):
+        """Test that a raw forwarding header is never read as its first hop."""
+        keys = ClientKeyMapper().keys("203.0.113.7, 10.0.0.1")
+        assert keys == ClientKeys("203.0.113.7, 10.0.0.1", None)
+
+    def test_non_addresses_have_no_subnet(self):
+        """Test that identifiers which are not addresses pass through."""
+        assert ClientKeyMapper().keys("unknown") == ClientKeys("unknown", None)
+
+    def test_invalid_prefixes_rejected(self):
+        """Test that subnets must contain the client networks."""
+        with pytest.raises(ValueError):
+            ClientKeyMapper(ipv4_prefix=16, ipv4_subnet_prefix=24)
+        with pytest.raises(ValueError):
+            ClientKeyMapper(ipv6_prefix=129)
+
+
+class TestSubnetLimits:
+    """Test cases for hierarchical client and subnet limits."""
+
+    def test_rotating_ipv6_client_is_limited(self):
+        """Test that new addresses in the same /64 get no fresh quota."""
+        limiter = RateLimiter(requests_per_minute=3)
+
+        with patch("time.time", return_value=NOW):
+            decisions = [limiter.check(f"2001:db8::{i}") for i in range(1, 5)]
+
+        assert [decision.limited for decision in decisions] == [False] * 3 + [True]
+        assert limiter.backend.client_count() == 1
+
+    def test_subnet_limit_applies_across_clients(self):
+        """Test that neighbouring clients share the subnet quota."""
+        limiter = RateLimiter(requests_per_minute=3, subnet_limits=(5, 100, 1000))
+
+        with patch("time.time", return_value=NOW):
+            decisions = [limiter.check(f"203.0.113.{i}") for i in range(1, 8)]
+            other = limiter.check("198.51.100.1")
+
+        assert [decision.limited for decision in decisions] == [False] * 5 + [True] * 2
+        assert "from your network" in decisions[-1].reason
+        assert decisions[-1].headers()["X-RateLimit-Limit-Minute"] == "5"
+        assert not other.limited
+
+    def test_subnet_rejection_does_not_use_client_quota(self):
+        """Test that a request rejected by the subnet is not counted."""
+        limiter = RateLimiter(requests_per_minute=3, subnet_limits=(1, 100, 1000))
+
+        with patch("time.time", return_value=NOW):
+            limiter.check("203.0.113.1")
+            assert limiter.check("203.0.113.2").limited
+
+        assert limiter.get_client_stats("203.0.113.2")["total_requests"] == 0
+
+    def test_headers_report_tightest_level(self):
+        """Test that headers show whichever level has less remaining."""
+        limiter = RateLimiter(
+            requests_per_minute=10,
+            requests_per_hour=10,
+            requests_per_day=10,
+            subnet_limits=(20, 4, 1000),
+        )
+
+        with patch("time.time", return_value=NOW):
+            headers = limiter.check("203.0.113.1").headers()
+
+        assert headers["X-RateLimit-Limit-Minute"] == "10"
+        assert headers["X-RateLimit-Remaining-Minute"] == "9"
+        assert headers["X-RateLimit-Limit-Hour"] == "4"
+        assert headers["X-RateLimit-Remaining-Hour"] == "3"
+        assert headers["X-RateLimit-Limit-Day"] == "10"
+
+    def test_cost_is_capped_at_smallest_subnet_quota(self):
+        """Test that a cost above a subnet limit cannot block forever."""
+        limiter = RateLimiter(requests_per_minute=10, subnet_limits=(4, 100, 1000))
+        assert limiter.max_cost == 4
+
+    def test_stats_use_aggregated_key(self):
+        """Test that admin lookups find a client by any of its addresses."""
+        limiter = RateLimiter()
+        with patch("time.time", return_value=NOW):
+            limiter.check("2001:db8::1")
+            stats = limiter.get_client_stats("2001:db8::2")
+
+        assert stats["client_id"] == "2001:db8::/64"
+        assert stats["total_requests"] == 1
+
+        limiter.reset_client("2001:db8::3")
+        assert limiter.get_client_stats("2001:db8::1")["total_requests"] == 0
+
+    def test_global_stats_report_subnets(self):
+        """Test that the aggregation settings are reported."""
+        stats = RateLimiter(subnet_limits=(5, 50, 500)).get_global_stats()
+        assert stats["client_prefixes"]["ipv6"] == {"client": 64, "subnet": 48}
+        assert stats["subnet_limits"] == {
+            "per_minute": 5,
+            "per_hour": 50,
+            "per_day": 500,
+        }
+        assert RateLimiter().get_global_stats()["subnet_limits"] is None
@@ -0,0 +1,109 @@
+"""
+Unit tests for database configuration
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app.database import (
+    MIGRATION_LOCK_ID,
+    get_async_connect_args,
+    get_async_database_url,
+    get_current_revisions,
+    migration_lock,
+    run_migrations,
+)
+
+
+class TestAsyncDatabaseUrl:
+    """Test cases for deriving the async driver URL."""
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("sqlite:///./test.db", "sqlite+aiosqlite:///./test.db"),
+            (
+                "postgresql://user@db:5432/blog",
+                "postgresql+asyncpg://user@db:5432/blog",
+            ),
+            ("postgresql+psycopg2://user@db/blog", "postgresql+asyncpg://user@db/blog"),
+            ("postgres://user@db/blog", "postgresql+asyncpg://user@db/blog"),
+        ],
+    )
+    def test_swaps_driver(self, url, expected):
+        """Test that sync drivers are replaced by their async counterparts."""
+        assert get_async_database_url(url).render_as_string() == expected
+
+    def test_translates_sslmode(self):
+        """Test that libpq's sslmode is passed to asyncpg as ssl."""
+        url = get_async_database_url("postgresql://user@db/blog?sslmode=require")
+        assert url.query == {"ssl": "require"}
+
+    def test_prepared_statement_cache(self):
+        """Test that asyncpg keeps prepared statements and SQLite needs nothing."""
+        url = get_async_database_url("postgresql://user@db/blog")
+        assert get_async_connect_args(url) == {"prepared_statement_cache_size": 500}
+        assert get_async_connect_args(get_async_database_url("sqlite:///./x.db")) == {}
+
+    def test_unsupported_backend(self):
+        """Test that databases without an async driver are rejected."""
+        with pytest.raises(ValueError):
+            get_async_database_url("mysql://user@db/blog")
+
+
+class TestMigrations:
+    """Test cases for running migrations in-process."""
+
+    @pytest.fixture
+    def migration_engine(self, tmp_path):
+        """Point the application engine at an empty database file."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+        with patch("app.database.engine", engine):
+            yield engine
+        engine.dispose()
+
+    def test_upgrades_empty_database(self, migration_engine):
+        """Test that a new database is migrated to the head revision."""
+        assert run_migrations()
+
+        tables = set(inspect(migration_engine).get_table_names())
+        assert {"users", "posts", "categories", "alembic_version"} <= tables
+        with migration_engine.connect() as connection:
+            assert get_current_revisions(connection)
+
+    def test_current_schema_skips_upgrade(self, migration_engine):
+        """Test that nothing runs when the schema is already at head."""
+        assert run_migrations()
+
+        with patch("app.database.command.upgrade") as upgrade:
+            assert run_migrations()
+        upgrade.assert_not_called()
+
+    def test_missing_version_table(self, migration_engine):
+        """Test that an unmigrated database has no revisions."""
+        with migration_engine.connect() as connection:
+            assert get_current_revisions(connection) == set()
+
+    def test_advisory_lock_on_postgresql(self):
+        """Test that PostgreSQL migrations hold and release the lock."""
+        connection = MagicMock()
+        connection.dialect.name = "postgresql"
+
+        with migration_lock(connection):
+            statements = [str(call.args[0]) for call in connection.execute.mock_calls]
+            assert statements == ["SELECT pg_advisory_lock(:key)"]
+
+        statements = [str(call.args[0]) for call in connection.execute.mock_calls]
+        assert statements[-1] == "SELECT pg_advisory_unlock(:key)"
+        assert connection.execute.mock_calls[-1].args[1] == {"key": MIGRATION_LOCK_ID}
+
+    def test_no_lock_on_other_databases(self):
+        """Test that SQLite migrates without an advisory lock."""
+        connection = MagicMock()
+        connection.dialect.name = "sqlite"
+
+        with migration_lock(connection):
+            pass
+        connection.execute.assert_not_called()
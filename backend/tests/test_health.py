@@ -0,0 +1,159 @@
+"""
+Unit tests for the cached health checks and the probe endpoints
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.health import HealthChecker
+
+
+async def healthy():
+    return None
+
+
+async def failing():
+    raise ConnectionError("connection refused")
+
+
+async def hanging():
+    await asyncio.sleep(10)
+
+
+def make_checker(**checks):
+    """Create a checker with the given checks, refreshed once."""
+    checker = HealthChecker(interval=5.0, timeout=0.05)
+    for name, check in checks.items():
+        checker.register(name, check)
+    asyncio.run(checker.refresh())
+    return checker
+
+
+class TestHealthChecker:
+    """Test cases for running and caching dependency checks."""
+
+    def test_starting_before_first_refresh(self):
+        """Test that nothing is ready until the checks have run."""
+        checker = HealthChecker()
+        assert not checker.is_ready()
+        assert checker.status() == {
+            "status": "starting",
+            "checked_at": None,
+            "checks": {},
+        }
+
+    def test_all_healthy(self):
+        """Test that passing checks make the service ready."""
+        checker = make_checker(database=healthy, cache=healthy)
+        status = checker.status()
+
+        assert checker.is_ready()
+        assert status["status"] == "ready"
+        assert status["checked_at"] is not None
+        assert status["checks"]["database"]["healthy"]
+        assert status["checks"]["database"]["error"] is None
+
+    def test_failure_and_timeout(self):
+        """Test that errors and slow checks are reported as failures."""
+        checker = make_checker(database=failing, cache=hanging, other=healthy)
+        checks = checker.status()["checks"]
+
+        assert checker.status()["status"] == "unready"
+        assert checks["database"]["error"] == "connection refused"
+        assert checks["cache"]["error"].startswith("Timed out")
+        assert checks["other"]["healthy"]
+
+    def test_status_does_not_run_checks(self):
+        """Test that reading the status only returns the cached result."""
+        calls = []
+
+        async def counted():
+            calls.append(1)
+
+        checker = make_checker(database=counted)
+        for _ in range(100):
+            checker.status()
+            checker.is_ready()
+        assert len(calls) == 1
+
+    def test_stale_results_are_not_ready(self):
+        """Test that a result older than a few intervals is not trusted."""
+        checker = make_checker(database=healthy)
+        with patch(
+            "app.core.health.time.monotonic",
+            return_value=checker._checked_at + checker.interval * 10,
+        ):
+            assert not checker.is_ready()
+            assert checker.status()["status"] == "unready"
+
+    def test_run_refreshes_in_background(self):
+        """Test that the background task picks up a recovery."""
+        state = {"up": False}
+
+        async def flaky():
+            if not state["up"]:
+                raise ConnectionError("down")
+
+        checker = HealthChecker(interval=0.01, timeout=0.05)
+        checker.register("database", flaky)
+
+        async def scenario():
+            task = asyncio.create_task(checker.run())
+            await asyncio.sleep(0.03)
+            assert not checker.is_ready()
+            state["up"] = True
+            await asyncio.sleep(0.03)
+            task.cancel()
+
+        asyncio.run(scenario())
+        assert checker.is_ready()
+
+    def test_configure_rejects_non_positive_values(self):
+        """Test that the interval and timeout must be positive."""
+        with pytest.raises(ValueError):
+            HealthChecker().configure(0, 1)
+        with pytest.raises(ValueError):
+            HealthChecker().configure(1, -1)
+
+
+class TestProbeEndpoints:
+    """Test cases for /livez, /readyz and /health."""
+
+    def test_livez(self, client):
+        """Test that liveness never depends on other services."""
+        with patch("app.main.health_checker", make_checker(database=failing)):
+            response = client.get("/livez")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    def test_readyz_ready(self, client):
+        """Test that a healthy service reports ready."""
+        with patch("app.main.health_checker", make_checker(database=healthy)):
+            response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["checks"]["database"]["healthy"]
+
+    def test_readyz_unready(self, client):
+        """Test that a failed dependency takes the service out of rotation."""
+        with patch("app.main.health_checker", make_checker(database=failing)):
+            response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unready"
+
+    def test_health_uses_cached_status(self, client):
+        """Test that /health reports the cached database status."""
+        with patch("app.main.health_checker", make_checker(database=failing)):
+            response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["database"] == "unhealthy"
+
+    def test_probes_are_not_rate_limited(self):
+        """Test that probes cost nothing against rate limits."""
+        from app.core.rate_limit_policies import DEFAULT_ROUTE_POLICIES, RouteTable
+
+        table = RouteTable(DEFAULT_ROUTE_POLICIES)
+        assert table.cost("GET", "/livez") == 0
+        assert table.cost("GET", "/readyz") == 0
@@ -0,0 +1,213 @@
+"""
+Unit tests for heavy-hitter tracking
+"""
+
+import random
+from collections import Counter
+from unittest.mock import patch
+
+import pytest
+
+from app.core.heavy_hitters import HeavyHitterTracker, SpaceSaving
+from app.core.rate_limiter import RateLimiter
+
+# Midnight UTC, so every window starts here
+WINDOW_ORIGIN = 1_700_006_400.0
+
+
+class TestSpaceSaving:
+    """Test cases for the Space-Saving summary."""
+
+    def test_exact_counts_under_capacity(self):
+        """Test that counts are exact while every key has a counter."""
+        summary = SpaceSaving(10)
+        for key in "aaabbc":
+            summary.add(key)
+
+        assert summary.top(10) == [("a", 3, 0), ("b", 2, 0), ("c", 1, 0)]
+        assert summary.total == 6
+        assert len(summary) == 3
+
+    def test_top_limits_results(self):
+        """Test that only the requested number of keys is returned."""
+        summary = SpaceSaving(10)
+        for key in "aaabbc":
+            summary.add(key)
+
+        assert [key for key, _, _ in summary.top(2)] == ["a", "b"]
+
+    def test_replaces_smallest_counter_when_full(self):
+        """Test that a new key takes over the smallest counter."""
+        summary = SpaceSaving(2)
+        for key in "aaab":
+            summary.add(key)
+        summary.add("c")
+
+        assert len(summary) == 2
+        assert summary.top(2) == [("a", 3, 0), ("c", 2, 1)]
+
+    def test_memory_is_bounded(self):
+        """Test that many distinct keys never exceed the capacity."""
+        summary = SpaceSaving(50)
+        for i in range(10000):
+            summary.add(f"10.0.{i // 256}.{i % 256}")
+
+        assert len(summary) == 50
+        assert summary.total == 10000
+
+    def test_finds_heavy_hitters_in_noise(self):
+        """Test that frequent keys are found with bounded overestimates."""
+        rng = random.Random(42)
+        stream = ["attacker-1"] * 3000 + ["attacker-2"] * 2000
+        stream += [f"client-{rng.randrange(5000)}" for _ in range(20000)]
+        rng.shuffle(stream)
+
+        summary = SpaceSaving(100)
+        for key in stream:
+            summary.add(key)
+
+        exact = Counter(stream)
+        top = summary.top(2)
+        assert [key for key, _, _ in top] == ["attacker-1", "attacker-2"]
+        for key, count, error in top:
+            assert count - error <= exact[key] <= count
+        # Space-Saving never underestimates and errs by at most total / capacity
+        for key, count, error in summary.items():
+            assert exact[key] <= count <= exact[key] + len(stream) / 100
+
+    def test_items_are_sorted(self):
+        """Test that items come out from the largest count down."""
+        summary = SpaceSaving(20)
+        rng = random.Random(1)
+        for _ in range(500):
+            summary.add(str(rng.randrange(40)))
+
+        counts = [count for _, count, _ in summary.items()]
+        assert counts == sorted(counts, reverse=True)
+
+    def test_clear(self):
+        """Test that clearing empties the summary."""
+        summary = SpaceSaving(5)
+        summary.add("a")
+        summary.clear()
+
+        assert summary.top(5) == []
+        assert summary.total == 0
+
+    def test_invalid_capacity(self):
+        """Test that a summary needs at least one counter."""
+        with pytest.raises(ValueError):
+            SpaceSaving(0)
+
+
+class TestHeavyHitterTracker:
+    """Test cases for windowed heavy-hitter tracking."""
+
+    def test_top_requesters_and_violators(self):
+        """Test that requests and violations are ranked separately."""
+        tracker = HeavyHitterTracker(capacity=10)
+        for _ in range(5):
+            tracker.record("busy", WINDOW_ORIGIN + 1, limited=False)
+        for _ in range(3):
+            tracker.record("abuser", WINDOW_ORIGIN + 1, limited=True)
+
+        top = tracker.top("1m", 10, WINDOW_ORIGIN + 1)
+        assert top["window"] == "1m"
+        assert [entry["client_id"] for entry in top["requesters"]] == [
+            "busy",
+            "abuser",
+        ]
+        assert top["violators"] == [{"client_id": "abuser", "count": 3, "error": 0}]
+
+    def test_windows_expire_independently(self):
+        """Test that old activity leaves short windows but not long ones."""
+        tracker = HeavyHitterTracker(capacity=10)
+        for _ in range(4):
+            tracker.record("client", WINDOW_ORIGIN, limited=False)
+
+        later = WINDOW_ORIGIN + 600
+        assert tracker.top("1m", 10, later)["requesters"] == []
+        assert tracker.top("1h", 10, later)["requesters"][0]["count"] == 4
+        assert tracker.top("1d", 10, later)["requesters"][0]["count"] == 4
+
+    def test_previous_window_is_weighted(self):
+        """Test the sliding estimate across a window boundary."""
+        tracker = HeavyHitterTracker(capacity=10)
+        for _ in range(10):
+            tracker.record("client", WINDOW_ORIGIN + 30, limited=False)
+
+        # Halfway through the next minute, half of the old window overlaps
+        top = tracker.top("1m", 10, WINDOW_ORIGIN + 90)
+        assert top["requesters"][0]["count"] == 5
+
+    def test_unknown_window(self):
+        """Test that only configured windows can be queried."""
+        tracker = HeavyHitterTracker()
+        assert tracker.windows == ["1m", "1h", "1d"]
+        with pytest.raises(ValueError):
+            tracker.top("1w", 10, WINDOW_ORIGIN)
+
+    def test_rate_limiter_records_decisions(self):
+        """Test that the limiter feeds every counted request to the tracker."""
+        limiter = RateLimiter(
+            requests_per_minute=2, heavy_hitters=HeavyHitterTracker(capacity=10)
+        )
+
+        with patch("time.time", return_value=WINDOW_ORIGIN):
+            for _ in range(4):
+                limiter.check("203.0.113.9")
+            limiter.check("203.0.113.10")
+            top = limiter.get_top_clients("1m", 5)
+
+        assert top["requesters"][0] == {
+            "client_id": "203.0.113.9",
+            "count": 4,
+            "error": 0,
+        }
+        assert top["violators"] == [
+            {"client_id": "203.0.113.9", "count": 2, "error": 0}
+        ]
+
+    def test_test_mode_does_not_record(self):
+        """Test that uncounted requests are not tracked."""
+        limiter = RateLimiter(test_mode=True)
+        limiter.check("203.0.113.9")
+
+        assert limiter.get_top_clients("1m")["requesters"] == []
+
+
+class TestTopClientsEndpoint:
+    """Test cases for the admin heavy-hitter endpoint."""
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test that the endpoint is admin only."""
+        assert client.get("/api/v1/admin/rate-limit/top").status_code in [401, 403]
+        response = client.get("/api/v1/admin/rate-limit/top", headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_returns_top_clients(self, client, admin_auth_headers):
+        """Test that admins get the top lists for a window."""
+        from app.core.rate_limiter import rate_limiter
+
+        tracker = HeavyHitterTracker(capacity=10)
+        tracker.record("198.51.100.1", WINDOW_ORIGIN, limited=True)
+        with patch.object(rate_limiter, "heavy_hitters", tracker), patch(
+            "time.time", return_value=WINDOW_ORIGIN
+        ):
+            response = client.get(
+                "/api/v1/admin/rate-limit/top?window=1m&limit=5",
+                headers=admin_auth_headers,
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["window"] == "1m"
+        assert data["requesters"][0]["client_id"] == "198.51.100.1"
+        assert data["violators"][0]["count"] == 1
+
+    def test_rejects_unknown_window(self, client, admin_auth_headers):
+        """Test that the window is validated."""
+        response = client.get(
+            "/api/v1/admin/rate-limit/top?window=1w", headers=admin_auth_headers
+        )
+        assert response.status_code == 422
@@ -0,0 +1,360 @@
+"""
+Unit tests for the rate limiter's CIDR allow and deny lists
+"""
+
+import asyncio
+import ipaddress
+import random
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.ip_filter import (
+    ALLOW,
+    DENY,
+    CIDRTrie,
+    IPFilter,
+    TrustedProxies,
+    parse_cidr_list,
+)
+from app.core.rate_limiter import RateLimiter, RateLimitMiddleware
+
+
+def make_client(limiter, peer: str = "testclient"):
+    """Create a test client for a small app behind the middleware."""
+    from fastapi import FastAPI
+
+    test_app = FastAPI()
+
+    @test_app.get("/items")
+    async def items():
+        return {"items": []}
+
+    test_app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(test_app, client=(peer, 50000))
+
+
+class TestCIDRTrie:
+    """Test cases for the radix trie."""
+
+    def test_longest_prefix_wins(self):
+        """Test that the most specific stored prefix is returned."""
+        trie = CIDRTrie(32)
+        trie.insert(0x0A000000, 8, "a")  # 10.0.0.0/8
+        trie.insert(0x0A010000, 16, "b")  # 10.1.0.0/16
+        trie.insert(0x0A010200, 24, "c")  # 10.1.2.0/24
+
+        assert trie.lookup(0x0A010203) == "c"
+        assert trie.lookup(0x0A010303) == "b"
+        assert trie.lookup(0x0A020304) == "a"
+        assert trie.lookup(0x0B000001) is None
+
+    def test_split_edges(self):
+        """Test that diverging prefixes split a compressed edge."""
+        trie = CIDRTrie(32)
+        trie.insert(0xC0A80100, 24, "a")  # 192.168.1.0/24
+        trie.insert(0xC0A80200, 24, "b")  # 192.168.2.0/24
+        trie.insert(0xC0A80000, 16, "c")  # 192.168.0.0/16, on the split
+
+        assert trie.lookup(0xC0A80101) == "a"
+        assert trie.lookup(0xC0A80201) == "b"
+        assert trie.lookup(0xC0A80301) == "c"
+
+    def test_remove(self):
+        """Test that removing a prefix falls back to the enclosing one."""
+        trie = CIDRTrie(32)
+        trie.insert(0x0A000000, 8, "a")
+        trie.insert(0x0A010000, 16, "b")
+
+        assert trie.remove(0x0A010000, 16)
+        assert trie.lookup(0x0A010203) == "a"
+        assert not trie.remove(0x0A010000, 16)
+        assert not trie.remove(0x0A000000, 12)
+
+    def test_matches_linear_scan(self):
+        """Test lookups against a brute-force scan of random prefixes."""
+        rng = random.Random(7)
+        trie = CIDRTrie(32)
+        rules = {}
+        for index in range(300):
+            length = rng.randint(1, 32)
+            network = ipaddress.ip_network((rng.getrandbits(32), length), strict=False)
+            trie.insert(int(network.network_address), length, str(index))
+            rules[network] = str(index)
+        for network in list(rules)[::3]:
+            trie.remove(int(network.network_address), network.prefixlen)
+            del rules[network]
+
+        for _ in range(2000):
+            address = ipaddress.ip_address(rng.getrandbits(32))
+            matches = [network for network in rules if address in network]
+            expected = (
+                rules[max(matches, key=lambda n: n.prefixlen)] if matches else None
+            )
+            assert trie.lookup(int(address)) == expected
+
+
+class TestIPFilter:
+    """Test cases for allow and deny rules."""
+
+    def test_empty_filter_matches_nothing(self):
+        """Test that no rules means no action."""
+        assert IPFilter().match("203.0.113.7") is None
+
+    def test_allow_inside_deny(self):
+        """Test that an allow rule can carve a hole in a denied range."""
+        ip_filter = IPFilter(allow=["198.51.100.10"], deny=["198.51.100.0/24"])
+
+        assert ip_filter.match("198.51.100.10") == ALLOW
+        assert ip_filter.match("198.51.100.11") == DENY
+        assert ip_filter.match("198.51.101.1") is None
+
+    def test_ipv6_and_mapped_ipv4(self):
+        """Test IPv6 rules and IPv4 addresses written as IPv6."""
+        ip_filter = IPFilter(deny=["2001:db8::/32", "203.0.113.0/24"])
+
+        assert ip_filter.match("2001:db8:1::1") == DENY
+        assert ip_filter.match("2001:db9::1") is None
+        assert ip_filter.match("::ffff:203.0.113.9") == DENY
+
+    def test_hop_lists_match_nothing(self):
+        """Test that a raw forwarding header is never matched by its first hop."""
+        ip_filter = IPFilter(deny=["203.0.113.0/24"])
+        assert ip_filter.match("203.0.113.9, 10.0.0.1") is None
+
+    def test_unparseable_client_matches_nothing(self):
+        """Test that identifiers which are not addresses are ignored."""
+        ip_filter = IPFilter(deny=["0.0.0.0/0"])
+        assert ip_filter.match("unknown") is None
+
+    def test_rules_are_canonical(self):
+        """Test that rules are stored with their host bits cleared."""
+        ip_filter = IPFilter()
+        assert ip_filter.add("10.1.2.3/8", DENY) == "10.0.0.0/8"
+        assert ip_filter.rules() == [{"cidr": "10.0.0.0/8", "action": DENY}]
+
+    def test_invalid_rules_rejected(self):
+        """Test that bad networks and actions raise ValueError."""
+        ip_filter = IPFilter()
+        with pytest.raises(ValueError):
+            ip_filter.add("not-a-network", DENY)
+        with pytest.raises(ValueError):
+            ip_filter.add("10.0.0.0/8", "block")
+
+    def test_changes_invalidate_cached_decisions(self):
+        """Test that adding or removing a rule takes effect immediately."""
+        ip_filter = IPFilter(deny=["10.0.0.0/8"])
+        assert ip_filter.match("10.1.1.1") == DENY
+
+        ip_filter.add("10.1.0.0/16", ALLOW)
+        assert ip_filter.match("10.1.1.1") == ALLOW
+
+        assert ip_filter.remove("10.1.0.0/16")
+        assert ip_filter.match("10.1.1.1") == DENY
+
+        ip_filter.clear()
+        assert ip_filter.match("10.1.1.1") is None
+        assert len(ip_filter) == 0
+
+    def test_parse_cidr_list(self):
+        """Test parsing networks from settings."""
+        assert parse_cidr_list(" 10.0.0.0/8, ,2001:db8::/32,") == [
+            "10.0.0.0/8",
+            "2001:db8::/32",
+        ]
+        assert parse_cidr_list("") == []
+
+
+class TestTrustedProxies:
+    """Test cases for resolving the client behind proxies."""
+
+    def test_untrusted_peer_is_the_client(self):
+        """Test that headers from an unknown peer are ignored."""
+        proxies = TrustedProxies(["10.0.0.0/8"])
+        assert proxies.client_address("198.51.100.1", "10.1.2.3", "10.0.0.9") == (
+            "198.51.100.1"
+        )
+
+    def test_right_most_untrusted_hop_is_the_client(self):
+        """Test that hops the client prepended are skipped."""
+        proxies = TrustedProxies(["10.0.0.0/8"])
+        address = proxies.client_address(
+            "10.0.0.2", "192.0.2.1, 198.51.100.1 , 203.0.113.5, 10.0.0.3"
+        )
+        assert address == "203.0.113.5"
+
+    def test_only_proxies_forwarded(self):
+        """Test that a request from inside the proxy network keeps its origin."""
+        proxies = TrustedProxies(["10.0.0.0/8"])
+        assert proxies.client_address("10.0.0.2", "10.0.0.7, 10.0.0.3") == "10.0.0.7"
+        assert proxies.client_address("10.0.0.2") == "10.0.0.2"
+
+    def test_real_ip_from_trusted_peer(self):
+        """Test that X-Real-IP is used when a proxy sends no forwarding list."""
+        proxies = TrustedProxies(["127.0.0.1", "::1"])
+        assert proxies.client_address("::1", None, "198.51.100.4") == "198.51.100.4"
+        assert proxies.client_address("127.0.0.2", None, "198.51.100.4") == (
+            "127.0.0.2"
+        )
+
+    def test_peer_without_address(self):
+        """Test that a Unix socket peer is treated as a local proxy."""
+        proxies = TrustedProxies()
+        assert proxies.client_address(None, "198.51.100.1, 203.0.113.5") == (
+            "203.0.113.5"
+        )
+        assert proxies.client_address("testclient", None, "198.51.100.4") == (
+            "198.51.100.4"
+        )
+        assert proxies.client_address(None) == "unknown"
+
+
+class TestIPFilterMiddleware:
+    """Test cases for allow and deny lists in the middleware."""
+
+    def test_forged_header_cannot_reach_allow_list(self):
+        """Test that a client cannot claim an allowed address."""
+        limiter = RateLimiter(
+            requests_per_minute=1, ip_filter=IPFilter(allow=["10.0.0.0/8"])
+        )
+        client = make_client(limiter, peer="198.51.100.1")
+        headers = {"X-Forwarded-For": "10.1.2.3"}
+
+        responses = [client.get("/items", headers=headers) for _ in range(2)]
+
+        assert [response.status_code for response in responses] == [200, 429]
+        assert set(limiter.backend.clients) == {"198.51.100.1"}
+
+    def test_forged_hop_cannot_hide_denied_client(self):
+        """Test that a denied client behind a trusted proxy stays denied."""
+        limiter = RateLimiter(
+            ip_filter=IPFilter(deny=["203.0.113.0/24"]),
+            trusted_proxies=TrustedProxies(["10.0.0.0/8"]),
+        )
+        client = make_client(limiter, peer="10.0.0.2")
+
+        response = client.get(
+            "/items", headers={"X-Forwarded-For": "198.51.100.1, 203.0.113.5"}
+        )
+
+        assert response.status_code == 403
+        assert limiter.backend.client_count() == 0
+
+    def test_denied_network_is_rejected_without_state(self):
+        """Test that denied clients get 403 and never reach the backend."""
+        limiter = RateLimiter(ip_filter=IPFilter(deny=["203.0.113.0/24"]))
+        client = make_client(limiter)
+
+        with patch(
+            "app.core.rate_limiter.RateLimiter._get_scope_client_identifier",
+            return_value="203.0.113.9",
+        ):
+            response = client.get("/items")
+
+        assert response.status_code == 403
+        assert response.json()["error"] == "Forbidden"
+        assert limiter.backend.client_count() == 0
+
+    def test_allowed_network_bypasses_limits(self):
+        """Test that allowed clients are neither limited nor counted."""
+        limiter = RateLimiter(
+            requests_per_minute=1, ip_filter=IPFilter(allow=["203.0.113.0/24"])
+        )
+        client = make_client(limiter)
+
+        with patch(
+            "app.core.rate_limiter.RateLimiter._get_scope_client_identifier",
+            return_value="203.0.113.9",
+        ):
+            responses = [client.get("/items") for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200] * 3
+        assert "x-ratelimit-limit-minute" not in responses[0].headers
+        assert limiter.backend.client_count() == 0
+
+    def test_deny_applies_in_test_mode(self):
+        """Test that deny rules hold even when rate limiting is disabled."""
+        limiter = RateLimiter(test_mode=True, ip_filter=IPFilter(deny=["0.0.0.0/0"]))
+        client = make_client(limiter)
+
+        with patch(
+            "app.core.rate_limiter.RateLimiter._get_scope_client_identifier",
+            return_value="198.51.100.1",
+        ):
+            assert client.get("/items").status_code == 403
+
+    def test_http_middleware_denies(self):
+        """Test the deny list in the BaseHTTPMiddleware variant."""
+        from app.core.rate_limiter import rate_limit_middleware
+
+        limiter = RateLimiter(ip_filter=IPFilter(deny=["203.0.113.0/24"]))
+        request = Mock()
+        request.method = "GET"
+        request.url.path = "/items"
+        request.headers = {"X-Forwarded-For": "203.0.113.9"}
+        request.client = None  # Unix socket, so the header is believed
+        call_next = AsyncMock()
+
+        with patch("app.core.rate_limiter.rate_limiter", limiter):
+            response = asyncio.run(rate_limit_middleware(request, call_next))
+
+        assert response.status_code == 403
+        call_next.assert_not_called()
+
+
+class TestIPRuleEndpoints:
+    """Test cases for managing rules through the admin API."""
+
+    URL = "/api/v1/admin/rate-limit/ip-rules"
+
+    @pytest.fixture(autouse=True)
+    def isolated_filter(self):
+        """Give each test its own filter on the global limiter."""
+        from app.core.rate_limiter import rate_limiter
+
+        with patch.object(rate_limiter, "ip_filter", IPFilter()):
+            yield rate_limiter.ip_filter
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test that regular users cannot manage rules."""
+        response = client.get(self.URL, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_add_list_and_remove(self, client, admin_auth_headers, isolated_filter):
+        """Test the full lifecycle of a rule."""
+        response = client.post(
+            self.URL,
+            json={"cidr": "198.51.100.7/24", "action": "deny"},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 201
+        assert response.json() == {"cidr": "198.51.100.0/24", "action": "deny"}
+        assert isolated_filter.match("198.51.100.99") == DENY
+
+        response = client.get(self.URL, headers=admin_auth_headers)
+        assert response.json() == [{"cidr": "198.51.100.0/24", "action": "deny"}]
+
+        response = client.delete(
+            self.URL,
+            params={"cidr": "198.51.100.0/24"},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 200
+        assert isolated_filter.match("198.51.100.99") is None
+
+    def test_invalid_rule_rejected(self, client, admin_auth_headers):
+        """Test that malformed networks fail validation."""
+        response = client.post(
+            self.URL,
+            json={"cidr": "300.1.2.3/8", "action": "deny"},
+            headers=admin_auth_headers,
+        )
+        assert response.status_code == 422
+
+    def test_remove_missing_rule(self, client, admin_auth_headers):
+        """Test that removing an unknown rule returns 404."""
+        response = client.delete(
+            self.URL, params={"cidr": "10.0.0.0/8"}, headers=admin_auth_headers
+        )
+        assert response.status_code == 404
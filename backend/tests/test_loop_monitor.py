@@ -0,0 +1,121 @@
+"""
+Unit tests for the event loop lag monitor
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.loop_monitor import LagHistogram, LoopLagMonitor
+
+
+def blocking_call():
+    """Hold the event loop without yielding."""
+    time.sleep(0.3)
+
+
+class TestLagHistogram:
+    """Test cases for the lag histogram."""
+
+    def test_bucketing(self):
+        """Test that lags land in the first bucket whose bound covers them."""
+        histogram = LagHistogram(bounds_ms=(1, 10, 100))
+        for lag in (0.5, 1, 5, 50, 500):
+            histogram.observe(lag)
+
+        snapshot = histogram.snapshot()
+        assert [bucket["count"] for bucket in snapshot["buckets"]] == [2, 1, 1, 1]
+        assert snapshot["buckets"][-1]["le_ms"] is None
+        assert snapshot["count"] == 5
+        assert snapshot["max_ms"] == 500
+        assert snapshot["mean_ms"] == pytest.approx(111.3)
+
+    def test_clear(self):
+        """Test that clearing forgets every measurement."""
+        histogram = LagHistogram()
+        histogram.observe(20)
+        histogram.clear()
+        assert histogram.snapshot()["count"] == 0
+        assert histogram.snapshot()["mean_ms"] == 0.0
+
+
+class TestLoopLagMonitor:
+    """Test cases for measuring lag and capturing blocking stacks."""
+
+    def test_captures_blocking_stack(self):
+        """Test that a blocking call is caught with its stack and duration."""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            blocking_call()
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        with patch("app.core.loop_monitor.logger"):
+            asyncio.run(scenario())
+
+        stats = monitor.get_stats()
+        assert not stats["running"]
+        assert stats["lag"]["count"] > 0
+        assert stats["lag"]["max_ms"] >= 200
+
+        event = stats["recent_blocks"][0]
+        assert event["duration_ms"] >= 200
+        assert any("blocking_call" in frame for frame in event["stack"])
+
+        top = stats["top_stacks"][0]
+        assert top["count"] == 1
+        assert top["total_ms"] >= 200
+
+    def test_reset(self):
+        """Test that reset clears measurements and stacks."""
+        monitor = LoopLagMonitor()
+        monitor.histogram.observe(5)
+        monitor._capture(["app.py:1 in handler"])
+        monitor.reset()
+
+        stats = monitor.get_stats()
+        assert stats["lag"]["count"] == 0
+        assert stats["recent_blocks"] == []
+        assert stats["top_stacks"] == []
+
+    def test_stats_when_not_running(self):
+        """Test that stats are available before the monitor starts."""
+        stats = LoopLagMonitor(interval=0.05, threshold=0.1).get_stats()
+        assert stats["running"] is False
+        assert stats["interval_ms"] == 50
+        assert stats["threshold_ms"] == 100
+
+    def test_configure_rejects_non_positive_values(self):
+        """Test that the interval and threshold must be positive."""
+        monitor = LoopLagMonitor()
+        with pytest.raises(ValueError):
+            monitor.configure(0, 0.1)
+        with pytest.raises(ValueError):
+            monitor.configure(0.05, -1)
+
+        monitor.configure(0.02, 0.2)
+        assert (monitor.interval, monitor.threshold) == (0.02, 0.2)
+
+
+class TestLoopMonitorEndpoints:
+    """Test cases for the admin endpoints."""
+
+    URL = "/api/v1/admin/loop-monitor"
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test that regular users cannot read the monitor."""
+        assert client.get(self.URL, headers=auth_headers).status_code == 403
+
+    def test_stats_and_reset(self, client, admin_auth_headers):
+        """Test reading and resetting the monitor."""
+        response = client.get(self.URL, headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert {"running", "lag", "recent_blocks", "top_stacks"} <= set(response.json())
+
+        response = client.post(f"{self.URL}/reset", headers=admin_auth_headers)
+        assert response.status_code == 200
@@ -0,0 +1,197 @@
+"""
+Tests for keyset (cursor) pagination of the public listings
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import CURSOR_HEADER, cursor_params, encode_cursor
+from app.models import Category, Experience, Post, Project
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def walk(client, url, limit, **params):
+    """Follow cursors from the first page to the last."""
+    pages = []
+    response = client.get(url, params={"limit": limit, **params})
+    while True:
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        response = client.get(url, params={"limit": limit, "cursor": cursor, **params})
+
+
+@pytest.fixture
+def many_posts(db_session, test_category):
+    """Seven published posts, the last four sharing a timestamp, plus a draft."""
+    other = Category(name="Other", slug="other")
+    db_session.add(other)
+    db_session.flush()
+    for i in range(7):
+        db_session.add(
+            Post(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                content="Content",
+                category_id=test_category.id if i % 2 else other.id,
+                # Posts 3 to 6 are published at the same moment
+                published_at=BASE_TIME + timedelta(days=min(i, 3)),
+            )
+        )
+    db_session.add(
+        Post(title="Draft", slug="draft", content="Draft", category_id=other.id)
+    )
+    db_session.commit()
+    return db_session
+
+
+class TestCursors:
+    """Test cases for encoding and decoding cursors."""
+
+    def test_round_trip(self):
+        """Test that cursor values come back with their column types."""
+        cursor = encode_cursor(datetime(2024, 5, 1, 12, 30), 42)
+        params = cursor_params(cursor, Post.published_at, Post.id)
+        assert params == {"cursor_0": datetime(2024, 5, 1, 12, 30), "cursor_1": 42}
+
+        cursor = encode_cursor(date(2022, 1, 1), 7)
+        assert cursor_params(cursor, Experience.start_date, Experience.id) == {
+            "cursor_0": date(2022, 1, 1),
+            "cursor_1": 7,
+        }
+
+    def test_cursor_is_opaque(self):
+        """Test that cursors are URL safe without padding."""
+        cursor = encode_cursor(datetime(2024, 5, 1), 1)
+        assert "=" not in cursor
+        assert "/" not in cursor and "+" not in cursor
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "not-a-cursor",
+            encode_cursor(1),
+            encode_cursor("yesterday", 1),
+            encode_cursor("2024-01-01T00:00:00", "1"),
+            encode_cursor("2024-01-01T00:00:00", True),
+        ],
+    )
+    def test_invalid_cursors(self, cursor):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(HTTPException) as error:
+            cursor_params(cursor, Post.published_at, Post.id)
+        assert error.value.status_code == 400
+
+    def test_skip_with_cursor(self):
+        """Test that a cursor cannot be combined with an offset."""
+        cursor = encode_cursor(datetime(2024, 5, 1), 1)
+        with pytest.raises(HTTPException) as error:
+            cursor_params(cursor, Post.published_at, Post.id, skip=5)
+        assert error.value.status_code == 400
+
+
+class TestPostPagination:
+    """Test cases for paging through posts with cursors."""
+
+    URL = "/api/v1/posts/"
+
+    def test_cursor_pages_match_offset_order(self, client, many_posts):
+        """Test that following cursors returns every post once, in order."""
+        everything = client.get(self.URL, params={"limit": 100}).json()
+        pages = walk(client, self.URL, limit=3)
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [post["slug"] for page in pages for post in page] == [
+            post["slug"] for post in everything
+        ]
+        assert len(everything) == 7
+
+    def test_offset_pages_unchanged(self, client, many_posts):
+        """Test that skip and limit still work and also return a cursor."""
+        first = client.get(self.URL, params={"limit": 3})
+        second = client.get(self.URL, params={"limit": 3, "skip": 3})
+        by_cursor = client.get(
+            self.URL, params={"limit": 3, "cursor": first.headers[CURSOR_HEADER]}
+        )
+
+        assert second.json() == by_cursor.json()
+
+    def test_exact_final_page(self, client, many_posts):
+        """Test that a full last page is followed by an empty one."""
+        pages = walk(client, self.URL, limit=7)
+        assert [len(page) for page in pages] == [7, 0]
+
+    def test_category_filter(self, client, many_posts, test_category):
+        """Test cursors on both category listings."""
+        expected = ["post-5", "post-3", "post-1"]
+
+        pages = walk(client, self.URL, limit=2, category_slug=test_category.slug)
+        assert [post["slug"] for page in pages for post in page] == expected
+
+        url = f"/api/v1/posts/category/{test_category.slug}"
+        pages = walk(client, url, limit=2)
+        assert [post["slug"] for page in pages for post in page] == expected
+
+    def test_invalid_cursor(self, client):
+        """Test that a bad cursor is a client error."""
+        response = client.get(self.URL, params={"cursor": "garbage"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_cursor_with_skip(self, client, many_posts):
+        """Test that skip and cursor cannot be combined."""
+        cursor = client.get(self.URL, params={"limit": 2}).headers[CURSOR_HEADER]
+        response = client.get(self.URL, params={"skip": 2, "cursor": cursor})
+        assert response.status_code == 400
+
+
+class TestProjectAndExperiencePagination:
+    """Test cases for cursors on projects and experience."""
+
+    def test_projects(self, client, db_session):
+        """Test paging through active projects, featured or not."""
+        for i in range(5):
+            db_session.add(
+                Project(
+                    title=f"Project {i}",
+                    description="Description",
+                    technologies=[],
+                    featured=i % 2 == 0,
+                    created_at=BASE_TIME + timedelta(days=i // 2),
+                )
+            )
+        db_session.commit()
+
+        pages = walk(client, "/api/v1/projects/", limit=2)
+        titles = [project["title"] for page in pages for project in page]
+        assert titles == [f"Project {i}" for i in (4, 3, 2, 1, 0)]
+
+        pages = walk(client, "/api/v1/projects/", limit=2, featured_only=True)
+        titles = [project["title"] for page in pages for project in page]
+        assert titles == ["Project 4", "Project 2", "Project 0"]
+
+    def test_experience(self, client, db_session):
+        """Test paging through experience ordered by start date."""
+        for i in range(5):
+            db_session.add(
+                Experience(
+                    title=f"Role {i}",
+                    company="Company",
+                    location="Remote",
+                    period="2020",
+                    start_date=date(2020 + i // 2, 1, 1),
+                    description="Description",
+                    technologies=[],
+                    achievements=[],
+                )
+            )
+        db_session.commit()
+
+        pages = walk(client, "/api/v1/experience/", limit=2)
+        titles = [entry["title"] for page in pages for entry in page]
+        assert titles == [f"Role {i}" for i in (4, 3, 2, 1, 0)]
@@ -0,0 +1,110 @@
+"""
+Unit tests for connection pool instrumentation
+"""
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool
+
+from app.core.pool_metrics import InstrumentedQueuePool, get_pool_stats
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    """Create an engine whose pool holds a single connection."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestInstrumentedPool:
+    """Test cases for checkout metrics."""
+
+    def test_counts_checkouts(self, small_engine):
+        """Test that each checkout is timed."""
+        for _ in range(3):
+            with small_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        stats = get_pool_stats(small_engine.pool)
+        assert stats["checkouts"] == 3
+        assert stats["wait"]["count"] == 3
+        assert stats["checked_out"] == 0
+        assert stats["peak_checked_out"] == 1
+
+    def test_overflow_and_timeouts(self, small_engine):
+        """Test that an exhausted pool records its peak and timeouts."""
+        first = small_engine.connect()
+        second = small_engine.connect()  # Overflow connection
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+
+        stats = get_pool_stats(small_engine.pool)
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+        assert stats["peak_checked_out"] == 2
+        assert stats["peak_overflow"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["wait"]["max_ms"] >= 40
+
+        first.close()
+        second.close()
+
+    def test_settings_reported(self, small_engine):
+        """Test that the pool configuration is part of the stats."""
+        stats = get_pool_stats(small_engine.pool)
+        assert stats["pool_class"] == "InstrumentedQueuePool"
+        assert stats["pool_size"] == 1
+        assert stats["max_overflow"] == 1
+        assert stats["timeout_seconds"] == 0.05
+
+    def test_metrics_survive_dispose(self, small_engine):
+        """Test that replacing the pool keeps the collected metrics."""
+        with small_engine.connect():
+            pass
+        small_engine.dispose()
+
+        assert get_pool_stats(small_engine.pool)["checkouts"] == 1
+
+    def test_reset(self, small_engine):
+        """Test that reset clears the metrics."""
+        with small_engine.connect():
+            pass
+        small_engine.pool.metrics.reset()
+
+        stats = get_pool_stats(small_engine.pool)
+        assert stats["checkouts"] == 0
+        assert stats["peak_checked_out"] == 0
+
+    def test_uninstrumented_pool(self):
+        """Test that other pools report only what they have."""
+        engine = create_engine("sqlite://", poolclass=NullPool)
+        assert get_pool_stats(engine.pool) == {"pool_class": "NullPool"}
+
+
+class TestPoolEndpoints:
+    """Test cases for the admin endpoints."""
+
+    URL = "/api/v1/admin/db-pool"
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test that regular users cannot read pool metrics."""
+        assert client.get(self.URL, headers=auth_headers).status_code == 403
+
+    def test_stats_and_reset(self, client, admin_auth_headers):
+        """Test reading and resetting every pool's metrics."""
+        response = client.get(self.URL, headers=admin_auth_headers)
+        assert response.status_code == 200
+        assert set(response.json()) == {"sync", "async", "replicas"}
+        assert response.json()["sync"]["pool_class"] == "InstrumentedQueuePool"
+        assert response.json()["async"]["pool_class"] == "InstrumentedAsyncQueuePool"
+
+        response = client.post(f"{self.URL}/reset", headers=admin_auth_headers)
+        assert response.status_code == 200
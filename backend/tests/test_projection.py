@@ -0,0 +1,93 @@
+"""
+Tests for column projection on the list endpoints
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.api.v1.endpoints import experience, posts, projects
+from app.core.projection import load_schema_fields
+from app.models import Post
+from app.schemas import PostList
+
+
+def selected_columns(statement):
+    """Names of the columns a statement fetches from the database."""
+    compiled = str(statement.compile())
+    return compiled.split("FROM")[0]
+
+
+class TestLoadSchemaFields:
+    """Test cases for building projection options."""
+
+    def test_loads_only_schema_columns(self, db_session, test_post):
+        """Test that unlisted columns are not loaded and raise on access."""
+        db_session.expunge_all()
+        statement = select(Post).options(load_schema_fields(Post, PostList))
+        post = db_session.scalars(statement).one()
+
+        assert post.title == test_post.title
+        with pytest.raises(InvalidRequestError):
+            post.content
+
+    def test_relationship_foreign_keys_are_loaded(self):
+        """Test that a serialized relationship brings its foreign key."""
+        statement = select(Post).options(load_schema_fields(Post, PostList))
+        columns = selected_columns(statement)
+
+        assert "posts.category_id" in columns
+        assert "posts.content" not in columns
+        assert "posts.author_id" not in columns
+
+    def test_extra_attributes(self):
+        """Test that extra attributes are loaded alongside the schema."""
+        option = load_schema_fields(Post, PostList, Post.updated_at)
+        columns = selected_columns(select(Post).options(option))
+        assert "posts.updated_at" in columns
+
+
+class TestListingProjection:
+    """Test cases for the columns fetched by the public listings."""
+
+    @pytest.mark.parametrize(
+        "statement, excluded",
+        [
+            (posts._published_posts, ["posts.content", "posts.updated_at"]),
+            (posts._published_posts_in_category_after, ["posts.content"]),
+            (projects._active_projects, ["projects.is_active", "projects.updated_at"]),
+            (projects._featured_projects_after, ["projects.updated_at"]),
+            (experience._active_experience, ["experience.updated_at"]),
+        ],
+    )
+    def test_listing_skips_unserialized_columns(self, statement, excluded):
+        """Test that list statements leave out columns the schema lacks."""
+        columns = selected_columns(statement)
+        for column in excluded:
+            assert column not in columns
+
+    def test_post_list_response(self, client, db_session, test_category):
+        """Test that the projected post list still serializes fully."""
+        db_session.add(
+            Post(
+                title="Long post",
+                slug="long-post",
+                content="x" * 100_000,
+                excerpt="Short",
+                category_id=test_category.id,
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+        db_session.commit()
+
+        response = client.get("/api/v1/posts/")
+        assert response.status_code == 200
+        [post] = response.json()
+        assert post["excerpt"] == "Short"
+        assert post["category"]["slug"] == test_category.slug
+        assert "content" not in post
+
+        detail = client.get("/api/v1/posts/long-post").json()
+        assert len(detail["content"]) == 100_000
@@ -0,0 +1,147 @@
+"""
+Query plan regression tests for the public listings
+
+Each listing statement is explained against a database migrated to head. A
+listing must read its rows through the index matching its filter and order,
+never by scanning the table or sorting the result.
+"""
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app.api.v1.endpoints import experience, posts, projects
+from app.database import Base, run_migrations
+
+CURSOR = {"cursor_0": datetime(2024, 1, 1), "cursor_1": 10}
+PAGE = {"skip": 0, "limit": 10}
+
+LISTINGS = [
+    ("posts", posts._published_posts, PAGE, "ix_posts_published"),
+    (
+        "posts after cursor",
+        posts._published_posts_after,
+        {"limit": 10, **CURSOR},
+        "ix_posts_published",
+    ),
+    (
+        "posts in category",
+        posts._published_posts_in_category,
+        {**PAGE, "category_slug": "python"},
+        "ix_posts_category_published",
+    ),
+    (
+        "posts in category after cursor",
+        posts._published_posts_in_category_after,
+        {"limit": 10, "category_slug": "python", **CURSOR},
+        "ix_posts_category_published",
+    ),
+    ("post by slug", posts._published_post_by_slug, {"slug": "a"}, "ix_posts_slug"),
+    ("categories", posts._categories, {}, "ix_categories_name"),
+    ("projects", projects._active_projects, PAGE, "ix_projects_active_created"),
+    (
+        "projects after cursor",
+        projects._active_projects_after,
+        {"limit": 10, **CURSOR},
+        "ix_projects_active_created",
+    ),
+    (
+        "featured projects",
+        projects._featured_projects,
+        PAGE,
+        "ix_projects_active_featured",
+    ),
+    (
+        "featured projects after cursor",
+        projects._featured_projects_after,
+        {"limit": 10, **CURSOR},
+        "ix_projects_active_featured",
+    ),
+    (
+        "experience",
+        experience._active_experience,
+        PAGE,
+        "ix_experience_active_start",
+    ),
+    (
+        "experience after cursor",
+        experience._active_experience_after,
+        {"limit": 10, "cursor_0": date(2022, 1, 1), "cursor_1": 10},
+        "ix_experience_active_start",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def migrated_engine(tmp_path_factory):
+    """Create a database file migrated to the head revision."""
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with patch("app.database.engine", engine):
+        assert run_migrations()
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement, params):
+    """Return the detail lines of SQLite's plan for a statement."""
+    compiled = statement.compile(dialect=engine.dialect)
+    values = compiled.construct_params(params)
+    processors = compiled._bind_processors
+    arguments = tuple(
+        processors[name](values[name]) if name in processors else values[name]
+        for name in compiled.positiontup
+    )
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled.string}", arguments
+        )
+        return [row[3] for row in rows]
+
+
+class TestListingQueryPlans:
+    """Test cases for index use by the public listings."""
+
+    @pytest.mark.parametrize(
+        "statement, params, index",
+        [listing[1:] for listing in LISTINGS],
+        ids=[listing[0] for listing in LISTINGS],
+    )
+    def test_listing_uses_index(self, migrated_engine, statement, params, index):
+        """Test that a listing reads through its index without sorting."""
+        plan = query_plan(migrated_engine, statement, params)
+
+        assert any(f"INDEX {index}" in line for line in plan), plan
+        assert not any("TEMP B-TREE" in line for line in plan), plan
+        for line in plan:
+            # A SEARCH is an index or primary key lookup; a SCAN must be ordered
+            # by an index rather than read the whole table
+            assert line.startswith(("SEARCH", "SCAN")), plan
+            if line.startswith("SCAN"):
+                assert "USING INDEX" in line, f"Full table scan: {plan}"
+
+
+class TestListingIndexes:
+    """Test cases for keeping models and migrations in step."""
+
+    def test_migrations_create_model_indexes(self, migrated_engine):
+        """Test that the migrated schema has every index the models declare."""
+        inspector = inspect(migrated_engine)
+        for table in Base.metadata.sorted_tables:
+            declared = {index.name for index in table.indexes}
+            migrated = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert declared <= migrated, table.name
+
+    def test_listing_indexes_are_partial(self, migrated_engine):
+        """Test that the listing indexes only cover rows the listings show."""
+        with migrated_engine.connect() as connection:
+            definitions = dict(
+                connection.exec_driver_sql(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index'"
+                ).all()
+            )
+        assert "WHERE published_at IS NOT NULL" in definitions["ix_posts_published"]
+        assert "WHERE is_active = 1" in definitions["ix_projects_active_featured"]
+        assert "WHERE is_active = 1" in definitions["ix_experience_active_start"]
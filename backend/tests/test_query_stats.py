@@ -0,0 +1,277 @@
+"""
+Unit tests for per-request SQL statistics and N+1 detection
+"""
+
+import logging
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import Settings
+from app.core.query_stats import (
+    QueryStatsMiddleware,
+    RequestQueryStats,
+    get_request_query_stats,
+)
+from app.models import Category, Post
+
+
+@pytest.fixture
+def stats_client(tmp_path):
+    """Create a test client for a small app behind the middleware."""
+    path = tmp_path / "stats.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", poolclass=NullPool
+    )
+    test_app = FastAPI()
+
+    @test_app.get("/loop")
+    def lookups_in_a_loop():
+        with engine.connect() as connection:
+            for i in range(6):
+                connection.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    @test_app.get("/repeat")
+    def same_lookup_repeated():
+        with engine.connect() as connection:
+            for _ in range(6):
+                connection.execute(text("SELECT 1"))
+        return {}
+
+    @test_app.get("/async")
+    async def async_queries():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await connection.execute(text("SELECT 2"))
+        return {"seen": get_request_query_stats().count}
+
+    @test_app.get("/none")
+    async def no_queries():
+        return {}
+
+    test_app.add_middleware(QueryStatsMiddleware, headers=True, n_plus_one_threshold=5)
+    yield TestClient(test_app)
+    engine.dispose()
+
+
+class TestRequestQueryStats:
+    """Test cases for recording statements."""
+
+    def test_counts_and_times(self):
+        """Test that totals add up over statements."""
+        stats = RequestQueryStats()
+        stats.record("SELECT 1", (), 1.5)
+        stats.record("SELECT 2", (), 0.5)
+        stats.record("SELECT 1", (), 1.0)
+
+        assert stats.count == 3
+        assert stats.total_ms == pytest.approx(3.0)
+        assert stats.statements["SELECT 1"].count == 2
+
+    def test_n_plus_one_needs_different_parameters(self):
+        """Test that only repeats with varying parameters are suspects."""
+        stats = RequestQueryStats()
+        for i in range(5):
+            stats.record("SELECT * FROM categories WHERE id = ?", (i,), 0.1)
+            stats.record("SELECT count(*) FROM posts", (), 0.1)
+
+        suspects = stats.n_plus_one_suspects(threshold=5)
+        assert [suspect["statement"] for suspect in suspects] == [
+            "SELECT * FROM categories WHERE id = ?"
+        ]
+        assert suspects[0]["count"] == 5
+        assert suspects[0]["distinct_parameters"] == 5
+        assert stats.n_plus_one_suspects(threshold=6) == []
+
+    def test_parameter_values_are_not_kept(self):
+        """Test that only a hash of each parameter set is stored."""
+        stats = RequestQueryStats()
+        stats.record("UPDATE posts SET content = ?", ("secret draft",), 0.1)
+        stats.record("INSERT INTO tags VALUES (?)", [("a",), ("b",)], 0.1)
+        stats.record("SELECT :id", {"id": 1}, 0.1)
+        stats.record("SELECT :id", {"id": 2}, 0.1)
+
+        for statement in stats.statements.values():
+            assert all(isinstance(key, int) for key in statement.parameters)
+        assert len(stats.statements["SELECT :id"].parameters) == 2
+
+    def test_nothing_recorded_outside_requests(self, tmp_path):
+        """Test that statements outside a request are ignored."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'outside.db'}")
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert get_request_query_stats() is None
+
+
+class TestQueryStatsMiddleware:
+    """Test cases for per-request totals and warnings."""
+
+    def test_headers(self, stats_client):
+        """Test that totals are returned in response headers."""
+        response = stats_client.get("/loop")
+        assert response.headers["x-db-query-count"] == "6"
+        assert float(response.headers["x-db-query-time-ms"]) >= 0
+
+        response = stats_client.get("/none")
+        assert response.headers["x-db-query-count"] == "0"
+
+    def test_async_engine_statements_are_counted(self, stats_client):
+        """Test that queries run through the async engine are counted."""
+        response = stats_client.get("/async")
+        assert response.json() == {"seen": 2}
+        assert response.headers["x-db-query-count"] == "2"
+
+    def test_n_plus_one_warning(self, stats_client, caplog):
+        """Test that a lookup in a loop is flagged with its endpoint."""
+        with caplog.at_level(logging.DEBUG, logger="app.core.query_stats"):
+            stats_client.get("/loop")
+
+        warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 1
+        assert "GET /loop" in warnings[0]
+        assert "lookups_in_a_loop" in warnings[0]
+        assert "6 executions with 6 parameter sets" in warnings[0]
+
+    def test_nothing_is_analysed_when_logging_is_off(self, stats_client):
+        """Test that a silenced logger skips the report entirely."""
+        logger = logging.getLogger("app.core.query_stats")
+        with patch.object(logger, "disabled", True), patch.object(
+            RequestQueryStats, "n_plus_one_suspects"
+        ) as suspects:
+            stats_client.get("/loop")
+        suspects.assert_not_called()
+
+    def test_identical_repeats_are_not_flagged(self, stats_client, caplog):
+        """Test that repeating the same parameters is not an N+1."""
+        with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+            stats_client.get("/repeat")
+        assert not caplog.records
+
+
+class TestQueryStatsSettings:
+    """Test cases for turning query stats on."""
+
+    @pytest.mark.parametrize("debug", [True, False])
+    def test_enabled_follows_debug(self, monkeypatch, debug):
+        """Test that query stats default to on in debug mode only."""
+        monkeypatch.delenv("QUERY_STATS_ENABLED", raising=False)
+        assert Settings(_env_file=None, DEBUG=debug).QUERY_STATS_ENABLED is debug
+
+    def test_explicit_setting_wins(self, monkeypatch):
+        """Test that query stats can be enabled outside debug mode."""
+        monkeypatch.setenv("QUERY_STATS_ENABLED", "true")
+        assert Settings(_env_file=None, DEBUG=False).QUERY_STATS_ENABLED is True
+
+
+class TestApplicationQueries:
+    """Test cases for the queries issued by the API."""
+
+    def test_post_list_has_no_n_plus_one(
+        self, client, db_session, test_category, caplog
+    ):
+        """Test that listing posts loads categories in one query."""
+        for i in range(8):
+            db_session.add(
+                Post(
+                    title=f"Post {i}",
+                    slug=f"post-{i}",
+                    content="Content",
+                    category_id=test_category.id,
+                    published_at=datetime.now(timezone.utc),
+                )
+            )
+        db_session.commit()
+
+        with caplog.at_level(logging.DEBUG, logger="app.core.query_stats"):
+            response = client.get("/api/v1/posts/")
+
+        assert len(response.json()) == 8
+        messages = [record.getMessage() for record in caplog.records]
+        assert any("GET /api/v1/posts/: 2 SQL statements" in m for m in messages)
+        assert not any("N+1" in message for message in messages)
+
+
+@pytest.fixture
+def blog(db_session, test_user):
+    """Twenty published posts spread over five categories."""
+    categories = [Category(name=f"Topic {i}", slug=f"topic-{i}") for i in range(5)]
+    db_session.add_all(categories)
+    db_session.flush()
+    for i in range(20):
+        db_session.add(
+            Post(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                content="Content",
+                author_id=test_user.id,
+                category_id=categories[i % 5].id,
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+    db_session.commit()
+    return categories
+
+
+class TestEndpointQueryCounts:
+    """Test cases for the number of statements each endpoint issues."""
+
+    @pytest.mark.parametrize(
+        "url, limit",
+        [
+            ("/api/v1/posts/?limit=20", 2),
+            ("/api/v1/posts/?category_slug=topic-1", 2),
+            ("/api/v1/posts/category/topic-1", 2),
+            ("/api/v1/posts/post-3", 1),
+            ("/api/v1/posts/categories", 1),
+            ("/api/v1/projects/", 1),
+            ("/api/v1/experience/", 1),
+        ],
+    )
+    def test_public_reads(self, client, blog, assert_max_queries, url, limit):
+        """Test that public reads do not grow with the rows they return."""
+        with assert_max_queries(limit):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_admin_post_list(
+        self, client, blog, admin_auth_headers, assert_max_queries
+    ):
+        """Test that the admin list loads all categories in one query."""
+        with assert_max_queries(3):  # User, posts, categories
+            response = client.get("/api/v1/posts/admin", headers=admin_auth_headers)
+        assert len(response.json()) == 20
+        assert all(post["category"] for post in response.json())
+
+    def test_delete_category_checks_posts_with_exists(
+        self, client, blog, admin_auth_headers, assert_max_queries
+    ):
+        """Test that refusing to delete a used category loads no posts."""
+        with assert_max_queries(3) as statements:  # User, category, EXISTS
+            response = client.delete(
+                f"/api/v1/posts/categories/{blog[0].id}", headers=admin_auth_headers
+            )
+        assert response.status_code == 400
+        assert "EXISTS" in statements[-1]
+        assert not any(s.startswith("SELECT posts.") for s in statements)
+
+    def test_delete_empty_category(
+        self, client, db_session, admin_auth_headers, assert_max_queries
+    ):
+        """Test that deleting an empty category does not load its posts."""
+        category = Category(name="Empty", slug="empty")
+        db_session.add(category)
+        db_session.commit()
+
+        with assert_max_queries(4):  # User, category, EXISTS, DELETE
+            response = client.delete(
+                f"/api/v1/posts/categories/{category.id}", headers=admin_auth_headers
+            )
+        assert response.status_code == 200
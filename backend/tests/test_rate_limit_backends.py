@@ -0,0 +1,814 @@
+"""
+Tests for rate limiter storage backends.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+import redis
+
+from app.core.rate_limit_backends import (
+    BackendUnavailableError,
+    MemoryBackend,
+    RedisBackend,
+    SharedMemoryBackend,
+    create_backend,
+)
+from app.core.rate_limit_strategies import GCRAStrategy, Quota, SlidingWindowStrategy
+from app.core.rate_limiter import RateLimiter
+from tests.redis_standin import StandInRedisServer
+
+QUOTAS = (Quota("minute", 5, 60), Quota("hour", 100, 3600))
+
+
+def make_request(host: str = "test_client") -> Mock:
+    """Build a minimal request object for the limiter."""
+    request = Mock()
+    request.method = "GET"
+    request.url.path = "/api/v1/posts/"
+    request.headers = {}
+    request.client = Mock()
+    request.client.host = host
+    return request
+
+
+@pytest.fixture(scope="module")
+def redis_server():
+    """Run a stand-in Redis server for the whole module."""
+    with StandInRedisServer() as server:
+        yield server
+
+
+@pytest.fixture
+def redis_backend(redis_server):
+    """Create a Redis backend with an empty key space."""
+    backend = RedisBackend.from_url(redis_server.url)
+    backend.client.flushdb()
+    yield backend
+    backend.client.close()
+
+
+class TestCreateBackend:
+    """Test cases for backend selection."""
+
+    def test_create_memory_backend(self):
+        """Test creating the default in-process backend."""
+        assert isinstance(create_backend("memory"), MemoryBackend)
+
+    def test_create_redis_backend(self, redis_server):
+        """Test creating a Redis backend from a URL."""
+        backend = create_backend("redis", redis_url=redis_server.url)
+        assert isinstance(backend, RedisBackend)
+
+    def test_create_redis_backend_requires_url(self):
+        """Test that the Redis backend needs a server URL."""
+        with pytest.raises(ValueError):
+            create_backend("redis")
+
+    def test_create_shared_memory_backend(self, tmp_path):
+        """Test creating a shared memory backend with a given table file."""
+        backend = create_backend(
+            "shared_memory", shm_path=str(tmp_path / "table"), shm_capacity=100
+        )
+        assert isinstance(backend, SharedMemoryBackend)
+        assert backend.capacity == 128
+        backend.close()
+
+    def test_create_unknown_backend(self):
+        """Test that unknown backend names are rejected."""
+        with pytest.raises(ValueError):
+            create_backend("unknown")
+
+
+class TestStandInRedisServer:
+    """Test cases for the in-process Redis stand-in."""
+
+    def test_basic_commands(self, redis_server):
+        """Test string, key space and expiry commands."""
+        client = redis.Redis.from_url(redis_server.url)
+        client.flushdb()
+
+        assert client.ping() is True
+        assert client.set("key", b"value") is True
+        assert client.get("key") == b"value"
+        assert client.mget(["key", "missing"]) == [b"value", None]
+        assert client.incrby("counter", 3) == 3
+        assert sorted(client.scan_iter(match="k*")) == [b"key"]
+        assert client.delete("key", "missing") == 1
+        assert client.get("key") is None
+
+        client.set("short", b"lived", px=1)
+        time.sleep(0.01)
+        assert client.get("short") is None
+        client.close()
+
+    def test_watch_aborts_conflicting_transaction(self, redis_server):
+        """Test that EXEC fails when a watched key changed."""
+        client = redis.Redis.from_url(redis_server.url)
+        other = redis.Redis.from_url(redis_server.url)
+        client.flushdb()
+
+        with client.pipeline() as pipe:
+            pipe.watch("key")
+            other.set("key", b"changed")
+            pipe.multi()
+            pipe.set("key", b"mine")
+            with pytest.raises(redis.WatchError):
+                pipe.execute()
+
+        assert client.get("key") == b"changed"
+        client.close()
+        other.close()
+
+    def test_scripts(self, redis_server):
+        """Test EVAL, EVALSHA and the NOSCRIPT error after a flush."""
+        client = redis.Redis.from_url(redis_server.url)
+        client.flushdb()
+        script = (
+            "redis.call('SET', KEYS[1], ARGV[1]); "
+            "return {redis.call('GET', KEYS[1]), 7}"
+        )
+
+        assert client.eval(script, 1, "key", "value") == [b"value", 7]
+        sha = client.script_load(script)
+        assert client.evalsha(sha, 1, "key", "other") == [b"other", 7]
+
+        client.script_flush()
+        with pytest.raises(redis.exceptions.NoScriptError):
+            client.evalsha(sha, 1, "key", "value")
+        client.close()
+
+
+class TestMemoryBackend:
+    """Test cases for the in-process backend."""
+
+    def test_hit_records_total_and_violations(self):
+        """Test that allowed and rejected hits are counted separately."""
+        backend = MemoryBackend()
+        strategy = SlidingWindowStrategy(QUOTAS)
+
+        results = [backend.hit("client", strategy, 1000.0) for _ in range(7)]
+
+        assert results.count(-1) == 5
+        client = backend.get("client", strategy)
+        assert client.total == 5
+        assert client.violations == 2
+
+    def test_decide_many_is_all_or_nothing(self):
+        """Test that a request rejected by a later level counts nowhere."""
+        backend = MemoryBackend()
+        client = SlidingWindowStrategy(QUOTAS)
+        subnet = SlidingWindowStrategy(
+            (Quota("minute", 3, 60), Quota("hour", 100, 3600))
+        )
+        levels = (("client", client), ("subnet", subnet))
+
+        for _ in range(3):
+            decisions = backend.decide_many(levels, 1000.0)
+            assert [exceeded for exceeded, _, _ in decisions] == [-1, -1]
+
+        decisions = backend.decide_many(levels, 1000.0)
+        assert len(decisions) == 2
+        assert decisions[1][0] == 0
+        assert decisions[1][2] > 0
+        assert decisions[0][1][0].remaining == 2
+
+        assert backend.get("client", client).total == 3
+        assert backend.get("client", client).violations == 0
+        assert backend.get("subnet", subnet).violations == 1
+
+    def test_decide_many_stops_at_first_rejection(self):
+        """Test that later levels are untouched once a level rejects."""
+        backend = MemoryBackend()
+        client = SlidingWindowStrategy((Quota("minute", 1, 60),))
+        subnet = SlidingWindowStrategy((Quota("minute", 10, 60),))
+        levels = (("client", client), ("subnet", subnet))
+
+        backend.decide_many(levels, 1000.0)
+        decisions = backend.decide_many(levels, 1000.0)
+
+        assert len(decisions) == 1
+        assert decisions[0][0] == 0
+        assert backend.get("subnet", subnet).total == 1
+
+    def test_get_returns_copy(self):
+        """Test that records returned by get cannot change stored state."""
+        backend = MemoryBackend()
+        strategy = GCRAStrategy(QUOTAS)
+        backend.hit("client", strategy, 1000.0)
+
+        copy = backend.get("client", strategy)
+        copy.state[0] = 0.0
+        copy.total = 100
+
+        assert backend.clients["client"].total == 1
+        assert backend.clients["client"].state[0] != 0.0
+
+    def test_capacity_evicts_least_recently_used(self):
+        """Test that a full table evicts the least recently seen client."""
+        backend = MemoryBackend(capacity=3)
+        strategy = GCRAStrategy(QUOTAS)
+
+        for client_id in ["a", "b", "c"]:
+            backend.hit(client_id, strategy, 1000.0)
+        backend.hit("a", strategy, 1001.0)  # "b" is now the oldest
+        backend.hit("d", strategy, 1002.0)
+
+        assert list(backend.clients) == ["c", "a", "d"]
+        assert backend.evictions == 1
+
+    def test_scan_cannot_grow_table_past_capacity(self):
+        """Test that many distinct addresses keep memory bounded."""
+        backend = MemoryBackend(capacity=100)
+        strategy = SlidingWindowStrategy(QUOTAS)
+
+        for i in range(10000):
+            backend.hit(f"10.0.{i // 256}.{i % 256}", strategy, 1000.0)
+
+        assert backend.client_count() == 100
+        assert backend.evictions == 9900
+
+    def test_sweep_drops_idle_clients(self):
+        """Test that clients idle longer than the TTL are removed."""
+        backend = MemoryBackend(idle_ttl=60)
+        strategy = GCRAStrategy(QUOTAS)
+
+        backend.hit("idle", strategy, 1000.0)
+        backend.hit("active", strategy, 1000.0)
+        backend.hit("active", strategy, 1050.0)
+
+        assert backend.sweep(1070.0) == 1
+        assert list(backend.clients) == ["active"]
+        assert backend.expirations == 1
+
+    def test_sweep_without_ttl_keeps_everything(self):
+        """Test that sweeping is a no-op without an idle TTL."""
+        backend = MemoryBackend()
+        backend.hit("client", GCRAStrategy(QUOTAS), 0.0)
+
+        assert backend.sweep(1e9) == 0
+        assert backend.client_count() == 1
+
+    def test_memory_stats(self):
+        """Test the memory gauges reported for monitoring."""
+        backend = MemoryBackend(capacity=10, idle_ttl=60)
+        strategy = SlidingWindowStrategy(QUOTAS)
+        assert backend.memory_stats()["approx_bytes"] == 0
+
+        for client_id in ["a", "b"]:
+            backend.hit(client_id, strategy, 1000.0)
+
+        stats = backend.memory_stats()
+        assert stats["tracked_clients"] == 2
+        assert stats["capacity"] == 10
+        assert stats["utilization"] == 0.2
+        assert stats["evictions"] == 0
+        assert stats["idle_ttl_seconds"] == 60
+        assert stats["approx_bytes"] > 0
+
+
+class TestMemoryBackendSnapshot:
+    """Test cases for saving and restoring the in-memory table."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that every record survives a save and load."""
+        path = str(tmp_path / "limits.snap")
+        strategy = SlidingWindowStrategy(QUOTAS)
+        now = time.time()
+        original = MemoryBackend()
+        for i, client_id in enumerate(["a", "b", "ünïcode"]):
+            for _ in range(i + 1):
+                original.hit(client_id, strategy, now)
+        original.hit("a", strategy, now + 1)
+
+        assert original.save_snapshot(path, strategy) == 3
+
+        restored = MemoryBackend()
+        assert restored.load_snapshot(path, strategy) == 3
+        assert list(restored.clients) == list(original.clients)
+        for client_id, client in original.clients.items():
+            copy = restored.clients[client_id]
+            assert copy.state == client.state
+            assert copy.total == client.total
+            assert copy.violations == client.violations
+            assert copy.last_seen == client.last_seen
+
+    def test_records_are_copied_before_writing(self, tmp_path):
+        """Test that hits after the copy do not reach the snapshot."""
+        path = str(tmp_path / "limits.snap")
+        strategy = SlidingWindowStrategy(QUOTAS)
+        backend = MemoryBackend()
+        backend.hit("a", strategy, 1000.0)
+
+        records = backend.snapshot_records()
+        backend.hit("a", strategy, 1000.0)
+        backend.hit("b", strategy, 1000.0)
+        assert backend.write_snapshot(path, strategy, records) == 1
+
+        restored = MemoryBackend()
+        restored.load_snapshot(path, strategy)
+        assert list(restored.clients) == ["a"]
+        assert restored.clients["a"].total == 1
+        assert restored.clients["a"].state == list(records[0][4])
+
+    def test_restored_client_stays_limited(self, tmp_path):
+        """Test that a restart does not hand out a fresh quota."""
+        path = str(tmp_path / "limits.snap")
+        strategy = GCRAStrategy(QUOTAS)
+        now = time.time()
+        backend = MemoryBackend()
+        for _ in range(5):
+            backend.hit("abuser", strategy, now)
+        backend.save_snapshot(path, strategy)
+
+        restarted = MemoryBackend()
+        restarted.load_snapshot(path, strategy)
+        assert restarted.hit("abuser", strategy, now + 0.5) == 0
+
+    def test_missing_file(self, tmp_path):
+        """Test that a first start without a snapshot restores nothing."""
+        backend = MemoryBackend()
+        strategy = GCRAStrategy(QUOTAS)
+        assert backend.load_snapshot(str(tmp_path / "none"), strategy) == 0
+
+    def test_other_strategy_is_ignored(self, tmp_path):
+        """Test that state from a different algorithm is not loaded."""
+        path = str(tmp_path / "limits.snap")
+        backend = MemoryBackend()
+        backend.hit("a", GCRAStrategy(QUOTAS), time.time())
+        backend.save_snapshot(path, GCRAStrategy(QUOTAS))
+
+        restored = MemoryBackend()
+        assert restored.load_snapshot(path, SlidingWindowStrategy(QUOTAS)) == 0
+        assert restored.client_count() == 0
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        """Test that a damaged snapshot is detected by its checksum."""
+        path = tmp_path / "limits.snap"
+        strategy = GCRAStrategy(QUOTAS)
+        backend = MemoryBackend()
+        backend.hit("a", strategy, time.time())
+        backend.save_snapshot(str(path), strategy)
+
+        data = bytearray(path.read_bytes())
+        data[60] ^= 0xFF
+        path.write_bytes(bytes(data))
+        assert MemoryBackend().load_snapshot(str(path), strategy) == 0
+
+        path.write_bytes(b"short")
+        assert MemoryBackend().load_snapshot(str(path), strategy) == 0
+
+    def test_idle_clients_and_capacity(self, tmp_path):
+        """Test that loading respects the idle TTL and the capacity."""
+        path = str(tmp_path / "limits.snap")
+        strategy = GCRAStrategy(QUOTAS)
+        now = time.time()
+        backend = MemoryBackend()
+        backend.hit("idle", strategy, now - 7200)
+        for client_id in ["old", "recent", "newest"]:
+            backend.hit(client_id, strategy, now)
+        backend.save_snapshot(path, strategy)
+
+        restored = MemoryBackend(capacity=2, idle_ttl=3600)
+        assert restored.load_snapshot(path, strategy) == 2
+        assert list(restored.clients) == ["recent", "newest"]
+
+    def test_large_table_loads_quickly(self, tmp_path):
+        """Test that reloading a full table does not hold up startup."""
+        path = str(tmp_path / "limits.snap")
+        strategy = SlidingWindowStrategy(QUOTAS)
+        now = time.time()
+        backend = MemoryBackend()
+        for i in range(50000):
+            backend.hit(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", strategy, now)
+        backend.save_snapshot(path, strategy)
+
+        restored = MemoryBackend()
+        start = time.perf_counter()
+        assert restored.load_snapshot(path, strategy) == 50000
+        assert time.perf_counter() - start < 2.0
+
+    def test_shared_backends_do_not_snapshot(self, redis_backend, tmp_path):
+        """Test that backends that outlive the process skip snapshots."""
+        path = tmp_path / "limits.snap"
+        strategy = GCRAStrategy(QUOTAS)
+        redis_backend.hit("a", strategy, time.time())
+
+        assert redis_backend.save_snapshot(str(path), strategy) == 0
+        assert not path.exists()
+
+    def test_rate_limiter_snapshot_and_checkpoints(self, tmp_path):
+        """Test the limiter's snapshot helpers and checkpoint task."""
+        import asyncio
+
+        path = str(tmp_path / "limits.snap")
+        limiter = RateLimiter(requests_per_minute=2)
+        limiter.check("203.0.113.1")
+        limiter.check("203.0.113.1")
+
+        async def checkpoint_briefly():
+            task = asyncio.create_task(limiter.run_checkpoints(path, 0.01))
+            await asyncio.sleep(0.1)
+            task.cancel()
+
+        asyncio.run(checkpoint_briefly())
+
+        restarted = RateLimiter(requests_per_minute=2)
+        assert restarted.load_snapshot(path) == 1
+        assert restarted.check("203.0.113.1").limited
+
+    def test_rate_limiter_load_never_raises(self, tmp_path):
+        """Test that an unreadable snapshot does not break startup."""
+        limiter = RateLimiter()
+        assert limiter.load_snapshot(str(tmp_path)) == 0  # A directory
+        assert limiter.save_snapshot(str(tmp_path / "missing" / "x")) == 0
+
+
+class TestRedisBackend:
+    """Test cases for the shared Redis backend."""
+
+    def test_hit_get_and_reset(self, redis_backend):
+        """Test the record lifecycle in Redis."""
+        strategy = SlidingWindowStrategy(QUOTAS)
+
+        for _ in range(6):
+            redis_backend.hit("client", strategy, 1000.0)
+
+        client = redis_backend.get("client", strategy)
+        assert client.total == 5
+        assert client.violations == 1
+        assert len(client.state) == strategy.state_size
+        assert redis_backend.client.ttl("ratelimit:client") == 3600
+
+        redis_backend.reset("client")
+        assert redis_backend.get("client", strategy) is None
+
+    @pytest.mark.parametrize("strategy_class", [SlidingWindowStrategy, GCRAStrategy])
+    def test_decide_matches_memory_backend(self, redis_backend, strategy_class):
+        """Test that decisions made by the script match local ones."""
+        strategy = strategy_class(QUOTAS)
+        memory = MemoryBackend()
+
+        for second in range(7):
+            now = 1000.0 + second
+            assert redis_backend.decide("client", strategy, now) == memory.decide(
+                "client", strategy, now
+            )
+
+        exceeded, statuses, retry_after = redis_backend.decide(
+            "client", strategy, 1010.0
+        )
+        assert exceeded == 0
+        assert statuses[0].remaining == 0
+        assert retry_after > 0
+
+    def test_decide_many(self, redis_backend):
+        """Test checking several records in one transaction."""
+        client = SlidingWindowStrategy(QUOTAS)
+        subnet = SlidingWindowStrategy((Quota("minute", 2, 60), Quota("hour", 9, 3600)))
+        levels = (("client", client), ("subnet", subnet))
+
+        results = [
+            [exceeded for exceeded, _, _ in redis_backend.decide_many(levels, 1000.0)]
+            for _ in range(3)
+        ]
+
+        assert results == [[-1, -1], [-1, -1], [-1, 0]]
+        assert redis_backend.get("subnet", subnet).violations == 1
+        # Both records change together, so the client did not count it either
+        assert redis_backend.get("client", client).total == 2
+
+    @pytest.mark.parametrize("strategy_class", [SlidingWindowStrategy, GCRAStrategy])
+    def test_decide_many_matches_memory_backend(self, redis_backend, strategy_class):
+        """Test that both levels are decided exactly as the local table does."""
+        client = strategy_class(QUOTAS)
+        subnet = strategy_class((Quota("minute", 3, 60),))
+        levels = (("client", client), ("subnet", subnet))
+        memory = MemoryBackend()
+
+        for second in range(6):
+            now = 1000.0 + second
+            assert redis_backend.decide_many(levels, now) == memory.decide_many(
+                levels, now
+            )
+
+    def test_contended_update_keeps_retrying(self, redis_backend, redis_server):
+        """Test that a record changed under a transaction is retried, not dropped."""
+        strategy = SlidingWindowStrategy(QUOTAS)
+        other = redis.Redis.from_url(redis_server.url)
+        attempts = []
+
+        def interfere(client):
+            attempts.append(client)
+            if len(attempts) < 12:
+                other.set("ratelimit:client", b"changed")
+            return client
+
+        redis_backend.update("client", strategy, interfere)
+        assert len(attempts) == 12
+        other.close()
+
+    def test_script_is_reloaded_after_flush(self, redis_backend):
+        """Test that decisions survive the server forgetting the script."""
+        strategy = SlidingWindowStrategy(QUOTAS)
+        redis_backend.hit("client", strategy, 1000.0)
+
+        redis_backend.client.script_flush()
+
+        assert redis_backend.hit("client", strategy, 1001.0) < 0
+        assert redis_backend.get("client", strategy).total == 2
+
+    def test_items_and_counts(self, redis_backend):
+        """Test monitoring helpers scan every record."""
+        strategy = GCRAStrategy(QUOTAS)
+        for client_id in ["a", "b", "c"]:
+            redis_backend.hit(client_id, strategy, 1000.0)
+
+        assert redis_backend.client_count() == 3
+        assert sorted(client_id for client_id, _ in redis_backend.items()) == [
+            "a",
+            "b",
+            "c",
+        ]
+
+        redis_backend.clear()
+        assert redis_backend.client_count() == 0
+
+    def test_state_from_other_strategy_is_ignored(self, redis_backend):
+        """Test that a record of the wrong size starts over."""
+        redis_backend.hit("client", SlidingWindowStrategy(QUOTAS), 1000.0)
+
+        assert redis_backend.get("client", GCRAStrategy(QUOTAS)) is None
+
+    def test_concurrent_hits_are_atomic(self, redis_backend, redis_server):
+        """Test that concurrent workers never exceed the limit together."""
+        strategy = SlidingWindowStrategy((Quota("minute", 20, 60),))
+        allowed = []
+
+        def worker():
+            backend = RedisBackend.from_url(redis_server.url)
+            for _ in range(10):
+                if backend.hit("client", strategy, 1000.0) < 0:
+                    allowed.append(1)
+            backend.client.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(allowed) == 20
+        client = redis_backend.get("client", strategy)
+        assert client.total == 20
+        assert client.violations == 30
+
+
+    def test_contended_hits_allow_exactly_the_limit(self, redis_backend, redis_server):
+        """Test that heavy contention neither over- nor under-admits requests."""
+        strategy = GCRAStrategy((Quota("minute", 20, 60),))
+        barrier = threading.Barrier(64)
+        allowed = []
+
+        def worker():
+            backend = RedisBackend.from_url(redis_server.url)
+            barrier.wait()
+            if backend.hit("client", strategy, 1000.0) < 0:
+                allowed.append(1)
+            backend.client.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(64)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(allowed) == 20
+        assert redis_backend.get("client", strategy).violations == 44
+
+def _shared_memory_worker(path, hits, results):
+    """Hit the shared table from a separate process."""
+    backend = SharedMemoryBackend(path, capacity=64)
+    strategy = SlidingWindowStrategy((Quota("minute", 50, 60),))
+    allowed = sum(backend.hit("client", strategy, 1000.0) < 0 for _ in range(hits))
+    results.put(allowed)
+    backend.close()
+
+
+class TestSharedMemoryBackend:
+    """Test cases for the memory-mapped backend."""
+
+    @pytest.fixture
+    def table_path(self, tmp_path):
+        return str(tmp_path / "rate-limit-table")
+
+    def test_hit_get_and_reset(self, table_path):
+        """Test the record lifecycle in the shared table."""
+        backend = SharedMemoryBackend(table_path, capacity=64)
+        strategy = SlidingWindowStrategy(QUOTAS)
+
+        for _ in range(7):
+            backend.hit("203.0.113.7", strategy, 1000.0)
+
+        client = backend.get("203.0.113.7", strategy)
+        assert client.total == 5
+        assert client.violations == 2
+        assert backend.client_count() == 1
+        assert [client_id for client_id, _ in backend.items()] == ["203.0.113.7"]
+
+        backend.reset("203.0.113.7")
+        assert backend.get("203.0.113.7", strategy) is None
+        assert backend.client_count() == 0
+        backend.close()
+
+    def test_table_size_is_fixed(self, table_path):
+        """Test that the table is preallocated and never grows."""
+        backend = SharedMemoryBackend(table_path, capacity=32)
+        size = backend._size
+        strategy = GCRAStrategy(QUOTAS)
+
+        for i in range(500):
+            backend.hit(f"client-{i}", strategy, 1000.0 + i)
+
+        assert backend.client_count() == 32
+        assert backend.evictions == 500 - 32
+        assert backend._size == size
+        assert backend.memory_stats()["utilization"] == 1.0
+        backend.close()
+
+    def test_full_group_evicts_least_recently_seen(self, table_path):
+        """Test that a full group replaces its least recently seen client."""
+        backend = SharedMemoryBackend(table_path, capacity=16)
+        strategy = GCRAStrategy(QUOTAS)
+
+        with patch("time.time", side_effect=[1000.0 + i for i in range(17)]):
+            for i in range(17):
+                backend.hit(f"client-{i}", strategy, 1000.0)
+
+        assert backend.get("client-0", strategy) is None
+        assert backend.get("client-16", strategy) is not None
+        assert backend.client_count() == 16
+        backend.close()
+
+    def test_instances_share_state(self, table_path):
+        """Test that two mappings of the same file see the same records."""
+        first = SharedMemoryBackend(table_path, capacity=64)
+        second = SharedMemoryBackend(table_path, capacity=64)
+        strategy = SlidingWindowStrategy(QUOTAS)
+
+        first.hit("client", strategy, 1000.0)
+        second.hit("client", strategy, 1000.0)
+
+        assert first.get("client", strategy).total == 2
+        first.close()
+        second.close()
+
+    def test_layout_change_reinitializes(self, table_path):
+        """Test that a table with a different capacity is rebuilt."""
+        strategy = SlidingWindowStrategy(QUOTAS)
+        first = SharedMemoryBackend(table_path, capacity=64)
+        first.hit("client", strategy, 1000.0)
+        first.close()
+
+        second = SharedMemoryBackend(table_path, capacity=256)
+        assert second.get("client", strategy) is None
+        second.close()
+
+    def test_layout_change_keeps_open_tables_working(self, table_path):
+        """Test that a table still mapped elsewhere is never resized under it."""
+        strategy = SlidingWindowStrategy(QUOTAS)
+        first = SharedMemoryBackend(table_path, capacity=65536)
+        first.hit("client", strategy, 1000.0)
+
+        second = SharedMemoryBackend(table_path, capacity=1024)
+        second.hit("other", strategy, 1000.0)
+
+        # Records at the far end of the first mapping are still readable
+        for number in range(2000):
+            first.hit(f"client-{number}", strategy, 1000.0)
+        first.hit("client", strategy, 1000.0)
+        assert first.get("client", strategy).total == 2
+        assert second.get("client", strategy) is None
+        first.close()
+        second.close()
+
+    def test_state_too_large_is_rejected(self, table_path):
+        """Test that strategies with oversized state are refused."""
+        backend = SharedMemoryBackend(table_path, capacity=16)
+        quotas = [Quota(f"q{i}", 10, 60) for i in range(5)]
+
+        with pytest.raises(ValueError):
+            backend.hit("client", SlidingWindowStrategy(quotas), 1000.0)
+        backend.close()
+
+    @pytest.mark.slow
+    def test_processes_share_one_limit(self, table_path):
+        """Test that separate worker processes enforce one combined limit."""
+        SharedMemoryBackend(table_path, capacity=64).close()
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_shared_memory_worker, args=(table_path, 40, results)
+            )
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        allowed = sum(results.get(timeout=60) for _ in processes)
+        for process in processes:
+            process.join()
+
+        assert allowed == 50
+        backend = SharedMemoryBackend(table_path, capacity=64)
+        client = backend.get("client", SlidingWindowStrategy((Quota("m", 50, 60),)))
+        assert client.total == 50
+        assert client.violations == 70
+        backend.close()
+
+
+class TestSharedRateLimiter:
+    """Test cases for several limiters sharing one backend."""
+
+    def test_workers_share_limits_and_stats(self, redis_server, redis_backend):
+        """Test that two workers enforce one combined limit."""
+        workers = [
+            RateLimiter(
+                requests_per_minute=4,
+                backend=RedisBackend.from_url(redis_server.url),
+            )
+            for _ in range(2)
+        ]
+        request = make_request()
+
+        results = [workers[i % 2].is_rate_limited(request).limited for i in range(6)]
+
+        assert results == [False, False, False, False, True, True]
+        for worker in workers:
+            stats = worker.get_client_stats("test_client")
+            assert stats["requests_last_minute"] == 4
+            assert stats["violations"] == 2
+
+            global_stats = worker.get_global_stats()
+            assert global_stats["backend"] == "redis"
+            assert global_stats["total_clients"] == 1
+            assert global_stats["total_violations"] == 2
+
+    def test_unreachable_backend_fails_open(self):
+        """Test that requests are allowed when the store is down."""
+        backend = RedisBackend.from_url("redis://127.0.0.1:1/0")
+        limiter = RateLimiter(requests_per_minute=1, backend=backend)
+
+        for _ in range(3):
+            assert not limiter.is_rate_limited(make_request()).limited
+
+        with pytest.raises(BackendUnavailableError):
+            backend.get("test_client", limiter.strategy)
+
+    def test_blocking_backend_runs_off_the_event_loop(self):
+        """Test that a network backend is never called on the loop's thread."""
+        threads = []
+
+        class NetworkBackend(MemoryBackend):
+            blocking = True
+
+            def decide(self, *args, **kwargs):
+                threads.append(threading.get_ident())
+                return super().decide(*args, **kwargs)
+
+        limiter = RateLimiter(requests_per_minute=1, backend=NetworkBackend())
+
+        async def check_twice():
+            loop_thread = threading.get_ident()
+            decisions = [await limiter.check_async("203.0.113.1") for _ in range(2)]
+            return loop_thread, decisions
+
+        loop_thread, decisions = asyncio.run(check_twice())
+
+        assert [decision.limited for decision in decisions] == [False, True]
+        assert len(threads) == 2
+        assert loop_thread not in threads
+
+    def test_configure_replaces_backend(self, redis_backend):
+        """Test swapping in a shared backend at configuration time."""
+        limiter = RateLimiter()
+        limiter._record_request("test_client", time.time())
+
+        limiter.configure(60, 1000, 10000, backend=redis_backend)
+
+        assert limiter.backend is redis_backend
+        assert limiter.get_client_stats("test_client")["total_requests"] == 0
+
+    def test_strategy_switch_keeps_shared_state_separate(self, redis_backend):
+        """Test that a strategy switch does not reuse incompatible state."""
+        limiter = RateLimiter(backend=redis_backend)
+        with patch("time.time", return_value=1000.0):
+            limiter.is_rate_limited(make_request())
+
+        limiter.configure(60, 1000, 10000, strategy="gcra")
+
+        assert limiter.get_client_stats("test_client")["total_requests"] == 0
@@ -0,0 +1,216 @@
+"""
+Unit tests for per-route rate limit policies
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from app.core.rate_limit_policies import (
+    DEFAULT_ROUTE_POLICIES,
+    RoutePolicy,
+    RouteTable,
+    parse_route_policies,
+)
+from app.core.rate_limiter import RateLimiter
+
+
+def make_request(path: str, method: str = "GET", host: str = "203.0.113.7"):
+    """Create a mock request for the given route."""
+    request = Mock()
+    request.method = method
+    request.url.path = path
+    request.headers = {}
+    request.client.host = host
+    return request
+
+
+class TestRouteTable:
+    """Test cases for compiled route lookups."""
+
+    def test_unmatched_route_uses_default_cost(self):
+        """Test that routes without a policy cost the default."""
+        table = RouteTable([RoutePolicy("/expensive", 5)])
+        assert table.cost("GET", "/cheap") == 1
+        assert RouteTable([], default_cost=3).cost("GET", "/cheap") == 3
+
+    def test_exact_route(self):
+        """Test that a literal path matches exactly."""
+        table = RouteTable([RoutePolicy("/expensive", 5)])
+        assert table.cost("GET", "/expensive") == 5
+        assert table.cost("GET", "/expensive/") == 1
+
+    def test_method_specific_costs(self):
+        """Test that policies can apply to some methods only."""
+        table = RouteTable(
+            [
+                RoutePolicy("/items", 2),
+                RoutePolicy("/items", 10, ("post", "PUT")),
+            ]
+        )
+        assert table.cost("GET", "/items") == 2
+        assert table.cost("POST", "/items") == 10
+        assert table.cost("PUT", "/items") == 10
+
+    def test_method_without_fallback_uses_default(self):
+        """Test that other methods fall back to the default cost."""
+        table = RouteTable([RoutePolicy("/login", 10, ("POST",))])
+        assert table.cost("POST", "/login") == 10
+        assert table.cost("GET", "/login") == 1
+
+    def test_template_routes(self):
+        """Test that path parameters match a single segment."""
+        table = RouteTable(
+            [
+                RoutePolicy("/posts/{slug}", 2),
+                RoutePolicy("/posts/{post_id}/publish", 7, ("POST",)),
+                RoutePolicy("/files/{name:path}", 3),
+            ]
+        )
+        assert table.cost("GET", "/posts/hello-world") == 2
+        assert table.cost("POST", "/posts/42/publish") == 7
+        assert table.cost("GET", "/posts/42/comments") == 1
+        assert table.cost("GET", "/files/a/b/c.txt") == 3
+
+    def test_exact_route_wins_over_template(self):
+        """Test that a literal path takes priority over a template."""
+        table = RouteTable(
+            [RoutePolicy("/posts/{slug}", 2), RoutePolicy("/posts/admin", 0)]
+        )
+        assert table.cost("GET", "/posts/admin") == 0
+        assert table.cost("GET", "/posts/other") == 2
+
+    def test_later_policy_overrides_earlier(self):
+        """Test that overrides appended to the defaults take effect."""
+        table = RouteTable([RoutePolicy("/health", 0), RoutePolicy("/health", 1)])
+        assert table.cost("GET", "/health") == 1
+
+    def test_template_special_characters_are_escaped(self):
+        """Test that regex characters in literal parts are not interpreted."""
+        table = RouteTable([RoutePolicy("/a.b/{id}", 4)])
+        assert table.cost("GET", "/a.b/1") == 4
+        assert table.cost("GET", "/axb/1") == 1
+
+    def test_negative_cost_rejected(self):
+        """Test that negative costs are rejected at compile time."""
+        with pytest.raises(ValueError):
+            RouteTable([RoutePolicy("/x", -1)])
+
+    def test_default_policies(self):
+        """Test the default costs for exempt and expensive routes."""
+        table = RouteTable(DEFAULT_ROUTE_POLICIES)
+        for path in ["/", "/health", "/docs", "/redoc", "/openapi.json"]:
+            assert table.cost("GET", path) == 0
+        assert table.cost("GET", "/api/v1/posts/") == 1
+        assert table.cost("POST", "/api/v1/subscribers/subscribe") > 1
+        assert table.cost("GET", "/api/v1/subscribers/status/a@example.com") > 1
+        assert table.cost("POST", "/api/v1/admin/login") > 1
+
+
+class TestParseRoutePolicies:
+    """Test cases for parsing policies from settings."""
+
+    def test_parse(self):
+        """Test parsing paths with and without methods."""
+        policies = parse_route_policies(
+            "POST /api/v1/subscribers/subscribe=50, /api/v1/posts/{slug}=2,"
+            "get|head /feed=3,"
+        )
+        assert policies == [
+            RoutePolicy("/api/v1/subscribers/subscribe", 50, ("POST",)),
+            RoutePolicy("/api/v1/posts/{slug}", 2, None),
+            RoutePolicy("/feed", 3, ("GET", "HEAD")),
+        ]
+
+    def test_parse_empty(self):
+        """Test that an empty setting yields no policies."""
+        assert parse_route_policies("") == []
+
+    @pytest.mark.parametrize(
+        "spec", ["/no-cost", "/bad=cost", "=5", "POST /a /b=1", "/neg=-1"]
+    )
+    def test_parse_invalid(self, spec):
+        """Test that malformed entries are rejected."""
+        with pytest.raises(ValueError):
+            parse_route_policies(spec)
+
+
+class TestRateLimiterRouteCosts:
+    """Test cases for cost-weighted limiting in the rate limiter."""
+
+    def test_expensive_route_uses_more_quota(self):
+        """Test that expensive requests exhaust the limit sooner."""
+        limiter = RateLimiter(
+            requests_per_minute=10,
+            route_policies=[RoutePolicy("/expensive", 5, ("POST",))],
+        )
+        request = make_request("/expensive", "POST")
+
+        assert not limiter.is_rate_limited(request).limited
+        assert not limiter.is_rate_limited(request).limited
+        decision = limiter.is_rate_limited(request)
+        assert decision.limited
+        assert "minute" in decision.reason
+
+    def test_expensive_route_does_not_block_cheap_reads(self):
+        """Test that a cheap read still fits after expensive requests."""
+        limiter = RateLimiter(
+            requests_per_minute=10,
+            route_policies=[RoutePolicy("/expensive", 9)],
+        )
+        assert not limiter.is_rate_limited(make_request("/expensive")).limited
+        assert not limiter.is_rate_limited(make_request("/cheap")).limited
+        assert limiter.is_rate_limited(make_request("/cheap")).limited
+
+    def test_exempt_route_is_not_tracked(self):
+        """Test that zero-cost routes never touch the backend."""
+        limiter = RateLimiter(requests_per_minute=1)
+        for _ in range(5):
+            assert not limiter.is_rate_limited(make_request("/health")).limited
+        assert limiter.backend.client_count() == 0
+
+    def test_cost_is_capped_at_smallest_quota(self):
+        """Test that a cost above the limit cannot block a route forever."""
+        limiter = RateLimiter(
+            requests_per_minute=5,
+            route_policies=[RoutePolicy("/expensive", 100)],
+        )
+        assert limiter.max_cost == 5
+        assert not limiter.is_rate_limited(make_request("/expensive")).limited
+        assert limiter.is_rate_limited(make_request("/expensive")).limited
+
+    def test_cost_counts_toward_usage(self):
+        """Test that client stats reflect the weighted usage."""
+        limiter = RateLimiter(route_policies=[RoutePolicy("/expensive", 4)])
+        limiter.is_rate_limited(make_request("/expensive"))
+
+        stats = limiter.get_client_stats("203.0.113.7")
+        assert stats["requests_last_minute"] == 4
+        assert stats["total_requests"] == 1
+
+    def test_configure_replaces_policies(self):
+        """Test that configure swaps the route table only when given one."""
+        limiter = RateLimiter()
+        assert limiter.route_cost(make_request("/health")) == 0
+
+        limiter.configure(60, 1000, 10000)
+        assert limiter.route_cost(make_request("/health")) == 0
+
+        limiter.configure(60, 1000, 10000, route_policies=[])
+        assert limiter.route_cost(make_request("/health")) == 1
+
+    def test_global_stats_list_policies(self):
+        """Test that the configured policies are reported."""
+        limiter = RateLimiter(route_policies=[RoutePolicy("/x", 3, ("POST",))])
+        assert limiter.get_global_stats()["route_policies"] == [
+            {"path": "/x", "methods": ["POST"], "cost": 3}
+        ]
+
+    def test_route_lookup_is_fast(self):
+        """Test that a lookup against the default table stays cheap."""
+        table = RouteTable(DEFAULT_ROUTE_POLICIES)
+        start = time.perf_counter()
+        for _ in range(10000):
+            table.cost("GET", "/api/v1/posts/some-post-slug")
+        assert time.perf_counter() - start < 0.5
@@ -9,10 +9,19 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.config import settings
-from app.core.rate_limiter import (RateLimiter, rate_limit_middleware,
+from app.core.ip_filter import TrustedProxies
+from app.core.rate_limit_strategies import (GCRAStrategy, Quota,
+                                            QuotaStatus,
+                                            SlidingWindowStrategy,
+                                            create_strategy)
+from app.core.rate_limiter import (RateLimitDecision, RateLimiter,
+                                   RateLimitMiddleware, rate_limit_middleware,
                                    rate_limiter)
 from app.main import app
 
+# Midnight UTC, so minute, hour and day windows all start here
+WINDOW_ORIGIN = 1_700_006_400.0
+
 
 class TestRateLimiter:
     """Test cases for RateLimiter class."""
@@ -23,7 +32,6 @@ class TestRateLimiter:
         assert limiter.requests_per_minute == 60
         assert limiter.requests_per_hour == 1000
         assert limiter.requests_per_day == 10000
-        assert limiter.window_size_seconds == 60
 
     def test_rate_limiter_custom_initialization(self):
         """Test rate limiter initialization with custom values."""
@@ -31,12 +39,10 @@ class TestRateLimiter:
             requests_per_minute=30,
             requests_per_hour=500,
             requests_per_day=5000,
-            window_size_seconds=30,
         )
         assert limiter.requests_per_minute == 30
         assert limiter.requests_per_hour == 500
         assert limiter.requests_per_day == 5000
-        assert limiter.window_size_seconds == 30
 
     def test_rate_limiter_test_mode_initialization(self):
         """Test rate limiter initialization in test mode."""
@@ -70,188 +76,447 @@ class TestRateLimiter:
         request.client = None
         assert limiter._get_client_identifier(request) == "unknown"
 
-    def test_cleanup_old_requests(self):
-        """Test cleanup of old requests outside the window."""
-        limiter = RateLimiter(window_size_seconds=60)
-        client_id = "test_client"
-        current_time = time.time()
+    def test_rate_limiter_strategy_selection(self):
+        """Test selecting the rate limiting algorithm by name."""
+        assert RateLimiter().strategy.name == "sliding_window"
+        assert RateLimiter(strategy="gcra").strategy.name == "gcra"
 
-        # Add requests at different times
-        limiter.client_requests[client_id] = [
-            current_time - 120,  # 2 minutes ago (should be removed)
-            current_time - 30,  # 30 seconds ago (should remain)
-            current_time - 10,  # 10 seconds ago (should remain)
-        ]
-
-        limiter._cleanup_old_requests(client_id, current_time)
-
-        # Should only have 2 requests remaining
-        assert len(limiter.client_requests[client_id]) == 2
-        assert current_time - 30 in limiter.client_requests[client_id]
-        assert current_time - 10 in limiter.client_requests[client_id]
-
-    def test_check_rate_limit(self):
-        """Test rate limit checking logic."""
-        limiter = RateLimiter(requests_per_minute=2)
-        client_id = "test_client"
-        current_time = time.time()
+        with pytest.raises(ValueError):
+            RateLimiter(strategy="unknown")
+
+    def test_configure_switching_strategy_clears_state(self):
+        """Test that state from one algorithm is not reused by another."""
+        limiter = RateLimiter()
+        limiter._record_request("test_client", time.time())
+
+        limiter.configure(60, 1000, 10000, strategy="sliding_window")
+        assert "test_client" in limiter.backend.clients
 
-        # Add requests within the window
-        limiter.client_requests[client_id] = [
-            current_time - 30,  # 30 seconds ago
-            current_time - 10,  # 10 seconds ago
-        ]
+        limiter.configure(60, 1000, 10000, strategy="gcra", burst=5)
+        assert limiter.backend.clients == {}
+        assert limiter.strategy.quotas[0].burst == 5
 
-        # Should be at the limit
-        assert limiter._check_rate_limit(client_id, current_time, 2, 60) is True
+    def test_client_state_constant_memory(self):
+        """Test that client state does not grow with the number of requests."""
+        limiter = RateLimiter(requests_per_minute=100000)
+        client_id = "test_client"
 
-        # Add one more request - should exceed limit
-        limiter.client_requests[client_id].append(current_time - 5)
-        assert limiter._check_rate_limit(client_id, current_time, 2, 60) is True
+        for i in range(1000):
+            limiter._record_request(client_id, WINDOW_ORIGIN + i * 0.01)
 
-        # Remove one request - should be under limit
-        limiter.client_requests[client_id] = [current_time - 30]
-        assert limiter._check_rate_limit(client_id, current_time, 2, 60) is False
+        client = limiter.backend.clients[client_id]
+        assert len(client.state) == limiter.strategy.state_size
+        assert client.total == 1000
+        assert not hasattr(client, "__dict__")
 
     def test_is_rate_limited_minute_limit(self):
         """Test rate limiting for minute limit."""
         # Create a rate limiter NOT in test mode for explicit testing
         limiter = RateLimiter(requests_per_minute=2, test_mode=False)
         request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
         request.headers = {}
         request.client = Mock()
         request.client.host = "test_client"
 
         # First request - should not be limited
-        is_limited, reason = limiter.is_rate_limited(request)
-        assert is_limited is False
-        assert reason is None
+        decision = limiter.is_rate_limited(request)
+        assert decision.limited is False
+        assert decision.reason is None
 
         # Second request - should not be limited
-        is_limited, reason = limiter.is_rate_limited(request)
-        assert is_limited is False
-        assert reason is None
+        decision = limiter.is_rate_limited(request)
+        assert decision.limited is False
+        assert decision.reason is None
 
         # Third request - should be limited
-        is_limited, reason = limiter.is_rate_limited(request)
-        assert is_limited is True
-        assert "minute" in reason
+        decision = limiter.is_rate_limited(request)
+        assert decision.limited is True
+        assert "minute" in decision.reason
 
     def test_is_rate_limited_hour_limit(self):
         """Test rate limiting for hour limit."""
         # Create a rate limiter NOT in test mode for explicit testing
         limiter = RateLimiter(requests_per_hour=3, test_mode=False)
         request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
         request.headers = {}
         request.client = Mock()
         request.client.host = "test_client"
 
-        # Add requests within the hour
+        # Spread requests over several minutes so only the hour limit applies
         for i in range(3):
-            limiter.client_requests["test_client"].append(time.time() - (i * 10))
+            with patch("time.time", return_value=WINDOW_ORIGIN + i * 300):
+                decision = limiter.is_rate_limited(request)
+            assert decision.limited is False
 
         # Next request should be limited
-        is_limited, reason = limiter.is_rate_limited(request)
-        assert is_limited is True
-        assert "hour" in reason
+        with patch("time.time", return_value=WINDOW_ORIGIN + 1000):
+            decision = limiter.is_rate_limited(request)
+        assert decision.limited is True
+        assert "hour" in decision.reason
 
     def test_is_rate_limited_day_limit(self):
         """Test rate limiting for day limit."""
         # Create a rate limiter NOT in test mode for explicit testing
-        limiter = RateLimiter(
-            requests_per_day=5, window_size_seconds=86400, test_mode=False
-        )
+        limiter = RateLimiter(requests_per_day=5, test_mode=False)
         request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
         request.headers = {}
         request.client = Mock()
         request.client.host = "test_client"
 
-        # Add requests within the day (86400 seconds = 1 day)
-        current_time = time.time()
+        # Add requests within the day, each in a different hour
         for i in range(5):
-            limiter.client_requests["test_client"].append(current_time - (i * 1000))
+            limiter._record_request("test_client", WINDOW_ORIGIN + i * 4000)
+
+        current_time = WINDOW_ORIGIN + 30000
+        state = limiter.backend.clients["test_client"].state
 
         # Check the rate limit directly without adding the current request
-        is_limited = limiter._check_rate_limit("test_client", current_time, 5, 86400)
-        assert is_limited is True
+        assert limiter.strategy.check(state, current_time) == 2
 
         # Now test the full method
-        is_limited, reason = limiter.is_rate_limited(request)
-        assert is_limited is True
-        assert "day" in reason
+        with patch("time.time", return_value=current_time):
+            decision = limiter.is_rate_limited(request)
+        assert decision.limited is True
+        assert "day" in decision.reason
 
     def test_is_rate_limited_test_mode_disabled(self):
         """Test that rate limiting is disabled in test mode."""
         # Create a rate limiter in test mode
         limiter = RateLimiter(requests_per_minute=1, test_mode=True)
         request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
         request.headers = {}
         request.client = Mock()
         request.client.host = "test_client"
 
         # Make multiple requests - should never be limited in test mode
         for i in range(10):
-            is_limited, reason = limiter.is_rate_limited(request)
-            assert is_limited is False
-            assert reason is None
+            decision = limiter.is_rate_limited(request)
+            assert decision.limited is False
+            assert decision.reason is None
 
     def test_get_client_stats(self):
         """Test client statistics retrieval."""
         limiter = RateLimiter()
         client_id = "test_client"
-        current_time = time.time()
+        current_time = WINDOW_ORIGIN + 3030
 
         # Add requests at different times
-        limiter.client_requests[client_id] = [
-            current_time - 30,  # 30 seconds ago (within minute)
-            current_time - 1800,  # 30 minutes ago (within hour)
-            current_time - 7200,  # 2 hours ago (within day)
-            current_time - 90000,  # 25 hours ago (outside day)
-        ]
+        for request_time in [
+            WINDOW_ORIGIN - 90000,  # 25 hours ago (outside day)
+            WINDOW_ORIGIN + 130,  # within day and hour
+            WINDOW_ORIGIN + 1230,  # within day and hour
+            WINDOW_ORIGIN + 3010,  # within minute
+        ]:
+            limiter._record_request(client_id, request_time)
 
-        limiter.violations[client_id] = 2
+        limiter.backend.clients[client_id].violations = 2
 
-        stats = limiter.get_client_stats(client_id)
+        with patch("time.time", return_value=current_time):
+            stats = limiter.get_client_stats(client_id)
 
         assert stats["client_id"] == client_id
         assert stats["requests_last_minute"] == 1
-        assert stats["requests_last_hour"] == 2
+        assert stats["requests_last_hour"] == 3
         assert stats["requests_last_day"] == 3
         assert stats["total_requests"] == 4
         assert stats["violations"] == 2
         assert "limits" in stats
 
+    def test_get_client_stats_unknown_client(self):
+        """Test that stats for an unknown client do not create state."""
+        limiter = RateLimiter()
+
+        stats = limiter.get_client_stats("unknown_client")
+
+        assert stats["requests_last_minute"] == 0
+        assert stats["total_requests"] == 0
+        assert "unknown_client" not in limiter.backend.clients
+
     def test_get_global_stats(self):
         """Test global statistics retrieval."""
         limiter = RateLimiter()
 
         # Add some test data
-        limiter.client_requests["client1"] = [time.time()]
-        limiter.client_requests["client2"] = [time.time()]
-        limiter.violations["client1"] = 1
-        limiter.violations["client2"] = 2
+        limiter._record_request("client1", time.time())
+        limiter._record_request("client2", time.time())
+        limiter.backend.clients["client1"].violations = 1
+        limiter.backend.clients["client2"].violations = 2
 
         stats = limiter.get_global_stats()
 
         assert stats["total_clients"] == 2
         assert stats["total_violations"] == 3
+        assert stats["memory"]["tracked_clients"] == 2
+        assert stats["memory"]["capacity"] is not None
         assert "limits" in stats
 
+    def test_run_sweeper_removes_idle_clients(self):
+        """Test the background sweeper drops idle clients."""
+        import asyncio
+
+        limiter = RateLimiter()
+        limiter.backend.idle_ttl = 60
+        limiter._record_request("idle_client", time.time() - 120)
+        limiter.backend.clients["idle_client"].last_seen = time.time() - 120
+
+        async def run_briefly():
+            task = asyncio.create_task(limiter.run_sweeper(0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(run_briefly())
+
+        assert "idle_client" not in limiter.backend.clients
+
     def test_reset_client(self):
         """Test client reset functionality."""
         limiter = RateLimiter()
         client_id = "test_client"
 
         # Add some data
-        limiter.client_requests[client_id] = [time.time()]
-        limiter.violations[client_id] = 5
+        limiter._record_request(client_id, time.time())
+        limiter.backend.clients[client_id].violations = 5
 
         # Reset client
         limiter.reset_client(client_id)
 
         # Check that data is removed
-        assert client_id not in limiter.client_requests
-        assert client_id not in limiter.violations
+        assert client_id not in limiter.backend.clients
+
+
+class TestRateLimitStrategies:
+    """Test cases for the rate limiting algorithms."""
+
+    quotas = (Quota("minute", 2, 60), Quota("hour", 3, 3600))
+
+    def test_create_strategy(self):
+        """Test creating strategies by name."""
+        assert isinstance(
+            create_strategy("sliding_window", self.quotas), SlidingWindowStrategy
+        )
+        assert isinstance(create_strategy("gcra", self.quotas), GCRAStrategy)
+
+        with pytest.raises(ValueError):
+            create_strategy("unknown", self.quotas)
+
+    def test_state_size(self):
+        """Test that state is a fixed number of floats per quota."""
+        assert len(SlidingWindowStrategy(self.quotas).new_state()) == 6
+        assert len(GCRAStrategy(self.quotas).new_state()) == 2
+
+    def test_sliding_window_rollover(self):
+        """Test that windows roll over and weight the previous bucket."""
+        strategy = SlidingWindowStrategy([Quota("minute", 10, 60)])
+        state = strategy.new_state()
+
+        strategy.consume(state, WINDOW_ORIGIN + 10)
+        strategy.consume(state, WINDOW_ORIGIN + 20)
+        assert strategy.usage(state, WINDOW_ORIGIN + 30) == [2]
+
+        # Halfway through the next window, half of the previous bucket counts
+        strategy.consume(state, WINDOW_ORIGIN + 65)
+        assert strategy.usage(state, WINDOW_ORIGIN + 90) == [pytest.approx(2)]
+
+        # After a full idle window nothing overlaps any more
+        assert strategy.usage(state, WINDOW_ORIGIN + 300) == [0]
+
+    def test_sliding_window_hit(self):
+        """Test that hits are only recorded while under every quota."""
+        strategy = SlidingWindowStrategy(self.quotas)
+        state = strategy.new_state()
+
+        assert strategy.hit(state, WINDOW_ORIGIN + 1) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN + 2) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN + 3) == 0  # minute quota
+
+        # Next minute: the minute quota has room but the hour quota does not
+        assert strategy.hit(state, WINDOW_ORIGIN + 130) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN + 131) == 1
+        assert strategy.usage(state, WINDOW_ORIGIN + 131)[1] == 3
+
+    def test_sliding_window_cost(self):
+        """Test that a request can consume several units at once."""
+        strategy = SlidingWindowStrategy([Quota("minute", 5, 60)])
+        state = strategy.new_state()
+
+        assert strategy.hit(state, WINDOW_ORIGIN, cost=4) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN, cost=2) == 0
+        assert strategy.hit(state, WINDOW_ORIGIN, cost=1) == -1
+
+    def test_sliding_window_status(self):
+        """Test remaining units and reset times for the sliding window."""
+        strategy = SlidingWindowStrategy([Quota("minute", 10, 60)])
+        state = strategy.new_state()
+        for _ in range(3):
+            strategy.hit(state, WINDOW_ORIGIN + 10)
+
+        assert strategy.status(state, WINDOW_ORIGIN + 10) == [QuotaStatus(7, 50)]
+
+    def test_sliding_window_retry_after(self):
+        """Test that the retry delay is exactly when the request first fits."""
+        strategy = SlidingWindowStrategy([Quota("minute", 2, 60)])
+        state = strategy.new_state()
+        strategy.hit(state, WINDOW_ORIGIN)
+        strategy.hit(state, WINDOW_ORIGIN + 1)
+        assert strategy.hit(state, WINDOW_ORIGIN + 2) == 0
+
+        # Half of the first window has to slide out in the next one
+        retry_after = strategy.retry_after(state, WINDOW_ORIGIN + 2)
+        assert retry_after == pytest.approx(88)
+        assert strategy.check(state, WINDOW_ORIGIN + 2 + retry_after - 1) == 0
+        assert strategy.check(state, WINDOW_ORIGIN + 2 + retry_after) == -1
+
+    def test_sliding_window_retry_after_within_window(self):
+        """Test the retry delay while the previous window slides out."""
+        strategy = SlidingWindowStrategy([Quota("minute", 4, 60)])
+        state = strategy.new_state()
+        for _ in range(4):
+            strategy.hit(state, WINDOW_ORIGIN)
+        assert strategy.hit(state, WINDOW_ORIGIN + 60) == 0
+
+        # Estimate is 4 * (1 - elapsed / 60); one unit fits once it is 3
+        retry_after = strategy.retry_after(state, WINDOW_ORIGIN + 60)
+        assert retry_after == pytest.approx(15)
+        assert strategy.retry_after(state, WINDOW_ORIGIN + 75) == 0.0
+
+    def test_gcra_status_and_retry_after(self):
+        """Test remaining units, reset and retry delay for GCRA."""
+        strategy = GCRAStrategy([Quota("minute", 2, 60)])
+        state = strategy.new_state()
+        assert strategy.status(state, WINDOW_ORIGIN) == [QuotaStatus(2, 0.0)]
+
+        strategy.hit(state, WINDOW_ORIGIN)
+        assert strategy.status(state, WINDOW_ORIGIN) == [QuotaStatus(1, 30.0)]
+
+        strategy.hit(state, WINDOW_ORIGIN)
+        assert strategy.hit(state, WINDOW_ORIGIN) == 0
+        assert strategy.status(state, WINDOW_ORIGIN) == [QuotaStatus(0, 60.0)]
+        assert strategy.retry_after(state, WINDOW_ORIGIN) == pytest.approx(30)
+        assert strategy.check(state, WINDOW_ORIGIN + 30) == -1
+
+    def test_gcra_burst_then_steady_rate(self):
+        """Test that GCRA allows a burst and then one request per interval."""
+        strategy = GCRAStrategy([Quota("minute", 60, 60, burst=3)])
+        state = strategy.new_state()
+
+        for _ in range(3):
+            assert strategy.hit(state, WINDOW_ORIGIN) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN) == 0
+
+        # One token is emitted every second
+        assert strategy.hit(state, WINDOW_ORIGIN + 1) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN + 1) == 0
+
+    def test_gcra_default_burst_is_limit(self):
+        """Test that GCRA allows the full limit back to back by default."""
+        strategy = GCRAStrategy([Quota("minute", 5, 60)])
+        state = strategy.new_state()
+
+        for _ in range(5):
+            assert strategy.hit(state, WINDOW_ORIGIN) == -1
+        assert strategy.hit(state, WINDOW_ORIGIN) == 0
+        assert strategy.usage(state, WINDOW_ORIGIN) == [pytest.approx(5)]
+
+        # Fully drained after one period
+        assert strategy.usage(state, WINDOW_ORIGIN + 60) == [0]
+
+    def test_gcra_denied_hit_does_not_change_state(self):
+        """Test that a rejected request leaves the GCRA state untouched."""
+        strategy = GCRAStrategy(self.quotas)
+        state = strategy.new_state()
+
+        for second in range(3):
+            strategy.hit(state, WINDOW_ORIGIN + second)
+        before = list(state)
+
+        assert strategy.hit(state, WINDOW_ORIGIN + 3) >= 0
+        assert state == before
+
+    def test_gcra_rate_limiter_integration(self):
+        """Test that the limiter enforces limits with the GCRA strategy."""
+        limiter = RateLimiter(requests_per_minute=2, strategy="gcra")
+        request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
+        request.headers = {}
+        request.client = Mock()
+        request.client.host = "test_client"
+
+        with patch("time.time", return_value=WINDOW_ORIGIN):
+            assert limiter.is_rate_limited(request).limited is False
+            assert limiter.is_rate_limited(request).limited is False
+            decision = limiter.is_rate_limited(request)
+
+        assert decision.limited is True
+        assert "minute" in decision.reason
+        assert limiter.backend.clients["test_client"].violations == 1
+
+
+class TestRateLimitDecision:
+    """Test cases for rate limit decisions."""
+
+    def test_decision_holds_remaining_quota(self):
+        """Test that a decision reports the quota left after the request."""
+        limiter = RateLimiter(requests_per_minute=5, strategy="gcra")
+        request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
+        request.headers = {}
+        request.client.host = "test_client"
+
+        with patch("time.time", return_value=WINDOW_ORIGIN):
+            decision = limiter.is_rate_limited(request)
+
+        assert decision.limited is False
+        assert decision.client_id == "test_client"
+        assert decision.statuses[0] == QuotaStatus(4, 12.0)
+        headers = decision.headers()
+        assert headers["X-RateLimit-Limit-Minute"] == "5"
+        assert headers["X-RateLimit-Remaining-Minute"] == "4"
+        assert headers["X-RateLimit-Reset-Minute"] == "12"
+        assert "Retry-After" not in headers
+
+    def test_limited_decision_has_accurate_retry_after(self):
+        """Test that Retry-After reflects when the client may retry."""
+        limiter = RateLimiter(requests_per_minute=2, strategy="gcra")
+        request = Mock()
+        request.method = "GET"
+        request.url.path = "/api/v1/posts"
+        request.headers = {}
+        request.client.host = "test_client"
+
+        with patch("time.time", return_value=WINDOW_ORIGIN):
+            limiter.is_rate_limited(request)
+            limiter.is_rate_limited(request)
+            decision = limiter.is_rate_limited(request)
+
+        assert decision.limited is True
+        assert decision.retry_after == pytest.approx(30)
+        assert decision.headers()["Retry-After"] == "30"
+        assert decision.headers()["X-RateLimit-Remaining-Minute"] == "0"
+
+    def test_retry_after_is_at_least_one_second(self):
+        """Test that a fractional delay is rounded up, never to zero."""
+        decision = RateLimitDecision(
+            True, "limited", "c", (Quota("minute", 1, 60),),
+            [QuotaStatus(0, 0.2)], 0.2,
+        )
+        assert decision.retry_after_seconds == 1
+
+    def test_test_mode_decision_reports_full_quota(self):
+        """Test that uncounted requests report untouched limits."""
+        limiter = RateLimiter(requests_per_minute=7, test_mode=True)
+        decision = limiter.is_rate_limited(Mock())
+        assert decision.limited is False
+        assert decision.headers()["X-RateLimit-Remaining-Minute"] == "7"
 
 
 class TestRateLimitMiddleware:
@@ -261,6 +526,7 @@ class TestRateLimitMiddleware:
         """Test that middleware skips health check and documentation endpoints."""
         request = Mock()
         request.url.path = "/health"
+        request.headers = {}
         request.client = Mock()
         request.client.host = "test_client"
 
@@ -284,12 +550,13 @@ class TestRateLimitMiddleware:
         with patch("app.core.rate_limiter.rate_limiter", test_limiter):
             request = Mock()
             request.url.path = "/api/v1/posts"
+            request.headers = {}
             request.client = Mock()
             request.client.host = "test_client"
 
             # Add a request to trigger rate limiting - use the same client identifier
             client_id = test_limiter._get_client_identifier(request)
-            test_limiter.client_requests[client_id] = [time.time() - 10]
+            test_limiter._record_request(client_id, time.time())
 
             call_next = AsyncMock()
             call_next.return_value = Mock()
@@ -307,16 +574,16 @@ class TestRateLimitMiddleware:
     def test_middleware_adds_rate_limit_headers(self):
         """Test that middleware adds rate limit headers to responses."""
         with patch("app.core.rate_limiter.rate_limiter") as mock_limiter:
-            mock_limiter.is_rate_limited.return_value = (False, None)
-            mock_limiter._get_client_identifier.return_value = "test_client"
-            mock_limiter.get_client_stats.return_value = {
-                "requests_last_minute": 5,
-                "requests_last_hour": 50,
-                "requests_last_day": 500,
-            }
-            mock_limiter.requests_per_minute = 60
-            mock_limiter.requests_per_hour = 1000
-            mock_limiter.requests_per_day = 10000
+            mock_limiter.route_cost.return_value = 1
+            mock_limiter.check_async = AsyncMock(return_value=RateLimitDecision(
+                False,
+                None,
+                "test_client",
+                (Quota("minute", 60, 60), Quota("hour", 1000, 3600),
+                 Quota("day", 10000, 86400)),
+                [QuotaStatus(55, 12.5), QuotaStatus(950, 1200),
+                 QuotaStatus(9500, 40000)],
+            ))
 
             request = Mock()
             request.url.path = "/api/v1/posts"
@@ -340,6 +607,111 @@ class TestRateLimitMiddleware:
             assert "X-RateLimit-Remaining-Minute" in response.headers
             assert response.headers["X-RateLimit-Limit-Minute"] == "60"
             assert response.headers["X-RateLimit-Remaining-Minute"] == "55"
+            assert response.headers["X-RateLimit-Reset-Minute"] == "13"
+            assert "Retry-After" not in response.headers
+
+            # The decision already carries the stats, so none are looked up
+            mock_limiter.get_client_stats.assert_not_called()
+
+
+class TestRateLimitASGIMiddleware:
+    """Test cases for the pure ASGI rate limiting middleware."""
+
+    @staticmethod
+    def make_client(limiter):
+        """Create a test client for a small app behind the middleware."""
+        from fastapi import FastAPI
+
+        test_app = FastAPI()
+
+        @test_app.get("/items")
+        async def items():
+            return {"items": []}
+
+        @test_app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        test_app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        return TestClient(test_app)
+
+    def test_adds_headers_to_allowed_responses(self):
+        """Test that headers are injected into the response start message."""
+        client = self.make_client(RateLimiter(requests_per_minute=5))
+
+        response = client.get("/items")
+
+        assert response.status_code == 200
+        assert response.json() == {"items": []}
+        assert response.headers["X-RateLimit-Limit-Minute"] == "5"
+        assert response.headers["X-RateLimit-Remaining-Minute"] == "4"
+        assert "X-RateLimit-Reset-Day" in response.headers
+        assert response.headers["content-type"] == "application/json"
+
+    def test_rejects_with_accurate_retry_after(self):
+        """Test that the middleware answers 429 itself once limited."""
+        client = self.make_client(
+            RateLimiter(requests_per_minute=2, strategy="gcra")
+        )
+
+        with patch("time.time", return_value=WINDOW_ORIGIN):
+            assert client.get("/items").status_code == 200
+            assert client.get("/items").status_code == 200
+            response = client.get("/items")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+        assert response.json()["retry_after"] == 30
+        assert "minute" in response.json()["detail"]
+
+    def test_exempt_routes_have_no_headers(self):
+        """Test that zero-cost routes pass straight through."""
+        limiter = RateLimiter(requests_per_minute=1)
+        client = self.make_client(limiter)
+
+        for _ in range(3):
+            response = client.get("/health")
+            assert response.status_code == 200
+            assert "X-RateLimit-Limit-Minute" not in response.headers
+        assert limiter.backend.client_count() == 0
+
+    def test_uses_forwarded_client_address(self):
+        """Test that proxy headers identify the client, as for requests."""
+        limiter = RateLimiter(requests_per_minute=5)
+        client = self.make_client(limiter)
+
+        client.get("/items", headers={"X-Forwarded-For": "198.51.100.9"})
+        client.get("/items", headers={"X-Real-IP": "198.51.100.10"})
+
+        assert set(limiter.backend.clients) == {"198.51.100.9", "198.51.100.10"}
+
+    def test_scope_identifier_matches_request_identifier(self):
+        """Test that scope parsing follows the same precedence rules."""
+        limiter = RateLimiter(trusted_proxies=TrustedProxies(["10.0.0.0/8"]))
+        scope = {
+            "type": "http",
+            "headers": [(b"x-real-ip", b"10.0.0.2"), (b"x-forwarded-for", b"10.0.0.1")],
+            "client": ("10.0.0.3", 1234),
+        }
+        assert limiter._get_scope_client_identifier(scope) == "10.0.0.1"
+
+        scope["headers"] = []
+        assert limiter._get_scope_client_identifier(scope) == "10.0.0.3"
+
+        scope["client"] = None
+        assert limiter._get_scope_client_identifier(scope) == "unknown"
+
+    def test_non_http_scopes_pass_through(self):
+        """Test that lifespan and websocket scopes are not rate limited."""
+        import asyncio
+
+        inner = AsyncMock()
+        middleware = RateLimitMiddleware(inner, limiter=RateLimiter())
+        scope = {"type": "lifespan"}
+
+        asyncio.run(middleware(scope, None, None))
+
+        inner.assert_called_once_with(scope, None, None)
 
 
 class TestRateLimitIntegration:
@@ -454,8 +826,7 @@ class TestRateLimitAdminEndpoints:
         assert "violations" in client_stats
 
         # Test reset_client
-        limiter.client_requests["test_client"] = [time.time()]
-        limiter.violations["test_client"] = 5
+        limiter._record_request("test_client", time.time())
+        limiter.backend.clients["test_client"].violations = 5
         limiter.reset_client("test_client")
-        assert "test_client" not in limiter.client_requests
-        assert "test_client" not in limiter.violations
+        assert "test_client" not in limiter.backend.clients
@@ -0,0 +1,196 @@
+"""
+Unit tests for read replica routing
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.replicas import (
+    PRIMARY_COOKIE,
+    ReadYourWritesMiddleware,
+    ReplicaRouter,
+    wrote_recently,
+)
+from app.database import Base
+from app.models import Category
+
+
+def make_replica_engine(path):
+    """Create an async engine on a SQLite file."""
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+
+def make_router(*engines, eject_seconds=30.0):
+    """Create a router over the given replica engines."""
+    router = ReplicaRouter(eject_seconds=eject_seconds, timeout=1.0)
+    for index, engine in enumerate(engines):
+        router.add(f"replica-{index}", engine, async_sessionmaker(engine))
+    return router
+
+
+class TestReplicaRouter:
+    """Test cases for choosing and ejecting replicas."""
+
+    def test_no_replicas_uses_primary(self):
+        """Test that reads go to the primary without replicas."""
+        assert ReplicaRouter().choose() is None
+
+    def test_round_robin(self, tmp_path):
+        """Test that reads are spread over the replicas in turn."""
+        router = make_router(
+            make_replica_engine(tmp_path / "a.db"),
+            make_replica_engine(tmp_path / "b.db"),
+        )
+        names = [router.choose().name for _ in range(4)]
+        assert names == ["replica-0", "replica-1", "replica-0", "replica-1"]
+
+    def test_ejected_replica_is_skipped(self, tmp_path):
+        """Test that an ejected replica gets no reads until it is back."""
+        router = make_router(
+            make_replica_engine(tmp_path / "a.db"),
+            make_replica_engine(tmp_path / "b.db"),
+        )
+        router.eject(router.replicas[0], ConnectionError("refused"))
+
+        assert {router.choose().name for _ in range(4)} == {"replica-1"}
+        stats = router.get_stats()
+        assert not stats[0]["healthy"]
+        assert stats[0]["failures"] == 1
+        assert stats[0]["last_error"] == "refused"
+
+        with patch(
+            "app.core.replicas.time.monotonic", return_value=time.monotonic() + 60
+        ):
+            assert {router.choose().name for _ in range(4)} == {
+                "replica-0",
+                "replica-1",
+            }
+
+    def test_all_ejected_falls_back_to_primary(self, tmp_path):
+        """Test that reads go to the primary when every replica is out."""
+        router = make_router(make_replica_engine(tmp_path / "a.db"))
+        router.eject(router.replicas[0], "down")
+        assert router.choose() is None
+
+    def test_check_ejects_and_readmits(self, tmp_path):
+        """Test that the health check follows replica availability."""
+        good = make_replica_engine(tmp_path / "a.db")
+        bad = make_replica_engine(tmp_path / "missing" / "b.db")
+        router = make_router(good, bad)
+        router.eject(router.replicas[0], "earlier failure")
+
+        asyncio.run(router.check())
+
+        assert [replica["healthy"] for replica in router.get_stats()] == [True, False]
+
+
+class TestReadYourWrites:
+    """Test cases for keeping recent writers on the primary."""
+
+    @pytest.fixture
+    def writer_client(self):
+        """Create a test client for a small app behind the middleware."""
+        test_app = FastAPI()
+
+        @test_app.get("/items")
+        async def list_items():
+            return []
+
+        @test_app.post("/items")
+        async def create_item():
+            return {"id": 1}
+
+        @test_app.post("/fail", status_code=400)
+        async def fail():
+            return {}
+
+        test_app.add_middleware(ReadYourWritesMiddleware, window=5)
+        return TestClient(test_app)
+
+    def test_write_sets_cookie(self, writer_client):
+        """Test that a successful write marks the client."""
+        response = writer_client.post("/items")
+        assert PRIMARY_COOKIE in response.cookies
+        assert wrote_recently(f"{PRIMARY_COOKIE}={response.cookies[PRIMARY_COOKIE]}")
+
+    def test_reads_and_failures_set_no_cookie(self, writer_client):
+        """Test that only successful writes mark the client."""
+        assert PRIMARY_COOKIE not in writer_client.get("/items").cookies
+        assert PRIMARY_COOKIE not in writer_client.post("/fail").cookies
+
+    def test_wrote_recently(self):
+        """Test parsing the cookie and its expiry."""
+        now = 1_700_000_000.0
+        header = f"session=abc; {PRIMARY_COOKIE}={now + 5}"
+        assert wrote_recently(header, now)
+        assert not wrote_recently(header, now + 10)
+        assert not wrote_recently(f"{PRIMARY_COOKIE}=garbage", now)
+        assert not wrote_recently("session=abc", now)
+        assert not wrote_recently(None, now)
+
+
+class TestReadRouting:
+    """Test cases for public endpoints reading from replicas."""
+
+    URL = "/api/v1/posts/categories"
+
+    @pytest.fixture
+    def replica(self, tmp_path):
+        """A replica holding a category the primary does not have."""
+        path = tmp_path / "replica.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=sync_engine)
+        with sync_engine.begin() as connection:
+            connection.execute(
+                Category.__table__.insert().values(name="On Replica", slug="replica")
+            )
+        sync_engine.dispose()
+
+        engine = make_replica_engine(path)
+        router = ReplicaRouter()
+        router.add(
+            "replica-0",
+            engine,
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+        )
+        with patch("app.database.replica_router", router):
+            yield router
+
+    def test_public_read_uses_replica(self, client, test_category, replica):
+        """Test that anonymous reads are served by the replica."""
+        response = client.get(self.URL)
+        assert [category["slug"] for category in response.json()] == ["replica"]
+
+    def test_authenticated_read_uses_primary(
+        self, client, test_category, replica, auth_headers
+    ):
+        """Test that the admin panel reads its own writes."""
+        response = client.get(self.URL, headers=auth_headers)
+        assert [category["slug"] for category in response.json()] == [
+            test_category.slug
+        ]
+
+    def test_recent_writer_uses_primary(self, client, test_category, replica):
+        """Test that a client with the write cookie reads from the primary."""
+        response = client.get(
+            self.URL, headers={"Cookie": f"{PRIMARY_COOKIE}={time.time() + 5}"}
+        )
+        assert [category["slug"] for category in response.json()] == [
+            test_category.slug
+        ]
+
+    def test_ejected_replica_falls_back(self, client, test_category, replica):
+        """Test that reads go to the primary while the replica is ejected."""
+        replica.eject(replica.replicas[0], "down")
+        response = client.get(self.URL)
+        assert [category["slug"] for category in response.json()] == [
+            test_category.slug
+        ]
@@ -0,0 +1,208 @@
+"""
+Tests for full-text search over published posts
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.search import _postgres_search, _sqlite_search, fts5_query
+from app.database import get_alembic_config
+from app.models import Post
+
+URL = "/api/v1/posts/search"
+
+
+@pytest.fixture
+def library(db_session, test_category):
+    """Published posts on different subjects, plus a draft."""
+    now = datetime.now(timezone.utc)
+    posts = [
+        ("Tuning Postgres", "Notes on vacuum and indexes."),
+        ("Weekend notes", "A short aside about postgres while hiking."),
+        ("Gardening", "Tomatoes need sun and water."),
+        ("Running", "Intervals, tempo runs and recovery."),
+        ("Cooking", "Bread takes time and patience."),
+    ]
+    for i, (title, content) in enumerate(posts):
+        db_session.add(
+            Post(
+                title=title,
+                slug=f"post-{i}",
+                content=content,
+                category_id=test_category.id,
+                published_at=now,
+            )
+        )
+    db_session.add(Post(title="Postgres draft", slug="draft", content="Unpublished"))
+    db_session.commit()
+    return db_session
+
+
+def slugs(response):
+    assert response.status_code == 200
+    return [result["post"]["slug"] for result in response.json()]
+
+
+class TestFts5Query:
+    """Test cases for turning visitor input into FTS5 queries."""
+
+    @pytest.mark.parametrize(
+        "q, expected",
+        [
+            ("postgres vacuum", '"postgres" "vacuum"'),
+            ('NOT "unbalanced', '"NOT" "unbalanced"'),
+            ("title:x OR y*", '"title" "x" "OR" "y"'),
+            ("¿qué?", '"qué"'),
+            ("--- ***", ""),
+        ],
+    )
+    def test_words_are_quoted(self, q, expected):
+        """Test that query syntax in the input is searched as plain words."""
+        assert fts5_query(q) == expected
+
+
+class TestSearchEndpoint:
+    """Test cases for GET /api/v1/posts/search."""
+
+    def test_ranked_results(self, client, library):
+        """Test that a title match ranks above a passing mention."""
+        response = client.get(URL, params={"q": "postgres"})
+        assert slugs(response) == ["post-0", "post-1"]
+
+        ranks = [result["rank"] for result in response.json()]
+        assert ranks[0] > ranks[1]
+
+    def test_result_shape(self, client, library, test_category):
+        """Test that results carry the post summary, rank and snippet."""
+        [result] = client.get(URL, params={"q": "tomatoes"}).json()
+        assert result["post"]["title"] == "Gardening"
+        assert result["post"]["category"]["slug"] == test_category.slug
+        assert "content" not in result["post"]
+        assert "<mark>Tomatoes</mark>" in result["snippet"]
+
+    def test_every_word_must_match(self, client, library):
+        """Test that all search terms are required."""
+        assert slugs(client.get(URL, params={"q": "postgres vacuum"})) == ["post-0"]
+        assert slugs(client.get(URL, params={"q": "postgres tomatoes"})) == []
+
+    def test_stemming(self, client, library):
+        """Test that words match their other forms."""
+        assert slugs(client.get(URL, params={"q": "run"})) == ["post-3"]
+
+    def test_drafts_are_not_found(self, client, library):
+        """Test that unpublished posts are left out."""
+        assert "draft" not in slugs(client.get(URL, params={"q": "unpublished"}))
+
+    def test_pagination(self, client, library):
+        """Test that skip and limit page through results."""
+        first = slugs(client.get(URL, params={"q": "postgres", "limit": 1}))
+        second = slugs(client.get(URL, params={"q": "postgres", "skip": 1}))
+        assert first + second == ["post-0", "post-1"]
+
+    @pytest.mark.parametrize("q", ['"', "AND OR NOT", "a*(b", "NEAR(x y)", "-- ;"])
+    def test_query_syntax_is_not_an_error(self, client, library, q):
+        """Test that operator characters in the input are harmless."""
+        assert client.get(URL, params={"q": q}).status_code == 200
+
+    def test_query_is_required(self, client):
+        """Test that an empty query is rejected."""
+        assert client.get(URL).status_code == 422
+        assert client.get(URL, params={"q": ""}).status_code == 422
+
+
+class TestIncrementalIndexing:
+    """Test cases for keeping the index current as posts change."""
+
+    def test_created_post_is_searchable_once_published(
+        self, client, db_session, admin_auth_headers
+    ):
+        """Test that new posts are indexed and shown after publishing."""
+        response = client.post(
+            "/api/v1/posts/admin",
+            json={"title": "Kayaking", "content": "Paddling the fjords."},
+            headers=admin_auth_headers,
+        )
+        post_id = response.json()["id"]
+        assert slugs(client.get(URL, params={"q": "fjords"})) == []
+
+        client.post(f"/api/v1/posts/admin/{post_id}/publish", headers=admin_auth_headers)
+        assert slugs(client.get(URL, params={"q": "fjords"})) == ["kayaking"]
+
+    def test_updated_post_is_reindexed(self, client, library, admin_auth_headers):
+        """Test that edits replace the indexed text."""
+        post = library.query(Post).filter_by(slug="post-4").one()
+        client.put(
+            f"/api/v1/posts/admin/{post.id}",
+            json={"content": "Sourdough starters and long fermentation."},
+            headers=admin_auth_headers,
+        )
+
+        assert slugs(client.get(URL, params={"q": "sourdough"})) == ["post-4"]
+        assert slugs(client.get(URL, params={"q": "patience"})) == []
+
+    def test_deleted_post_is_removed(self, client, library, admin_auth_headers):
+        """Test that deleted posts leave the index."""
+        post = library.query(Post).filter_by(slug="post-2").one()
+        client.delete(f"/api/v1/posts/admin/{post.id}", headers=admin_auth_headers)
+        assert slugs(client.get(URL, params={"q": "tomatoes"})) == []
+
+
+class TestSearchStatements:
+    """Test cases for how searches reach the index."""
+
+    def test_sqlite_search_uses_fts_index(self, library):
+        """Test that the SQLite query is driven by the FTS5 index."""
+        compiled = _sqlite_search.compile(dialect=sqlite.dialect())
+        values = compiled.construct_params({"q": '"postgres"', "skip": 0, "limit": 10})
+        arguments = tuple(values[name] for name in compiled.positiontup)
+        connection = library.connection()
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled.string}", arguments
+        ).all()
+
+        details = [row[3] for row in plan]
+        assert any("posts_fts VIRTUAL TABLE INDEX" in line for line in details)
+        assert not any(line.startswith("SCAN posts ") for line in details)
+
+    def test_postgres_search_uses_tsvector(self):
+        """Test that the PostgreSQL query matches the indexed tsvector."""
+        sql = str(_postgres_search.compile(dialect=postgresql.dialect()))
+        assert "posts.search_vector @@ websearch_to_tsquery('english'" in sql
+        assert "ts_rank_cd(posts.search_vector" in sql
+
+    @pytest.mark.parametrize("statement", [_sqlite_search, _postgres_search])
+    def test_no_pattern_matching(self, statement):
+        """Test that no search falls back to scanning text with LIKE."""
+        for dialect in (sqlite.dialect(), postgresql.dialect()):
+            assert "LIKE" not in str(statement.compile(dialect=dialect)).upper()
+
+
+class TestSearchMigration:
+    """Test cases for the migration adding search to existing databases."""
+
+    def test_existing_posts_are_indexed(self, tmp_path):
+        """Test that upgrading indexes posts written before the migration."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+        config = get_alembic_config()
+        with engine.begin() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "3f9a1c2b7d40")
+            connection.exec_driver_sql(
+                "INSERT INTO posts (title, slug, content, published_at, created_at) "
+                "VALUES ('Archive', 'archive', 'Written long ago', "
+                "'2020-01-01', '2020-01-01')"
+            )
+            command.upgrade(config, "head")
+            match = "SELECT rowid FROM posts_fts WHERE posts_fts MATCH 'ago'"
+            assert connection.exec_driver_sql(match).all() == [(1,)]
+
+            command.downgrade(config, "3f9a1c2b7d40")
+            tables = connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE name LIKE 'posts_fts%'"
+            ).all()
+            assert tables == []
+        engine.dispose()